@@ -1,10 +1,19 @@
 """Flask application for Task Optimization System."""
 
 import os
-from flask import Flask, request, jsonify
+import threading
+import time
+import uuid
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_restful import Api, Resource
 from dotenv import load_dotenv
+from src.cache import ScheduleCache
+from src.jobs import JobQueue
+from src.metrics import MetricsCollector
 from src.optimizer import TaskOptimizer
+from src.session import ScheduleSession, SessionStore
+from src.wire import (MSGPACK_MIMETYPE, NDJSON_MIMETYPE, msgpack_error, read_msgpack,
+                      read_ndjson, write_msgpack, write_ndjson)
 
 # Load environment variables
 load_dotenv()
@@ -13,45 +22,338 @@ load_dotenv()
 app = Flask(__name__)
 api = Api(app)
 
-# Initialize task optimizer
-optimizer = TaskOptimizer()
+# Process-wide request metrics
+collector = MetricsCollector()
+
+# Initialize task optimizer with the shared result cache; the optimizer
+# is stateless, so one instance serves all request threads. Profiled runs
+# (PROFILE_SAMPLE_RATE) feed their phase timings into the collector.
+cache = ScheduleCache.from_env()
+optimizer = TaskOptimizer(cache=cache, on_profile=collector.record_profile)
+
+# Stored schedules for incremental edits, keyed by schedule id; idle
+# ones expire after SESSION_TTL and at most SESSION_MAX_ENTRIES are kept
+sessions = SessionStore.from_env()
+
+# Background job queue, started on the first /api/jobs request
+jobs = None
+jobs_lock = threading.Lock()
+
+
+def get_jobs() -> JobQueue:
+    """Return the job queue, starting it (and resuming stored jobs) on first use."""
+    global jobs
+    if jobs is None:
+        with jobs_lock:
+            if jobs is None:
+                jobs = JobQueue.from_env()
+    return jobs
 
 
 class OptimizeEndpoint(Resource):
     """API endpoint for task optimization."""
 
     def post(self):
-        """Process optimization request."""
+        """Process optimization request.
+
+        Bodies sent as application/x-ndjson (a resources header line, then
+        one task per line) are parsed incrementally and answered with a
+        streamed NDJSON schedule ending in a metrics line.
+
+        Bodies sent as application/x-msgpack carry the tasks as packed
+        columns (see src/wire.py) and skip per-task parsing. Clients that
+        Accept application/x-msgpack get the schedule back as packed
+        columns; JSON stays the default.
+        """
+        binary = request.accept_mimetypes.best_match(
+            ['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+        try:
+            if request.mimetype == NDJSON_MIMETYPE:
+                return self._post_ndjson()
+
+            if request.mimetype == MSGPACK_MIMETYPE:
+                header, table = read_msgpack(request.get_data())
+                g.task_count = len(table)
+                result = optimizer.optimize_table(
+                    table, header.get('resources'), header.get('constraints')
+                )
+            else:
+                data = request.get_json()
+                tasks = data.get('tasks')
+                g.task_count = len(tasks or [])
+
+                # Run optimization
+                result = optimizer.optimize(tasks, data.get('resources'), data.get('constraints'),
+                                            predict_durations=bool(data.get('predict_durations')))
+
+            if binary:
+                return Response(write_msgpack(result), mimetype=MSGPACK_MIMETYPE)
+            return {
+                'status': 'success',
+                'optimized_schedule': result.schedule.to_dict(),
+                'metrics': dict(result.metrics)
+            }, 200
+
+        except Exception as e:
+            if binary:
+                return Response(msgpack_error(str(e)), status=400, mimetype=MSGPACK_MIMETYPE)
+            return {'status': 'error', 'message': str(e)}, 400
+
+    def _post_ndjson(self):
+        """Optimize a streamed NDJSON request and stream the schedule back."""
+        header, table = read_ndjson(request.stream)
+        g.task_count = len(table)
+        result = optimizer.optimize_table(
+            table, header.get('resources'), header.get('constraints')
+        )
+        return Response(stream_with_context(write_ndjson(result)), mimetype=NDJSON_MIMETYPE)
+
+
+class BatchOptimizeEndpoint(Resource):
+    """API endpoint for optimizing many independent projects at once."""
+
+    def post(self):
+        """Process a batch of optimization problems."""
         try:
             data = request.get_json()
-            tasks = data.get('tasks')
-            constraints = data.get('constraints')
+            problems = data.get('problems')
+            if not isinstance(problems, list):
+                raise ValueError("A list of problems is required")
+            g.task_count = sum(len(p.get('tasks') or []) for p in problems)
+
+            results = optimizer.optimize_many(
+                problems,
+                max_workers=data.get('max_workers'),
+                chunksize=data.get('chunksize'),
+                predict_durations=bool(data.get('predict_durations'))
+            )
 
-            # Set tasks and constraints
-            optimizer.set_tasks(tasks)
-            optimizer.set_constraints(constraints)
+            return {
+                'status': 'success',
+                'results': [
+                    {
+                        'status': 'success',
+                        'optimized_schedule': result.schedule.to_dict(),
+                        'metrics': dict(result.metrics)
+                    } if result.ok else {'status': 'error', 'message': result.error}
+                    for result in results
+                ]
+            }, 200
 
-            # Run optimization
-            result = optimizer.optimize()
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+
+class ScheduleListEndpoint(Resource):
+    """API endpoint for creating stored schedules."""
+
+    def post(self):
+        """Optimize a project and store it for later edits.
+
+        The body holds tasks, resources and optional constraints (calendars,
+        release times, deadlines, simulation), which later edits keep.
+        """
+        try:
+            data = request.get_json()
+            g.task_count = len(data.get('tasks') or [])
+            session = ScheduleSession(data.get('tasks'), data.get('resources'),
+                                      data.get('constraints'))
+            schedule_id = uuid.uuid4().hex
+            sessions.put(schedule_id, session)
 
             return {
                 'status': 'success',
-                'optimized_schedule': result['schedule'],
-                'metrics': result['metrics']
+                'schedule_id': schedule_id,
+                'optimized_schedule': session.get_schedule().to_dict(),
+                'metrics': session.get_metrics()
+            }, 201
+
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+
+class ScheduleEndpoint(Resource):
+    """API endpoint for reading and editing a stored schedule."""
+
+    operations = {
+        'add_task': lambda session, op: session.add_task(op['task']),
+        'remove_task': lambda session, op: session.remove_task(op['id']),
+        'update_duration': lambda session, op: session.update_duration(op['id'], op['duration']),
+        'add_resource': lambda session, op: session.add_resource(op['resource'])
+    }
+
+    def get(self, schedule_id):
+        """Return a stored schedule."""
+        session = sessions.get(schedule_id)
+        if session is None:
+            return {'status': 'error', 'message': 'Schedule not found'}, 404
+        with session.lock:
+            return {
+                'status': 'success',
+                'schedule_id': schedule_id,
+                'optimized_schedule': session.get_schedule().to_dict(),
+                'metrics': session.get_metrics()
             }, 200
 
+    def patch(self, schedule_id):
+        """Apply edit operations and return only the rescheduled tasks.
+
+        The body holds an "operations" list, e.g.
+        {"op": "update_duration", "id": 7, "duration": 3}. The operations
+        apply all or nothing: if one fails, the schedule is left as it was.
+        """
+        session = sessions.get(schedule_id)
+        if session is None:
+            return {'status': 'error', 'message': 'Schedule not found'}, 404
+        try:
+            data = request.get_json()
+            operations = data.get('operations', [])
+            for op in operations:
+                if op.get('op') not in self.operations:
+                    raise ValueError(f"Unknown operation {op.get('op')}")
+            changed = set()
+            with session.lock:
+                state = session.snapshot()
+                try:
+                    for op in operations:
+                        self.operations[op['op']](session, op)
+                        changed.update(session.changed_ids())
+                except Exception:
+                    session.restore(state)
+                    raise
+
+                schedule = session.get_schedule()
+                return {
+                    'status': 'success',
+                    'schedule_id': schedule_id,
+                    'changed_tasks': {
+                        task_id: schedule[task_id] for task_id in changed if task_id in schedule
+                    },
+                    'metrics': session.get_metrics()
+                }, 200
+
         except Exception as e:
             return {'status': 'error', 'message': str(e)}, 400
 
+    def delete(self, schedule_id):
+        """Discard a stored schedule."""
+        session = sessions.pop(schedule_id)
+        if session is None:
+            return {'status': 'error', 'message': 'Schedule not found'}, 404
+        return {'status': 'success'}, 200
+
+
+class ScheduleQueryEndpoint(Resource):
+    """API endpoint for time-based lookups in a stored schedule."""
+
+    def get(self, schedule_id):
+        """Return the tasks running at a time, overlapping a window, or of a team.
+
+        Query parameters: "at" (a point in time) or "start" and "end" (a
+        window [start, end)), each optionally narrowed to one "team"; a
+        "team" alone lists that team's tasks. "limit" caps the number of
+        tasks returned. Lookups use the schedule's interval index, so
+        they cost O(log n) per team slot plus the tasks returned.
+        """
+        session = sessions.get(schedule_id)
+        if session is None:
+            return {'status': 'error', 'message': 'Schedule not found'}, 404
+        args = request.args
+        try:
+            team = args.get('team')
+            limit = args.get('limit', type=int)
+            with session.lock:
+                timeline = session.get_timeline()
+                if 'at' in args:
+                    rows = timeline.at(float(args['at']), team)
+                elif 'start' in args and 'end' in args:
+                    rows = timeline.overlapping(float(args['start']), float(args['end']), team)
+                elif team is not None:
+                    rows = timeline.team(team)
+                else:
+                    raise ValueError("Give at, start and end, or team")
+                total = len(rows)
+                tasks = timeline.entries(rows[:limit] if limit is not None else rows)
+            return {
+                'status': 'success',
+                'schedule_id': schedule_id,
+                'count': total,
+                'tasks': tasks
+            }, 200
+
+        except KeyError as e:
+            return {'status': 'error', 'message': f"Unknown team {e.args[0]}"}, 404
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+
+class JobListEndpoint(Resource):
+    """API endpoint for submitting background optimization jobs."""
+
+    def post(self):
+        """Queue an optimization and return its job id right away."""
+        try:
+            data = request.get_json()
+            g.task_count = len(data.get('tasks') or [])
+            job_id = get_jobs().submit({
+                'tasks': data.get('tasks'),
+                'resources': data.get('resources'),
+                'constraints': data.get('constraints')
+            })
+            return {'status': 'success', 'job': get_jobs().status(job_id)}, 202
+
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+
+class JobEndpoint(Resource):
+    """API endpoint for polling and cancelling a background job."""
+
+    def get(self, job_id):
+        """Return the job's status, phase and progress."""
+        job = get_jobs().status(job_id)
+        if job is None:
+            return {'status': 'error', 'message': 'Job not found'}, 404
+        return {'status': 'success', 'job': job}, 200
+
+    def delete(self, job_id):
+        """Cancel a queued job, or stop a running one at its next phase."""
+        state = get_jobs().cancel(job_id)
+        if state is None:
+            return {'status': 'error', 'message': 'Job not found'}, 404
+        return {'status': 'success', 'job': get_jobs().status(job_id)}, 200
+
+
+class JobResultEndpoint(Resource):
+    """API endpoint for fetching a finished job's schedule."""
+
+    def get(self, job_id):
+        """Return the optimized schedule once the job has succeeded."""
+        job = get_jobs().result(job_id)
+        if job is None:
+            return {'status': 'error', 'message': 'Job not found'}, 404
+        result = job.pop('result')
+        if job['status'] != 'succeeded':
+            return {'status': 'error', 'message': f"Job is {job['status']}", 'job': job}, 409
+        return {
+            'status': 'success',
+            'job': job,
+            'optimized_schedule': result['optimized_schedule'],
+            'metrics': result['metrics']
+        }, 200
+
 
 class MetricsEndpoint(Resource):
     """API endpoint for performance metrics."""
 
     def get(self):
-        """Get performance metrics."""
+        """Get aggregate request metrics for this worker process."""
         try:
-            metrics = optimizer.get_metrics()
-            return {'status': 'success', 'metrics': metrics}, 200
+            return {
+                'status': 'success',
+                'metrics': collector.snapshot(),
+                'cache': cache.stats() if cache is not None else None
+            }, 200
         except Exception as e:
             return {'status': 'error', 'message': str(e)}, 400
 
@@ -64,10 +366,37 @@ class HealthCheck(Resource):
         return {'status': 'healthy'}, 200
 
 
+@app.before_request
+def start_timer():
+    """Stamp the request start for latency metrics."""
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Record latency, status and task count of each API request."""
+    started = g.get('request_started')
+    if started is not None and request.url_rule is not None:
+        collector.record(
+            request.url_rule.rule,
+            response.status_code,
+            time.perf_counter() - started,
+            g.get('task_count')
+        )
+    return response
+
+
 # Register API routes
 api.add_resource(HealthCheck, '/api/health')
 api.add_resource(OptimizeEndpoint, '/api/optimize')
+api.add_resource(BatchOptimizeEndpoint, '/api/optimize/batch')
 api.add_resource(MetricsEndpoint, '/api/metrics')
+api.add_resource(ScheduleListEndpoint, '/api/schedules')
+api.add_resource(ScheduleEndpoint, '/api/schedules/<string:schedule_id>')
+api.add_resource(ScheduleQueryEndpoint, '/api/schedules/<string:schedule_id>/query')
+api.add_resource(JobListEndpoint, '/api/jobs')
+api.add_resource(JobEndpoint, '/api/jobs/<string:job_id>')
+api.add_resource(JobResultEndpoint, '/api/jobs/<string:job_id>/result')
 
 
 @app.errorhandler(404)
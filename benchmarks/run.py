@@ -0,0 +1,212 @@
+"""Benchmark TaskOptimizer.optimize and POST /api/optimize.
+
+Usage:
+    python -m benchmarks.run --suite quick --output results.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+Every workload is generated from a fixed seed, timed over several runs
+and then run once more under tracemalloc for its peak memory. The JSON
+report can be stored as a baseline; --compare exits with status 1 when
+any case is slower or larger than the baseline by more than --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.workloads import SUITES, Workload, generate
+
+# The API must not answer repeated runs from the result cache; the
+# cached target builds its own cache to time hits on purpose
+os.environ['ENABLE_CACHE'] = 'False'
+
+
+def _measure(run: Callable[[], object], repeat: int) -> Dict:
+    """Time repeat runs, then one traced run for peak Python/NumPy memory."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': {
+            'min': round(min(timings), 6),
+            'median': round(statistics.median(timings), 6),
+            'mean': round(statistics.fmean(timings), 6)
+        },
+        'peak_memory_mb': round(peak / 2 ** 20, 3)
+    }
+
+
+def bench_optimize(workload: Workload, repeat: int) -> Dict:
+    """Benchmark TaskOptimizer.optimize on one workload."""
+    from src.optimizer import TaskOptimizer
+
+    tasks, resources = generate(workload)
+    optimizer = TaskOptimizer()
+    return _measure(lambda: optimizer.optimize(tasks, resources), repeat)
+
+
+def bench_cached(workload: Workload, repeat: int) -> Dict:
+    """Benchmark TaskOptimizer.optimize answered from a warm result cache.
+
+    Against the optimize case of the same workload this shows what a hit
+    saves: it still builds the task table to hash it, but skips the rest.
+    """
+    from src.cache import ScheduleCache
+    from src.optimizer import TaskOptimizer
+
+    tasks, resources = generate(workload)
+    optimizer = TaskOptimizer(cache=ScheduleCache())
+    optimizer.optimize(tasks, resources)
+
+    def run():
+        optimizer.optimize(tasks, resources)
+        if optimizer.cache.misses != 1:
+            raise RuntimeError("The cached benchmark recomputed a schedule")
+
+    return _measure(run, repeat)
+
+
+def bench_api(workload: Workload, repeat: int) -> Dict:
+    """Benchmark POST /api/optimize through the Flask test client.
+
+    The body is serialized once up front, so the timing covers request
+    parsing, optimization and response encoding.
+    """
+    from app import app
+
+    tasks, resources = generate(workload)
+    body = json.dumps({'tasks': tasks, 'resources': resources})
+    client = app.test_client()
+
+    def run():
+        response = client.post('/api/optimize', data=body, content_type='application/json')
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/optimize returned {response.status_code}: "
+                               f"{response.get_data(as_text=True)[:200]}")
+
+    return _measure(run, repeat)
+
+
+TARGETS = {
+    'optimize': bench_optimize,
+    'cached': bench_cached,
+    'api': bench_api
+}
+
+
+def _environment() -> Dict:
+    """Describe the machine and code version the numbers came from."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit
+    }
+
+
+def run_suite(workloads: List[Workload], targets: List[str], repeat: int,
+              api_max_tasks: int) -> Dict:
+    """Run every target on every workload and return the report."""
+    results = []
+    for workload in workloads:
+        for target in targets:
+            if target == 'api' and workload.num_tasks > api_max_tasks:
+                continue
+            print(f"{target:>8} {workload.name} ...", end=' ', flush=True, file=sys.stderr)
+            measured = TARGETS[target](workload, repeat)
+            print(f"{measured['seconds']['median']:.3f}s "
+                  f"{measured['peak_memory_mb']:.1f}MB", file=sys.stderr)
+            results.append({
+                'name': f"{target}/{workload.name}",
+                'target': target,
+                'workload': workload.params(),
+                **measured
+            })
+    return {'environment': _environment(), 'repeat': repeat, 'results': results}
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Return the cases whose median time or peak memory regressed."""
+    previous = {case['name']: case for case in baseline['results']}
+    regressions = []
+    for case in report['results']:
+        before = previous.get(case['name'])
+        if before is None:
+            continue
+        checks = {
+            'seconds': (before['seconds']['median'], case['seconds']['median']),
+            'peak_memory_mb': (before['peak_memory_mb'], case['peak_memory_mb'])
+        }
+        for metric, (old, new) in checks.items():
+            ratio = new / old if old else 1.0
+            print(f"{case['name']:<48} {metric:<15} {old:>10.3f} -> {new:>10.3f} "
+                  f"({ratio:.2f}x)", file=sys.stderr)
+            if ratio > 1 + tolerance:
+                regressions.append({'name': case['name'], 'metric': metric,
+                                    'baseline': old, 'current': new, 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    parser.add_argument('--targets', nargs='+', choices=sorted(TARGETS),
+                        default=list(TARGETS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--api-max-tasks', type=int, default=100_000,
+                        help='Skip API runs for larger workloads')
+    parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Baseline report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown or growth before a case fails (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    report = run_suite(SUITES[args.suite], args.targets, args.repeat, args.api_max_tasks)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+        status = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Seeded synthetic workloads for the benchmark suite."""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Workload:
+    """Parameters of one synthetic project.
+
+    priority_skew is the Zipf exponent over priorities 1-10 (0 is
+    uniform, larger values make low priorities dominate) and
+    dependency_density the mean number of prerequisites per task.
+    """
+    num_tasks: int
+    num_resources: int = 10
+    priority_skew: float = 1.0
+    dependency_density: float = 1.0
+    window: int = 1000
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return (f"n{self.num_tasks}-r{self.num_resources}"
+                f"-skew{self.priority_skew:g}-deps{self.dependency_density:g}")
+
+    def params(self) -> Dict:
+        return asdict(self)
+
+
+def generate(workload: Workload) -> Tuple[List[Dict], List[str]]:
+    """Build the task dictionaries and resource names for a workload.
+
+    Prerequisites are drawn among the `window` preceding tasks, so the
+    graph is acyclic and its depth grows with the task count. The same
+    workload always yields the same tasks.
+    """
+    rng = np.random.default_rng(workload.seed)
+    n = workload.num_tasks
+
+    durations = rng.integers(1, 21, size=n)
+    weights = np.arange(1, 11, dtype=np.float64) ** -workload.priority_skew
+    priorities = 1 + rng.choice(10, size=n, p=weights / weights.sum())
+
+    # Distinct prerequisites per task: walk back by random positive gaps
+    counts = rng.poisson(workload.dependency_density, size=n)
+    owners = np.repeat(np.arange(n), counts)
+    mean_gap = max(workload.window / (2 * workload.dependency_density + 2), 1.0)
+    gaps = rng.geometric(min(1.0, 1.0 / mean_gap), size=len(owners))
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    walked = np.cumsum(gaps)
+    walked = walked - walked[first] + gaps[first]
+    prereqs = owners - walked
+    keep = (prereqs >= 0) & (walked <= workload.window)
+
+    depends_on = [[] for _ in range(n)]
+    for owner, prereq in zip(owners[keep].tolist(), prereqs[keep].tolist()):
+        depends_on[owner].append(prereq)
+
+    tasks = [
+        {'id': i, 'duration': duration, 'priority': priority, 'depends_on': deps}
+        for i, (duration, priority, deps) in enumerate(
+            zip(durations.tolist(), priorities.tolist(), depends_on))
+    ]
+    resources = [f"team-{i}" for i in range(workload.num_resources)]
+    return tasks, resources
+
+
+# Named collections of workloads; 'full' adds the million-task cases
+SUITES = {
+    'quick': [
+        Workload(1_000),
+        Workload(10_000),
+        Workload(10_000, num_resources=50, priority_skew=2.0, dependency_density=4.0),
+        Workload(100_000, num_resources=50, dependency_density=2.0),
+    ],
+}
+SUITES['full'] = SUITES['quick'] + [
+    Workload(100_000, num_resources=200, priority_skew=0.0, dependency_density=8.0),
+    Workload(1_000_000, num_resources=100),
+    Workload(1_000_000, num_resources=100, priority_skew=2.0, dependency_density=0.0),
+]
@@ -1,11 +1,25 @@
 """Evaluation script for Task Optimization System."""
 
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 import pandas as pd
 import numpy as np
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import joblib
 import json
+from src.forest import load_model as load_forest
 from src.optimizer import TaskOptimizer
+from src.predictor import preprocess
+
+TARGET = 'completion_time'
+
+# Partial sums kept per chunk and per bootstrap replicate:
+# count, squared error, absolute error, shifted target, shifted target squared
+_SUMS = 5
+
+# Upper bound on bootstrap weights drawn at once (replicates x rows)
+_MAX_WEIGHTS = 8_000_000
 
 
 def load_test_data(test_path='data/processed/test_data.csv'):
@@ -16,19 +30,25 @@ def load_test_data(test_path='data/processed/test_data.csv'):
 
 
 def load_model(model_path='models/trained_model.pkl'):
-    """Load trained model and scaler."""
+    """Load trained model (its flat export when present) and scaler."""
     print(f"Loading model from {model_path}...")
-    model = joblib.load(model_path)
+    model = load_forest(model_path)
     scaler = joblib.load(model_path.replace('trained_model', 'scaler'))
     return model, scaler
 
 
+def feature_matrix(X, scaler):
+    """Order a frame's feature columns as the scaler saw them in training."""
+    features = list(getattr(scaler, 'feature_names_in_', []))
+    return (X[features] if features else X).to_numpy(dtype=np.float64)
+
+
 def evaluate_model(model, scaler, X_test, y_test):
     """Evaluate model performance."""
     print("Evaluating model...")
     
-    # Scale test data
-    X_test_scaled = scaler.transform(X_test)
+    # Fill missing features and scale test data, as in training
+    X_test_scaled = preprocess(scaler, feature_matrix(X_test, scaler))
     
     # Make predictions
     y_pred = model.predict(X_test_scaled)
@@ -49,13 +69,133 @@ def evaluate_model(model, scaler, X_test, y_test):
     return metrics, y_pred
 
 
+# Model and scaler of each evaluation worker process
+_worker_model = None
+
+
+def _init_worker(model_path):
+    """Load the model once per worker; the flat export is shared memory."""
+    global _worker_model
+    _worker_model = load_model(model_path)
+
+
+def _partial_sums(values, weights=None):
+    """Sum the metric statistics, per bootstrap replicate when weighted."""
+    if weights is None:
+        return values.sum(axis=0)
+    return weights @ values
+
+
+def evaluate_chunk(args):
+    """Predict one chunk and return its partial sums.
+
+    Returns the plain sums and, for each bootstrap replicate, the sums
+    under Poisson(1) row weights, which is resampling with replacement
+    for a stream of unknown length.
+    """
+    X, y, shift, replicates, seed = args
+    model, scaler = _worker_model
+    y_pred = model.predict(preprocess(scaler, X))
+
+    error = y - y_pred
+    centered = y - shift
+    values = np.column_stack([np.ones_like(y), error ** 2, np.abs(error),
+                              centered, centered ** 2])
+    sums = _partial_sums(values)
+
+    boot = np.zeros((replicates, _SUMS))
+    if replicates:
+        rng = np.random.default_rng(seed)
+        rows = max(1, _MAX_WEIGHTS // replicates)
+        for start in range(0, len(y), rows):
+            block = values[start:start + rows]
+            weights = rng.poisson(1.0, size=(replicates, len(block))).astype(np.float64)
+            boot += _partial_sums(block, weights)
+    return sums, boot
+
+
+def metrics_from_sums(sums):
+    """Turn (..., 5) partial sums into MSE, MAE, RMSE and R2 arrays."""
+    count, squared, absolute, total, total_squared = np.moveaxis(sums, -1, 0)
+    count = np.maximum(count, 1)
+    mse = squared / count
+    variance = total_squared - total ** 2 / count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(variance > 0, 1 - squared / variance, 0.0)
+    return {
+        'MSE': mse,
+        'MAE': absolute / count,
+        'RMSE': np.sqrt(mse),
+        'R2_Score': r2
+    }
+
+
+def evaluate_chunked(test_path='data/processed/test_data.csv',
+                     model_path='models/trained_model.pkl', chunksize=100_000,
+                     workers=None, replicates=1000, confidence=0.95, seed=0):
+    """Evaluate the model on a CSV streamed in chunks across a process pool.
+
+    At most two chunks per worker are in flight, so memory stays fixed
+    however large the test set is. Point estimates come from the summed
+    per-chunk statistics and the confidence intervals are percentiles of
+    the bootstrap replicates.
+    """
+    print(f"Evaluating {test_path} in chunks of {chunksize}...")
+    workers = workers or os.cpu_count() or 1
+    scaler = joblib.load(model_path.replace('trained_model', 'scaler'))
+
+    sums = np.zeros(_SUMS)
+    boot = np.zeros((replicates, _SUMS))
+    shift = None
+
+    def collect(done):
+        nonlocal sums, boot
+        for future in done:
+            chunk_sums, chunk_boot = future.result()
+            sums = sums + chunk_sums
+            boot = boot + chunk_boot
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path,)) as pool:
+        pending = set()
+        for index, chunk in enumerate(pd.read_csv(test_path, chunksize=chunksize)):
+            y = chunk[TARGET].to_numpy(dtype=np.float64)
+            X = feature_matrix(chunk.drop(TARGET, axis=1), scaler)
+            if shift is None:
+                # Centering on an early mean keeps the R2 sums well conditioned
+                shift = float(y.mean())
+            pending.add(pool.submit(evaluate_chunk, (X, y, shift, replicates, seed + index)))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(pending)
+
+    metrics = {name: float(value) for name, value in metrics_from_sums(sums).items()}
+    metrics['n_samples'] = int(sums[0])
+    if replicates:
+        tail = (1 - confidence) / 2 * 100
+        metrics['confidence_intervals'] = {
+            name: [float(np.percentile(values, tail)), float(np.percentile(values, 100 - tail))]
+            for name, values in metrics_from_sums(boot).items()
+        }
+        metrics['confidence_level'] = confidence
+    return metrics
+
+
 def print_results(metrics):
     """Print evaluation results."""
     print("\n" + "="*50)
     print("MODEL EVALUATION RESULTS")
     print("="*50)
+    intervals = metrics.get('confidence_intervals', {})
     for metric, value in metrics.items():
-        print(f"{metric}: {value:.4f}")
+        if not isinstance(value, float) or metric == 'confidence_level':
+            continue
+        if metric in intervals:
+            low, high = intervals[metric]
+            print(f"{metric}: {value:.4f} ({metrics['confidence_level']:.0%} CI {low:.4f} - {high:.4f})")
+        else:
+            print(f"{metric}: {value:.4f}")
     print("="*50 + "\n")
 
 
@@ -68,18 +208,35 @@ def save_results(metrics, output_path='models/evaluation_metrics.json'):
 
 
 if __name__ == '__main__':
-    # Load test data
-    test_df = load_test_data()
-    
-    # Prepare features and target
-    X_test = test_df.drop('completion_time', axis=1)
-    y_test = test_df['completion_time']
-    
-    # Load model
-    model, scaler = load_model()
-    
-    # Evaluate
-    metrics, predictions = evaluate_model(model, scaler, X_test, y_test)
+    parser = argparse.ArgumentParser(description='Evaluate the completion time model.')
+    parser.add_argument('--test-data', default='data/processed/test_data.csv')
+    parser.add_argument('--model', default='models/trained_model.pkl')
+    parser.add_argument('--chunked', action='store_true',
+                        help='Stream the test set through a process pool with bootstrap CIs')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--bootstrap', type=int, default=1000,
+                        help='Bootstrap replicates for the confidence intervals (0 disables)')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.chunked:
+        metrics = evaluate_chunked(args.test_data, args.model, args.chunksize, args.workers,
+                                   args.bootstrap, args.confidence, args.seed)
+    else:
+        # Load test data
+        test_df = load_test_data(args.test_data)
+
+        # Prepare features and target
+        X_test = test_df.drop(TARGET, axis=1)
+        y_test = test_df[TARGET]
+
+        # Load model
+        model, scaler = load_model(args.model)
+
+        # Evaluate
+        metrics, predictions = evaluate_model(model, scaler, X_test, y_test)
     
     # Print and save results
     print_results(metrics)
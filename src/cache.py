@@ -0,0 +1,186 @@
+"""Content-addressed cache for optimization results."""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.task_table import TaskTable
+
+
+def _canonical(value) -> str:
+    """Serialize a JSON-like value with sorted keys and no whitespace."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def _hash_column(digest, column: np.ndarray) -> None:
+    """Feed one column into a digest, tagged with its dtype and length."""
+    if column.dtype == object:
+        data = _canonical(column.tolist()).encode()
+    else:
+        data = np.ascontiguousarray(column).tobytes()
+    digest.update(f"{column.dtype.str}:{column.size}:{len(data)};".encode())
+    digest.update(data)
+
+
+def table_key(table: TaskTable, resources: List, constraints: Dict = None) -> str:
+    """Hash an optimization problem independently of task and dependency order.
+
+    The task columns are hashed as raw bytes in id order, and each task's
+    prerequisites as their sorted positions in that order. Resource order
+    is kept because it decides which team wins a tie. Task order only
+    breaks ties between otherwise equal tasks, so a cached schedule for a
+    reordered payload is an equally valid result.
+    """
+    ids = table.ids
+    try:
+        order = np.argsort(ids, kind='stable')
+    except TypeError:
+        # Mixed id types do not compare; sort them by their JSON text
+        order = np.argsort(np.asarray([_canonical(task_id) for task_id in ids.tolist()]),
+                           kind='stable')
+    rank = np.empty(len(table), dtype=np.int64)
+    rank[order] = np.arange(len(table))
+    counts = np.diff(table.dep_offsets)
+    owners = rank[np.repeat(np.arange(len(table)), counts)]
+    targets = rank[table.dep_targets]
+
+    digest = hashlib.sha256()
+    for column in (ids[order], table.duration[order], table.priority[order], counts[order],
+                   targets[np.lexsort((targets, owners))]):
+        _hash_column(digest, column)
+    if table.skills is not None:
+        _hash_column(digest, table.skills[order])
+    digest.update(_canonical([list(resources or []), constraints or {}]).encode())
+    return digest.hexdigest()
+
+
+def schedule_key(tasks: List[Dict], resources: List, constraints: Dict = None) -> str:
+    """Hash an optimization problem given as task dictionaries (see table_key)."""
+    return table_key(TaskTable.from_dicts(tasks), resources, constraints)
+
+
+class ScheduleCache:
+    """Bounded LRU cache with per-entry TTL and an optional disk backend.
+
+    Entries live in memory up to max_entries, least recently used first out.
+    With a directory, entries are also pickled to disk so other workers and
+    restarted processes can reuse them until their TTL runs out.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600,
+                 directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['ScheduleCache']:
+        """Build a cache from ENABLE_CACHE, CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_DIR."""
+        if os.getenv('ENABLE_CACHE', 'True').lower() not in ('1', 'true', 'yes'):
+            return None
+        return cls(
+            max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 256)),
+            ttl=float(os.getenv('CACHE_TTL', 3600)),
+            directory=os.getenv('CACHE_DIR') or None
+        )
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+
+        entry = self._load(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, entry[1], entry[0])
+        return entry[1]
+
+    def put(self, key: str, value) -> None:
+        """Store value under key in memory (and on disk when configured)."""
+        with self._lock:
+            self._store(key, value, time.time() + self.ttl)
+        if self.directory:
+            self._save(key, value)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl
+            }
+
+    def _store(self, key: str, value, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _load(self, key: str, now: float):
+        """Read an unexpired (expires_at, value) entry from disk, removing it if stale."""
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            expires_at = os.path.getmtime(path) + self.ttl
+            if expires_at <= now:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return expires_at, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _save(self, key: str, value) -> None:
+        """Write an entry atomically so concurrent readers never see partial files."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            # Values that cannot be pickled stay cached in memory only
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
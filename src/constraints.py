@@ -0,0 +1,264 @@
+"""Resource calendars and task time windows for the allocator.
+
+Constraints arrive in the optimize() constraints dictionary:
+
+    'blackouts':     {team: [[start, end], ...]}  times a team is unavailable
+    'availability':  {team: [[start, end], ...]}  the only times a team works
+    'release_times': {task id: time}              earliest start of a task
+    'deadlines':     {task id: time}              latest end of a task
+    'deadline':      time                         latest end of every task
+
+Intervals are half-open, [start, end). A task runs uninterrupted, so it
+needs a gap in its team's calendar at least as long as its duration.
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.task_table import TaskTable
+
+# Largest number of late task ids listed in a report
+_MAX_REPORTED = 100
+
+# Gaps tried for a whole batch by earliest_starts() before single lookups
+_VECTOR_GAPS = 4
+
+
+class ResourceCalendar:
+    """Sorted, merged blackout intervals of one resource.
+
+    The free gaps between blackouts are indexed by a max segment tree
+    over their lengths, so the first gap that fits a task is found in
+    O(log B) for B blackouts, however many shorter gaps come first.
+    """
+
+    def __init__(self, blackouts: Sequence[Sequence[float]]):
+        merged = []
+        for start, end in sorted((float(s), float(e)) for s, e in blackouts if e > s):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+        # Arrays for earliest_starts(), starts closed by an unbounded gap
+        self._start_array = np.append(self.starts, np.inf)
+        self._end_array = np.asarray(self.ends, dtype=np.float64)
+
+        # Gap j (1 <= j < B) runs from ends[j - 1] to starts[j]; the gap
+        # after the last blackout is unbounded and is not stored
+        lengths = [self.starts[j] - self.ends[j - 1] for j in range(1, len(merged))]
+        self._size = 1
+        while self._size < max(len(lengths), 1):
+            self._size *= 2
+        self._tree = [-1.0] * (2 * self._size)
+        self._tree[self._size:self._size + len(lengths)] = lengths
+        for node in range(self._size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _first_gap(self, first: int, duration: float) -> int:
+        """Index of the first gap >= first at least duration long.
+
+        Walks up from the leaf of gap first past subtrees too short or
+        left of it, then down the first one that fits: O(log B) steps.
+        Returns len(self) (the unbounded last gap) when no bounded gap fits.
+        """
+        tree, size = self._tree, self._size
+        bounded = len(self.starts) - 1
+        if first > bounded:
+            return len(self.starts)
+        i = first - 1 + size
+        while tree[i] < duration:
+            # Up past right children, then over to the next subtree
+            while i & 1:
+                i >>= 1
+            if not i:
+                return len(self.starts)
+            i += 1
+        while i < size:
+            i = 2 * i if tree[2 * i] >= duration else 2 * i + 1
+        return i - size + 1
+
+    def earliest_start(self, time: float, duration: float) -> float:
+        """Earliest start >= time at which duration fits between blackouts."""
+        i = bisect_right(self.ends, time)
+        if i < len(self.starts) and self.starts[i] <= time:
+            # time falls inside blackout i
+            time = self.ends[i]
+            i += 1
+        if i == len(self.starts) or self.starts[i] - time >= duration:
+            return time
+        return self.ends[self._first_gap(i + 1, duration) - 1]
+
+    def earliest_starts(self, times: np.ndarray, durations: np.ndarray) -> np.ndarray:
+        """earliest_start() of 1-D arrays of times and durations at once.
+
+        Most tasks fit the gap they are ready in or one of the next few,
+        which are tried for all of them together; the rest are looked up
+        one at a time.
+        """
+        result = np.array(times, dtype=np.float64)
+        if not len(self.starts):
+            return result
+        starts, ends = self._start_array, self._end_array
+        # Index of the first blackout ending after each time; one it falls
+        # inside moves the time to its end
+        i = np.searchsorted(ends, result, side='right')
+        inside = np.flatnonzero((starts[i] <= result) & (i < len(ends)))
+        result[inside] = ends[i[inside]]
+        i[inside] += 1
+        # Starts after an open-ended blackout compare inf - inf
+        with np.errstate(invalid='ignore'):
+            pending = np.flatnonzero(starts[i] - result < durations)
+            for _ in range(_VECTOR_GAPS):
+                if not pending.size:
+                    return result
+                # Too short: try the gap after the blackout ending the current one
+                blocked = i[pending]
+                result[pending] = ends[blocked]
+                i[pending] = blocked + 1
+                pending = pending[starts[blocked + 1] - ends[blocked] < durations[pending]]
+        for k in pending.tolist():
+            result[k] = self.earliest_start(result[k], durations[k])
+        return result
+
+
+def _availability_to_blackouts(windows: Sequence[Sequence[float]]) -> List[List[float]]:
+    """Complement of the working windows: blackouts before, between and after."""
+    blackouts = []
+    cursor = 0.0
+    for start, end in sorted((float(s), float(e)) for s, e in windows):
+        if start > cursor:
+            blackouts.append([cursor, start])
+        cursor = max(cursor, end)
+    blackouts.append([cursor, float('inf')])
+    return blackouts
+
+
+def _task_values(table: TaskTable, values: Dict, name: str) -> np.ndarray:
+    """Spread a {task id: time} mapping over table rows (NaN where unset)."""
+    column = np.full(len(table), np.nan)
+    for task_id, value in values.items():
+        try:
+            row = table.position(task_id)
+        except KeyError:
+            try:
+                # JSON object keys are strings; ids are often integers
+                row = table.position(int(task_id))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{name} refers to unknown task {task_id}") from None
+        column[row] = float(value)
+    return column
+
+
+class ScheduleConstraints:
+    """Calendars per team plus release times and deadlines per task row."""
+
+    def __init__(self, calendars: List[Optional[ResourceCalendar]],
+                 release: Optional[np.ndarray], deadline: Optional[np.ndarray]):
+        self.calendars = calendars
+        self.release = release
+        self.deadline = deadline
+
+    @classmethod
+    def from_dict(cls, constraints: Optional[Dict], table: TaskTable,
+                  teams: List[str]) -> Optional['ScheduleConstraints']:
+        """Build the constraints for a table, or None if there are none."""
+        if not constraints:
+            return None
+
+        calendars = [None] * len(teams)
+        positions = {team: i for i, team in enumerate(teams)}
+        for key, convert in (('availability', _availability_to_blackouts),
+                             ('blackouts', lambda intervals: intervals)):
+            for team, intervals in (constraints.get(key) or {}).items():
+                if team not in positions:
+                    raise ValueError(f"{key} refers to unknown resource {team}")
+                blackouts = convert(intervals)
+                existing = calendars[positions[team]]
+                if existing is not None:
+                    blackouts = list(blackouts) + list(zip(existing.starts, existing.ends))
+                calendars[positions[team]] = ResourceCalendar(blackouts)
+
+        release = None
+        if constraints.get('release_times'):
+            release = np.nan_to_num(
+                _task_values(table, constraints['release_times'], 'release_times'), nan=0.0)
+
+        deadline = None
+        if constraints.get('deadlines'):
+            deadline = _task_values(table, constraints['deadlines'], 'deadlines')
+        if constraints.get('deadline') is not None:
+            project = float(constraints['deadline'])
+            deadline = np.full(len(table), project) if deadline is None else \
+                np.fmin(deadline, project)
+
+        if all(calendar is None for calendar in calendars):
+            calendars = None
+        if calendars is None and release is None and deadline is None:
+            return None
+        return cls(calendars, release, deadline)
+
+    def take(self, rows: np.ndarray, teams: List[int]) -> 'ScheduleConstraints':
+        """Constraints of a sub-problem with the given task rows and teams."""
+        return ScheduleConstraints(
+            [self.calendars[team] for team in teams] if self.calendars is not None else None,
+            self.release[rows] if self.release is not None else None,
+            self.deadline[rows] if self.deadline is not None else None
+        )
+
+    def report(self, table: TaskTable, slot_team: Sequence[int] = None) -> Dict:
+        """Summarize deadline and calendar violations of the scheduled table.
+
+        Tasks that cannot meet their deadline even when started at their
+        release time are infeasible; the rest that end late were missed
+        by the schedule. With slot_team (the team of every slot, see
+        ResourcePool) tasks that overlap a blackout of their team are
+        reported as unavailable: they fit no team's calendar, and the
+        allocator placed them as if there was none.
+        """
+        report = {'missed_deadlines': 0, 'infeasible_tasks': 0}
+        if self.calendars is not None and slot_team is not None:
+            unavailable = self._unavailable(table, np.asarray(slot_team)[table.resource])
+            report['unavailable_tasks'] = len(unavailable)
+            report['unavailable_task_ids'] = table.ids[unavailable[:_MAX_REPORTED]].tolist()
+        if self.deadline is None:
+            return report
+
+        has_deadline = ~np.isnan(self.deadline)
+        earliest_end = table.duration + (self.release if self.release is not None else 0)
+        infeasible = has_deadline & (earliest_end > self.deadline)
+        late = has_deadline & (table.end > self.deadline)
+        lateness = np.where(late, table.end - self.deadline, 0)
+        late_rows = np.flatnonzero(late)
+        report.update({
+            'missed_deadlines': len(late_rows),
+            'infeasible_tasks': int(infeasible.sum()),
+            'max_lateness': lateness.max().item() if len(late_rows) else 0,
+            'late_tasks': table.ids[late_rows[:_MAX_REPORTED]].tolist(),
+            'infeasible_task_ids': table.ids[np.flatnonzero(infeasible)[:_MAX_REPORTED]].tolist()
+        })
+        return report
+
+    def _unavailable(self, table: TaskTable, team: np.ndarray) -> np.ndarray:
+        """Rows whose run overlaps a blackout of their team, in row order.
+
+        One binary search per task: the first blackout ending after the
+        start must begin after the task ends (or at its start for zero
+        durations) for the run to be clear.
+        """
+        rows = []
+        for t, calendar in enumerate(self.calendars):
+            if calendar is None or not len(calendar):
+                continue
+            mine = np.flatnonzero(team == t)
+            start, end = table.start[mine], table.end[mine]
+            starts = np.append(calendar.starts, np.inf)
+            following = starts[np.searchsorted(calendar.ends, start, side='right')]
+            rows.append(mine[(following < end) | (following <= start)])
+        return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
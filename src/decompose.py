@@ -0,0 +1,57 @@
+"""Splitting a problem into independent shards that are solved in parallel.
+
+Tasks in different weakly connected components of the dependency graph
+never wait for each other; they interact only through the resources.
+Components are packed into shards of about equal work, and every shard
+gets its own contiguous range of resource slots in proportion to its
+work. The shards can then be scheduled independently, one per worker
+process, and merged back into one table.
+"""
+
+import heapq
+from typing import Tuple
+
+import numpy as np
+
+
+def plan_shards(labels: np.ndarray, duration: np.ndarray, num_shards: int,
+                num_slots: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Assign components to shards and slots to shards.
+
+    Components go, longest first, to the shard with the least work so
+    far. Each shard then gets at least one slot and otherwise a share of
+    the slots proportional to its work, largest remainders first.
+
+    Args:
+        labels: Component of every task row (0..C-1)
+        duration: Duration of every task row
+        num_shards: Number of shards, at most C and at most num_slots
+        num_slots: Resource slots to divide between the shards
+
+    Returns:
+        The shard of every row, and slot bounds such that shard k owns
+        slots bounds[k] to bounds[k + 1] - 1
+    """
+    work = np.bincount(labels, weights=duration)
+    shard_of = np.empty(len(work), dtype=np.int64)
+    loads = [(0.0, k) for k in range(num_shards)]
+    for component in np.argsort(-work, kind='stable').tolist():
+        load, k = loads[0]
+        shard_of[component] = k
+        heapq.heapreplace(loads, (load + work[component], k))
+
+    shard_work = np.bincount(shard_of, weights=work, minlength=num_shards)
+    total = shard_work.sum()
+    share = shard_work / total * num_slots if total > 0 else \
+        np.full(num_shards, num_slots / num_shards)
+    slots = np.maximum(np.floor(share).astype(np.int64), 1)
+    # Give back slots from the largest allocations, or hand out the rest
+    while slots.sum() > num_slots:
+        slots[np.argmax(np.where(slots > 1, slots - share, -np.inf))] -= 1
+    leftover = num_slots - slots.sum()
+    if leftover:
+        slots[np.argsort(slots - share, kind='stable')[:leftover]] += 1
+
+    bounds = np.zeros(num_shards + 1, dtype=np.int64)
+    np.cumsum(slots, out=bounds[1:])
+    return shard_of[labels], bounds
@@ -0,0 +1,106 @@
+"""Dispatch rules: how the allocator ranks tasks that are ready together.
+
+A rule maps a table to a dispatch order, the rows from first to last
+pick. The allocator dispatches each ready task by its position in that
+order, so any permutation is valid. Rules are registered by name with
+@dispatch_rule and can be tried side by side (see TaskOptimizer).
+"""
+
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from src.scheduler import DependencyGraph
+from src.task_table import TaskTable
+
+# Rule name -> rule(table, graph, deadline) returning a dispatch order
+DISPATCH_RULES: Dict[str, Callable] = {}
+
+# Rule used unless another one is asked for
+DEFAULT_RULE = 'priority'
+
+
+def dispatch_rule(name: str):
+    """Register a rule(table, graph, deadline) -> order under name."""
+    def register(rule):
+        DISPATCH_RULES[name] = rule
+        return rule
+    return register
+
+
+def dispatch_order(name: str, table: TaskTable, graph: Optional[DependencyGraph] = None,
+                   deadline: Optional[np.ndarray] = None) -> np.ndarray:
+    """Rank the tasks of a table with the named rule.
+
+    graph is the table's sorted dependency graph, built when a rule
+    needs it and none is given; deadline holds per-row deadlines (NaN
+    where unset), if any.
+    """
+    try:
+        rule = DISPATCH_RULES[name]
+    except KeyError:
+        raise ValueError(f"Unknown dispatch rule {name}; choose from {sorted(DISPATCH_RULES)}")
+    return rule(table, graph, deadline)
+
+
+def _sorted_graph(table: TaskTable, graph: Optional[DependencyGraph]) -> DependencyGraph:
+    if graph is None or graph.levels is None:
+        graph = DependencyGraph.from_table(table)
+        graph.topological_order()
+    return graph
+
+
+@dispatch_rule('priority')
+def priority_first(table, graph=None, deadline=None):
+    """Higher priority first, then shorter duration first.
+
+    With deadlines, earliest deadline first within a priority level.
+    lexsort is stable, so input order breaks the remaining ties.
+    """
+    if deadline is None:
+        return np.lexsort((table.duration, -table.priority))
+    return np.lexsort((table.duration, np.nan_to_num(deadline, nan=np.inf), -table.priority))
+
+
+@dispatch_rule('spt')
+def shortest_processing_time(table, graph=None, deadline=None):
+    """Shortest duration first, then higher priority."""
+    return np.lexsort((-table.priority, table.duration))
+
+
+@dispatch_rule('lpt')
+def longest_processing_time(table, graph=None, deadline=None):
+    """Longest duration first, then higher priority."""
+    return np.lexsort((-table.priority, -table.duration))
+
+
+@dispatch_rule('critical_ratio')
+def critical_ratio(table, graph=None, deadline=None):
+    """Smallest ratio of time until due to work left on the longest path.
+
+    The work left is the task's tail: its duration plus the longest chain
+    of successors after it. Tasks are due at their deadline, or at the
+    precedence-bound project end when they have none.
+    """
+    critical = _sorted_graph(table, graph).critical_path()
+    tail = critical.length - (critical.earliest_start + critical.slack)
+    due = np.full(len(table), float(critical.length))
+    if deadline is not None:
+        due = np.where(np.isnan(deadline), due, deadline)
+    ratio = np.divide(due, tail, out=np.full(len(table), np.inf), where=tail > 0)
+    return np.lexsort((-table.priority, ratio))
+
+
+@dispatch_rule('most_successors')
+def most_successors(table, graph=None, deadline=None):
+    """Most direct successors first, then higher priority, then shorter."""
+    offsets, _ = table.successors
+    return np.lexsort((table.duration, -table.priority, -np.diff(offsets)))
+
+
+@dispatch_rule('weighted_priority')
+def weighted_priority(table, graph=None, deadline=None):
+    """Highest priority per unit of duration first (weighted SPT)."""
+    weight = np.divide(table.priority, table.duration, out=np.full(len(table), np.inf),
+                       where=table.duration > 0)
+    return np.lexsort((table.duration, -weight))
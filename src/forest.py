@@ -0,0 +1,155 @@
+"""Random forest stored as flat NumPy arrays for fast, shared loading.
+
+A fitted RandomForestRegressor is exported as one .npy file per field,
+concatenated over all trees. Loading memory-maps the files read-only, so
+every worker process on a machine shares the same pages and start-up
+does no unpickling.
+"""
+
+import json
+import os
+from typing import Dict
+
+import joblib
+import numpy as np
+
+# Files of an exported forest, with their dtypes
+_FIELDS = {
+    'feature': np.int32,
+    'threshold': np.float64,
+    'children': np.int32,
+    'value': np.float64,
+    'roots': np.int32,
+    'missing_left': np.bool_
+}
+
+# Fields that exports from before missing-value routing do not have
+_OPTIONAL_FIELDS = {'missing_left'}
+
+
+def export_forest(model, directory: str) -> None:
+    """Write a fitted single-output RandomForestRegressor to directory.
+
+    Node indices are global over the concatenated trees. children[node]
+    holds the (right, left) child, so a comparison result indexes it
+    directly. Leaves point to themselves, so prediction can step every
+    sample a fixed number of times without checking for leaves.
+    missing_left[node] says where a NaN feature goes, as sklearn's
+    missing_go_to_left does (left for every node with sklearn versions
+    that predate it, which reject NaN anyway).
+    """
+    os.makedirs(directory, exist_ok=True)
+    arrays = {name: [] for name in _FIELDS}
+    offset = 0
+    depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        if tree.value.shape[1] != 1:
+            raise ValueError("Only single-output forests can be exported")
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        arrays['feature'].append(np.where(leaf, 0, tree.feature))
+        arrays['threshold'].append(tree.threshold)
+        arrays['children'].append(np.stack([
+            np.where(leaf, nodes, tree.children_right),
+            np.where(leaf, nodes, tree.children_left)
+        ], axis=1) + offset)
+        arrays['value'].append(tree.value[:, 0, 0])
+        arrays['missing_left'].append(
+            getattr(tree, 'missing_go_to_left', np.ones(tree.node_count, dtype=bool)))
+        arrays['roots'].append([offset])
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+
+    for name, dtype in _FIELDS.items():
+        np.save(os.path.join(directory, f'{name}.npy'),
+                np.ascontiguousarray(np.concatenate(arrays[name]), dtype=dtype))
+    with open(os.path.join(directory, 'forest.json'), 'w') as f:
+        json.dump({'n_features': int(model.n_features_in_), 'max_depth': int(depth)}, f)
+
+
+class FlatForest:
+    """Vectorized predictions from an exported forest.
+
+    Matches RandomForestRegressor.predict: inputs are compared as float32
+    against the float64 thresholds, NaN features follow each node's
+    missing_left flag and the tree outputs are averaged. Infinite inputs
+    are rejected, and so is NaN for exports without missing_left.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], n_features: int, max_depth: int):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.missing_left = arrays.get('missing_left')
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = 'r') -> 'FlatForest':
+        """Open an exported forest; arrays are memory-mapped by default."""
+        with open(os.path.join(directory, 'forest.json')) as f:
+            meta = json.load(f)
+        arrays = {}
+        for name in _FIELDS:
+            path = os.path.join(directory, f'{name}.npy')
+            if name in _OPTIONAL_FIELDS and not os.path.exists(path):
+                continue
+            arrays[name] = np.load(path, mmap_mode=mmap_mode)
+        return cls(arrays, meta['n_features'], meta['max_depth'])
+
+    def predict(self, X: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        """Predict one value per row of X, batch_size rows at a time.
+
+        Each step routes a (rows x trees) block of nodes one level down.
+        Large batches go through one tree at a time; small ones take many
+        trees per block so that a few rows still make full-width steps.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features per row")
+        if np.isinf(X).any():
+            raise ValueError("Input contains infinity")
+        missing = np.isnan(X).any()
+        if missing and self.missing_left is None:
+            raise ValueError("Input contains NaN, which this forest export cannot route; "
+                             "export it again to predict with missing values")
+
+        children = self.children.reshape(-1)
+        roots = np.asarray(self.roots, dtype=np.intp)
+        result = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            n = len(batch)
+            # Features are read from a column-major copy of the batch
+            columns = np.ascontiguousarray(batch.T).reshape(-1)
+            rows = np.arange(n)[:, None]
+            per_block = max(1, batch_size // max(n, 1))
+            total = np.zeros(n, dtype=np.float64)
+            for first in range(0, len(roots), per_block):
+                node = np.repeat(roots[None, first:first + per_block], n, axis=0)
+                for _ in range(self.max_depth):
+                    x = columns[self.feature[node] * n + rows]
+                    go_left = x <= self.threshold[node]
+                    if missing:
+                        go_left |= np.isnan(x) & self.missing_left[node]
+                    node = children[2 * node + go_left]
+                total += self.value[node].sum(axis=1)
+            result[start:start + n] = total / len(roots)
+        return result
+
+
+def flat_path(model_path: str) -> str:
+    """Directory of the flat export that belongs to a pickled model."""
+    return os.path.splitext(model_path)[0]
+
+
+def load_model(model_path: str):
+    """Load a model, preferring its flat export over the pickle."""
+    directory = flat_path(model_path)
+    if os.path.exists(os.path.join(directory, 'forest.json')):
+        return FlatForest.load(directory)
+    return joblib.load(model_path)
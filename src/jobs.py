@@ -0,0 +1,280 @@
+"""Background optimization jobs with a SQLite job store.
+
+Jobs are stored in a single SQLite file, so they survive restarts and
+need no broker. They run in the optimizer's shared process pool, one
+job per worker with its own search, shards and portfolio kept serial;
+each worker writes its job's phase and progress straight to the store,
+and checks there for cancellation at every phase boundary.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from src.profiling import Profiler
+
+# Optimizer phases in run order, for progress reporting
+PHASES = ('create', 'sort', 'assign', 'search', 'critical_path', 'metrics')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    phase TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker INTEGER,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT
+)
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its cancellation was requested."""
+
+
+class JobStore:
+    """Job records in a SQLite file, safe to share between processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction, committed on success."""
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _execute(self, sql: str, params=()) -> int:
+        with self._connect() as db:
+            return db.execute(sql, params).rowcount
+
+    def create(self, request: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        self._execute(
+            'INSERT INTO jobs (id, status, created, request) VALUES (?, ?, ?, ?)',
+            (job_id, 'queued', time.time(), json.dumps(request))
+        )
+        return job_id
+
+    def get(self, job_id: str, with_result: bool = False) -> Optional[Dict]:
+        """Return the job's status record, and its result when asked."""
+        with self._connect() as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            'job_id': row['id'],
+            'status': row['status'],
+            'phase': row['phase'],
+            'progress': row['progress'],
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'error': row['error']
+        }
+        if with_result:
+            job['result'] = json.loads(row['result']) if row['result'] else None
+        return job
+
+    def request(self, job_id: str) -> Dict:
+        with self._connect() as db:
+            row = db.execute('SELECT request FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row['request'])
+
+    def claim(self, job_id: str) -> bool:
+        """Move a queued job to running; False if it was cancelled or taken."""
+        return self._execute(
+            "UPDATE jobs SET status = 'running', started = ?, worker = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (time.time(), os.getpid(), job_id)
+        ) == 1
+
+    def set_phase(self, job_id: str, phase: str, progress: float) -> bool:
+        """Record progress; returns whether cancellation was requested."""
+        with self._connect() as db:
+            db.execute('UPDATE jobs SET phase = ?, progress = ? WHERE id = ?',
+                       (phase, progress, job_id))
+            row = db.execute('SELECT cancel_requested FROM jobs WHERE id = ?',
+                             (job_id,)).fetchone()
+        return bool(row['cancel_requested'])
+
+    def finish(self, job_id: str, status: str, result: Dict = None, error: str = None) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ?, "
+            "progress = CASE WHEN ? = 'succeeded' THEN 1.0 ELSE progress END WHERE id = ?",
+            (status, time.time(), json.dumps(result) if result is not None else None, error,
+             status, job_id)
+        )
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job now, or flag a running one; returns the new status."""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? "
+                "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            db.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,))
+            row = db.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row['status'] if row is not None else None
+
+    def requeue_interrupted(self) -> List[str]:
+        """Return queued jobs, requeueing running ones whose worker has died.
+
+        Workers are local processes, so a job is orphaned exactly when its
+        worker pid no longer exists.
+        """
+        with self._connect() as db:
+            running = db.execute(
+                "SELECT id, worker FROM jobs WHERE status = 'running'").fetchall()
+            orphaned = [(row['id'],) for row in running if not _alive(row['worker'])]
+            db.executemany(
+                "UPDATE jobs SET status = 'queued', phase = NULL, progress = 0, started = NULL, "
+                "worker = NULL WHERE id = ?", orphaned)
+            rows = db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created").fetchall()
+        return [row['id'] for row in rows]
+
+
+def _alive(pid: Optional[int]) -> bool:
+    """Whether a local process with this pid exists."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _ProgressHook:
+    """Profiler hook that reports each phase to the store and checks for cancel."""
+
+    name = 'progress'
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def start(self) -> None:
+        pass
+
+    def enter(self, phase: str) -> None:
+        done = PHASES.index(phase) if phase in PHASES else 0
+        if self.store.set_phase(self.job_id, phase, round(done / len(PHASES), 3)):
+            raise JobCancelled()
+
+    def exit(self, phase: str) -> None:
+        pass
+
+    def stop(self) -> None:
+        return None
+
+
+def run_job(store_path: str, job_id: str) -> str:
+    """Run one job in a worker process; returns its final status.
+
+    The job already holds one of the shared pool's workers, so its own
+    parallel phases run in that worker rather than in a nested pool.
+    """
+    from src.optimizer import TaskOptimizer
+
+    store = JobStore(store_path)
+    if not store.claim(job_id):
+        return 'skipped'
+
+    try:
+        request = store.request(job_id)
+        constraints = dict(request.get('constraints') or {}, workers=1)
+        result = TaskOptimizer().optimize(
+            request.get('tasks'), request.get('resources'), constraints,
+            profiler=Profiler([_ProgressHook(store, job_id)])
+        )
+        store.finish(job_id, 'succeeded', {
+            'optimized_schedule': result.schedule.to_dict(),
+            'metrics': dict(result.metrics)
+        })
+        return 'succeeded'
+    except JobCancelled:
+        store.finish(job_id, 'cancelled')
+        return 'cancelled'
+    except Exception as e:
+        store.finish(job_id, 'failed', error=str(e))
+        return 'failed'
+
+
+class JobQueue:
+    """Submits stored jobs to the optimizer's shared process pool.
+
+    Up to max_workers jobs (at most MAX_WORKERS) are in the pool at once;
+    a small thread pool holds the rest back, so queued jobs leave workers
+    free for API requests. On start, jobs left queued or running by a
+    previous process are submitted again.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = None):
+        from src.optimizer import _clamp_workers
+
+        self.store = store
+        self.max_workers = _clamp_workers(max_workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                       thread_name_prefix='job')
+        for job_id in store.requeue_interrupted():
+            self._submit(job_id)
+
+    @classmethod
+    def from_env(cls) -> 'JobQueue':
+        """Build a queue from JOB_STORE and JOB_WORKERS."""
+        workers = os.getenv('JOB_WORKERS')
+        return cls(JobStore(os.getenv('JOB_STORE', 'data/jobs.sqlite3')),
+                   max_workers=int(workers) if workers else None)
+
+    def _submit(self, job_id: str):
+        return self.pool.submit(self._run, job_id)
+
+    def _run(self, job_id: str) -> str:
+        """Run a job in the shared pool and wait for it, in a queue thread."""
+        from src.optimizer import _get_pool
+
+        return _get_pool().submit(run_job, self.store.path, job_id).result()
+
+    def submit(self, request: Dict) -> str:
+        """Store a job request and queue it; returns the job id."""
+        if not request.get('tasks') or not request.get('resources'):
+            raise ValueError("Tasks and resources are required")
+        job_id = self.store.create(request)
+        self._submit(job_id)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id, with_result=True)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        return self.store.cancel(job_id)
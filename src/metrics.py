@@ -0,0 +1,124 @@
+"""Process-wide request metrics with low-contention recording."""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+# Histogram upper bounds; the last bucket catches everything above
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_COUNT_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+PHASE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class _Histogram:
+    """Fixed-bucket histogram owned by a single thread."""
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _Shard:
+    """Counters written by exactly one thread, so updates need no lock."""
+
+    __slots__ = ('requests', 'latency', 'task_count', 'phases')
+
+    def __init__(self):
+        self.requests = {}
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.task_count = _Histogram(TASK_COUNT_BUCKETS)
+        self.phases = {}
+
+
+class MetricsCollector:
+    """Aggregates request counts, latencies, task counts and phase timings.
+
+    Each thread records into its own shard; the registry lock is taken only
+    when a thread records for the first time and when a snapshot is read,
+    so request threads never contend with each other.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, endpoint: str, status: int, latency: float, task_count: int = None) -> None:
+        """Record one finished request."""
+        shard = self._shard()
+        key = (endpoint, status)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        shard.latency.observe(latency)
+        if task_count is not None:
+            shard.task_count.observe(task_count)
+
+    def record_profile(self, profile: Dict) -> None:
+        """Record the phase timings of one profiled optimizer run."""
+        shard = self._shard()
+        for phase, seconds in profile['phases'].items():
+            histogram = shard.phases.get(phase)
+            if histogram is None:
+                histogram = shard.phases[phase] = _Histogram(PHASE_BUCKETS)
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict:
+        """Return the totals across all threads."""
+        with self._lock:
+            shards = list(self._shards)
+
+        requests = {}
+        for shard in shards:
+            for (endpoint, status), count in list(shard.requests.items()):
+                by_status = requests.setdefault(endpoint, {})
+                by_status[str(status)] = by_status.get(str(status), 0) + count
+
+        phases = {}
+        for shard in shards:
+            for phase, histogram in list(shard.phases.items()):
+                phases.setdefault(phase, []).append(histogram)
+
+        return {
+            'requests': requests,
+            'latency_seconds': self._merge([s.latency for s in shards], LATENCY_BUCKETS),
+            'task_count': self._merge([s.task_count for s in shards], TASK_COUNT_BUCKETS),
+            'phase_seconds': {
+                phase: self._merge(histograms, PHASE_BUCKETS)
+                for phase, histograms in sorted(phases.items())
+            }
+        }
+
+    @staticmethod
+    def _merge(histograms: List[_Histogram], bounds: Sequence[float]) -> Dict:
+        counts = [0] * (len(bounds) + 1)
+        total = 0
+        count = 0
+        for histogram in histograms:
+            for i, value in enumerate(histogram.counts):
+                counts[i] += value
+            total += histogram.total
+            count += histogram.count
+
+        labels = [str(bound) for bound in bounds] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, counts)),
+            'count': count,
+            'sum': round(total, 6),
+            'mean': round(total / count, 6) if count else 0.0
+        }
@@ -1,131 +1,859 @@
 """Task Optimization Engine - Core optimization algorithms."""
 
+import atexit
+import multiprocessing
+import os
+import threading
 import time
-from typing import List, Dict, Tuple
-from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional
+from dataclasses import dataclass, field
+from functools import cached_property
 import heapq
+from operator import itemgetter
 
+import numpy as np
 
-@dataclass
-class Task:
-    """Represents a single task in the project."""
-    id: int
-    duration: int
-    priority: int = 1
-    depends_on: List[int] = None
-    assigned_team: str = None
-    start_date: int = None
-    end_date: int = None
+from src.cache import ScheduleCache, schedule_key, table_key
+from src.constraints import ScheduleConstraints, _task_values
+from src.decompose import plan_shards
+from src.dispatch import DEFAULT_RULE, DISPATCH_RULES, dispatch_order
+from src.profiling import ProfileSampler
+from src.resources import ResourcePool
+from src.scheduler import DependencyGraph
+from src.search import improve_schedule
+from src.simulation import DEFAULT_CV, default_samples, simulate
+from src.task_table import TaskTable, ScheduleView
+from src.timeline import TimelineIndex
 
-    def __post_init__(self):
-        if self.depends_on is None:
-            self.depends_on = []
+
+@dataclass(frozen=True)
+class OptimizationResult:
+    """Immutable outcome of one optimize() call.
+
+    Results can be shared freely between threads and through the cache:
+    the schedule is a read-only view over frozen arrays and the metrics
+    are a read-only mapping. A failed batch problem carries only error.
+    """
+    schedule: Optional[ScheduleView]
+    metrics: Mapping = field(default_factory=lambda: MappingProxyType({}))
+    processing_time: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @cached_property
+    def timeline(self) -> TimelineIndex:
+        """Index for point, window and per-team lookups, built on first use."""
+        return TimelineIndex(self.schedule.table, self.schedule.teams)
+
+    def __reduce__(self):
+        # A mappingproxy cannot be pickled, so the metrics travel as a dict
+        # (to worker processes and the disk cache); the index is rebuilt
+        return _restore_result, (self.schedule, dict(self.metrics), self.processing_time,
+                                 self.error)
+
+
+def _restore_result(schedule, metrics, processing_time, error) -> OptimizationResult:
+    """Rebuild a pickled OptimizationResult with read-only metrics."""
+    return OptimizationResult(schedule, MappingProxyType(metrics), processing_time, error)
+
+
+# The one worker pool of this process, sized to the server's limit and
+# shared by batches, searches, shards and dispatch portfolios
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _max_workers() -> int:
+    """Worker processes this server may run: MAX_WORKERS or the CPU count."""
+    return max(1, int(os.getenv('MAX_WORKERS') or os.cpu_count() or 1))
+
+
+def _clamp_workers(requested) -> int:
+    """A requested worker count, limited to _max_workers() (default: the limit)."""
+    limit = _max_workers()
+    return limit if not requested else max(1, min(int(requested), limit))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, starting it on first use.
+
+    Workers come from a fork server rather than a fork of this process:
+    the pool may start from any request or job thread, and a child forked
+    while another thread holds a lock (SQLite's, the logging module's)
+    would wait on it forever. The server imports the optimizer once, so
+    workers still start in milliseconds.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['src.optimizer'])
+            _pool = ProcessPoolExecutor(max_workers=_max_workers(), mp_context=context)
+        return _pool
+
+
+def _map_bounded(fn, items: List, limit: int) -> List:
+    """Run fn over items in the shared pool, at most limit at a time.
+
+    The pool is sized for the whole server, so a caller allowed fewer
+    workers submits its next item only when one of its own finishes.
+    Results come back in input order.
+    """
+    pool = _get_pool()
+    results = [None] * len(items)
+    running = {}
+    submitted = 0
+    while submitted < len(items) or running:
+        while submitted < len(items) and len(running) < limit:
+            running[pool.submit(fn, items[submitted])] = submitted
+            submitted += 1
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[running.pop(future)] = future.result()
+    return results
+
+
+@atexit.register
+def _shutdown_pool() -> None:
+    """Stop the shared pool's workers when the process exits."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _optimize_problem(problem: Dict) -> OptimizationResult:
+    """Solve one batch problem; errors are returned rather than raised."""
+    try:
+        return TaskOptimizer().optimize(
+            problem.get('tasks'), problem.get('resources'), problem.get('constraints')
+        )
+    except Exception as e:
+        return OptimizationResult(schedule=None, error=str(e))
+
+
+def _optimize_chunk(problems: List[Dict]) -> List[OptimizationResult]:
+    """Solve a chunk of batch problems in one worker round trip."""
+    return [_optimize_problem(problem) for problem in problems]
+
+
+def _assign_shard(args) -> tuple:
+    """Schedule one shard of a decomposed problem in a worker process."""
+    table, resources, limits, order = args
+    TaskOptimizer(profiling=ProfileSampler(0))._assign_resources(
+        table, resources, dispatch=order, limits=limits)
+    return table.start, table.end, table.resource, table.sequence
+
+
+def _assign_rule(args) -> tuple:
+    """Schedule a table in one dispatch order in a worker process."""
+    table, resources, limits, order = args
+    TaskOptimizer(profiling=ProfileSampler(0))._assign_resources(
+        table, resources, dispatch=order, limits=limits)
+    return table.start, table.end, table.resource, table.sequence
 
 
 class TaskOptimizer:
-    """Main optimization engine using dynamic programming and CSP."""
+    """Main optimization engine using dynamic programming and CSP.
+
+    The optimizer keeps no per-call state, so one instance can serve
+    concurrent requests; each optimize() call returns its own result.
+    """
 
-    def __init__(self):
-        self.schedule = {}
-        self.metrics = {}
-        self.processing_time = 0
+    def __init__(self, cache: ScheduleCache = None, predictor=None,
+                 profiling: ProfileSampler = None, on_profile=None):
+        self.cache = cache
+        self.predictor = predictor
+        self.profiling = profiling if profiling is not None else ProfileSampler.from_env()
+        # Called with the profile report of every profiled run, e.g. to aggregate it
+        self.on_profile = on_profile
 
-    def optimize(self, tasks: List[Dict], resources: List[str], constraints: Dict = None) -> Dict:
+    def optimize(self, tasks: List[Dict], resources: List, constraints: Dict = None,
+                 predict_durations: bool = False, profiler=None) -> OptimizationResult:
         """
         Optimize task scheduling using DP + CSP algorithm.
 
         Args:
             tasks: List of task dictionaries with id, duration, priority
-            resources: List of available team members
-            constraints: Optional constraints dictionary
+                and optional required_skills
+            resources: List of available teams, as names or as dictionaries
+                with name, skills and capacity (see ResourcePool)
+            constraints: Optional constraints dictionary; a positive
+                'time_budget' (seconds) runs the anytime search, tuned by
+                'search' ('genetic' or 'local'), 'workers' and 'seed';
+                'decompose' schedules independent task components in
+                parallel on 'workers' processes (see _assign_decomposed);
+                'simulation' asks for an on-time forecast (see
+                _compute_metrics)
+            predict_durations: Fill in missing task durations with the
+                trained completion-time model (see DurationPredictor)
+            profiler: Profiler for this run (default: sampled from
+                self.profiling), e.g. with hooks that report progress
 
         Returns:
-            Optimized schedule dictionary
+            OptimizationResult with the schedule (a read-only mapping of
+            task id to entry) and its metrics
         """
         start_time = time.time()
 
         if not tasks or not resources:
             raise ValueError("Tasks and resources are required")
 
-        # Convert to Task objects
-        task_objects = [self._create_task(t) for t in tasks]
+        if predict_durations:
+            tasks = self._predictor().fill_durations(tasks)
+
+        if profiler is None:
+            profiler = self.profiling.profiler()
+        with profiler.phase('create'):
+            table = TaskTable.from_dicts(tasks)
+
+        # Reuse the result of an identical earlier request
+        key = None
+        if self.cache is not None:
+            key = table_key(table, resources, constraints)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self.optimize_table(table, resources, constraints,
+                                     start_time=start_time, profiler=profiler)
+
+        if key is not None:
+            self.cache.put(key, result)
+
+        return result
+
+    def _predictor(self):
+        """Return the duration predictor, loading the shared one on first use."""
+        if self.predictor is None:
+            from src.predictor import get_predictor
+            self.predictor = get_predictor()
+        return self.predictor
+
+    def optimize_table(self, table: TaskTable, resources: List, constraints: Dict = None,
+                       start_time: float = None, profiler=None) -> OptimizationResult:
+        """
+        Optimize tasks already loaded into a TaskTable (bypasses the cache).
+
+        Args:
+            table: Tasks in columnar form, e.g. from TaskTable.from_rows
+            resources: List of available teams (names or dictionaries)
+            constraints: Optional constraints dictionary
+            start_time: When the request started, for processing time
+            profiler: Profiler already timing this run (default: sampled
+                from self.profiling); its report goes to metrics['profile']
+
+        Returns:
+            OptimizationResult with the schedule and its metrics
+        """
+        if start_time is None:
+            start_time = time.time()
+        if profiler is None:
+            profiler = self.profiling.profiler()
+
+        if not len(table) or not resources:
+            raise ValueError("Tasks and resources are required")
+
+        # Order tasks by their dependencies (rejects cycles)
+        with profiler.phase('sort'):
+            graph = DependencyGraph.from_table(table)
+            graph.topological_order()
+
+        # Assign resources greedily as tasks become ready (CSP logic)
+        with profiler.phase('assign'):
+            limits = ScheduleConstraints.from_dict(constraints, table,
+                                                   ResourcePool(resources).teams)
+            rules = self._dispatch_rules(constraints)
+            decomposition = portfolio = None
+            if constraints and constraints.get('decompose'):
+                if len(rules) > 1:
+                    raise ValueError("decompose takes a single dispatch rule")
+                teams, decomposition = self._assign_decomposed(
+                    table, graph, resources, limits, self._workers(constraints), rules[0])
+            elif len(rules) > 1:
+                teams, portfolio = self._assign_portfolio(
+                    table, graph, resources, limits, rules, self._workers(constraints))
+            else:
+                dispatch = self._dispatch_order(
+                    table, limits.deadline if limits else None, rules[0], graph)
+                teams = self._assign_resources(table, resources, dispatch=dispatch,
+                                               limits=limits)
 
-        # Sort tasks by priority and duration (DP logic)
-        sorted_tasks = self._sort_tasks_dynamic(task_objects)
+        # Improve on the greedy schedule within the time budget
+        search = None
+        if constraints and constraints.get('time_budget'):
+            with profiler.phase('search'):
+                search = self._improve(table, resources, len(teams), constraints, limits)
 
-        # Assign resources greedily (CSP logic)
-        schedule = self._assign_resources(sorted_tasks, resources)
+        # Critical path and slack over the precedence graph
+        with profiler.phase('critical_path'):
+            critical = graph.critical_path()
+            table.slack = critical.slack
 
         # Calculate metrics
-        self.metrics = self._compute_metrics(schedule, resources)
-        self.schedule = schedule
-        self.processing_time = time.time() - start_time
-
-        return schedule
-
-    def _create_task(self, task_dict: Dict) -> Task:
-        """Convert dictionary to Task object."""
-        return Task(
-            id=task_dict.get('id'),
-            duration=task_dict.get('duration', 1),
-            priority=task_dict.get('priority', 1),
-            depends_on=task_dict.get('depends_on', [])
+        with profiler.phase('metrics'):
+            metrics = self._compute_metrics(table, resources, limits,
+                                            (constraints or {}).get('simulation'))
+            metrics['critical_path'] = table.ids[critical.path].tolist()
+            metrics['critical_path_duration'] = critical.length
+        if search is not None:
+            metrics['search'] = search
+        if decomposition is not None:
+            metrics['decomposition'] = decomposition
+        if portfolio is not None:
+            metrics['dispatch'] = portfolio
+        if limits is not None:
+            metrics['constraints'] = limits.report(table, ResourcePool(resources).slot_team)
+        table.freeze()
+
+        profile = profiler.report()
+        if profile is not None:
+            metrics['profile'] = profile
+            if self.on_profile is not None:
+                self.on_profile(profile)
+
+        processing_time = time.time() - start_time
+        metrics['processing_time_seconds'] = round(processing_time, 2)
+        result = OptimizationResult(
+            schedule=ScheduleView(table, teams),
+            metrics=MappingProxyType(metrics),
+            processing_time=processing_time
         )
+        return result
 
-    def _sort_tasks_dynamic(self, tasks: List[Task]) -> List[Task]:
-        """Sort tasks using dynamic programming logic."""
-        # Sort by priority (higher first) then by duration (shorter first)
-        return sorted(tasks, key=lambda t: (-t.priority, t.duration))
+    def optimize_many(self, problems: List[Dict], max_workers: int = None,
+                      chunksize: int = None,
+                      predict_durations: bool = False) -> List[OptimizationResult]:
+        """
+        Optimize many independent problems across a process pool.
 
-    def _assign_resources(self, tasks: List[Task], resources: List[str]) -> Dict:
-        """Assign tasks to resources using greedy allocation."""
-        schedule = {}
-        resource_end_times = {resource: 0 for resource in resources}
+        Args:
+            problems: List of dictionaries with tasks, resources, constraints
+            max_workers: Problems solved at the same time in the shared
+                pool, at most (and by default) MAX_WORKERS or the CPU count
+            chunksize: Problems sent to a worker per round trip (default:
+                about four chunks per worker)
+            predict_durations: Fill in missing task durations before the
+                problems are sent to the workers, so the model is loaded
+                only in this process
+
+        Returns:
+            One OptimizationResult per problem, in input order; failed
+            problems carry an error message instead of a schedule
+        """
+        max_workers = _clamp_workers(max_workers)
 
-        for task in tasks:
-            # Find resource with earliest availability
-            best_resource = min(resource_end_times, key=resource_end_times.get)
-            start_time = resource_end_times[best_resource]
-            end_time = start_time + task.duration
+        if predict_durations:
+            predictor = self._predictor()
+            problems = [
+                {**problem, 'tasks': predictor.fill_durations(problem['tasks'])}
+                if problem.get('tasks') else problem
+                for problem in problems
+            ]
 
-            schedule[task.id] = {
-                'team': best_resource,
-                'start': start_time,
-                'end': end_time,
-                'duration': task.duration
-            }
+        # Answer repeated problems from the cache and solve only the rest
+        results = [None] * len(problems)
+        keys = [None] * len(problems)
+        if self.cache is not None:
+            for i, problem in enumerate(problems):
+                if problem.get('tasks') and problem.get('resources'):
+                    try:
+                        keys[i] = schedule_key(problem['tasks'], problem['resources'],
+                                               problem.get('constraints'))
+                    except ValueError:
+                        # Invalid tasks are reported by the worker that solves them
+                        continue
+                    results[i] = self.cache.get(keys[i])
+        pending = [i for i, result in enumerate(results) if result is None]
+        todo = [problems[i] for i in pending]
 
-            resource_end_times[best_resource] = end_time
+        if max_workers <= 1 or len(todo) <= 1:
+            solved = [_optimize_problem(problem) for problem in todo]
+        else:
+            if chunksize is None:
+                chunksize = max(1, -(-len(todo) // (max_workers * 4)))
+            chunks = [todo[k:k + chunksize] for k in range(0, len(todo), chunksize)]
+            solved = [result for chunk in _map_bounded(_optimize_chunk, chunks, max_workers)
+                      for result in chunk]
 
-        return schedule
+        for i, result in zip(pending, solved):
+            results[i] = result
+            if not result.ok:
+                continue
+            if keys[i] is not None:
+                self.cache.put(keys[i], result)
+            # Workers have no callback, so their profiles are reported here
+            if self.on_profile is not None and 'profile' in result.metrics:
+                self.on_profile(result.metrics['profile'])
+        return results
 
-    def _compute_metrics(self, schedule: Dict, resources: List[str]) -> Dict:
-        """Compute performance metrics from the schedule."""
-        if not schedule:
+    def _improve(self, table: TaskTable, resources: List, num_teams: int,
+                 constraints: Dict, limits: ScheduleConstraints = None) -> Dict:
+        """Run the anytime search and adopt its schedule when it is shorter.
+
+        The search scores orders without calendars or release times, so
+        the best order is decoded again under the constraints and kept
+        only if the decoded schedule is shorter too; otherwise the
+        schedule from before the search is put back as it was, whether
+        it came from one list, a portfolio or decomposed shards.
+        """
+        method = constraints.get('search', 'genetic')
+        workers = self._workers(constraints)
+        initial_makespan = table.end.max().item()
+        initial = (table.start, table.end, table.resource, table.sequence)
+
+        outcome = improve_schedule(
+            table, num_teams, float(constraints['time_budget']),
+            method=method,
+            workers=workers,
+            seed=int(constraints.get('seed', 0)),
+            pool=_get_pool() if workers > 1 else None
+        )
+        if outcome['makespan'] < initial_makespan:
+            self._assign_resources(table, resources, dispatch=outcome['sequence'], limits=limits)
+            if table.end.max() >= initial_makespan:
+                table.start, table.end, table.resource, table.sequence = initial
+
+        return {
+            'method': method,
+            'workers': workers,
+            'initial_makespan': initial_makespan,
+            'best_makespan': table.end.max().item(),
+            'evaluations': outcome['evaluations'],
+            'trace': outcome['trace']
+        }
+
+    @staticmethod
+    def _workers(constraints: Dict) -> int:
+        """Worker processes for one run: 'workers', at most MAX_WORKERS or CPU count."""
+        return _clamp_workers(constraints.get('workers'))
+
+    def _assign_decomposed(self, table: TaskTable, graph: DependencyGraph, resources: List,
+                           limits: ScheduleConstraints, workers: int,
+                           rule: str = DEFAULT_RULE) -> tuple:
+        """Schedule the weakly connected components of the graph in parallel.
+
+        Components are packed into up to `workers` shards with their own
+        ranges of resource slots (see plan_shards) and each shard is run
+        through _assign_resources in a worker process. The dispatch rule
+        ranks the whole table once, so rules that look at the whole graph
+        rank a shard's tasks as they would undecomposed; each shard
+        dispatches its rows in that relative order. The shard columns
+        are written back into the table, with the dispatch sequences merged
+        by start time, so the result looks like one schedule. Greedy list
+        scheduling of a shard on its own slots gives a different, usually
+        slightly longer, schedule than one list over all slots.
+
+        A slot range can miss a skill that some task of its shard needs;
+        then the problem is scheduled as a whole instead.
+
+        Returns the slot team names and a summary of the decomposition.
+        """
+        pool = ResourcePool(resources)
+        labels = graph.components()
+        num_components = int(labels.max()) + 1
+        shards = min(workers, num_components, len(pool.slot_team))
+        summary = {'components': num_components, 'shards': 1, 'workers': workers}
+        dispatch = self._dispatch_order(table, limits.deadline if limits else None, rule, graph)
+        if shards < 2:
+            return self._assign_resources(table, resources, dispatch=dispatch,
+                                          limits=limits), summary
+
+        rank = np.empty(len(table), dtype=np.int64)
+        rank[dispatch] = np.arange(len(table))
+        shard_of, bounds = plan_shards(labels, table.duration, shards, len(pool.slot_team))
+        order = np.argsort(shard_of, kind='stable')
+        splits = np.cumsum(np.bincount(shard_of, minlength=shards))[:-1]
+        parts, jobs = [], []
+        for k, rows in enumerate(np.split(order, splits)):
+            shard_resources, shard_teams = pool.slot_range(bounds[k], bounds[k + 1])
+            parts.append((rows, bounds[k]))
+            jobs.append((table.take(rows), shard_resources,
+                         limits.take(rows, shard_teams) if limits is not None else None,
+                         np.argsort(rank[rows], kind='stable')))
+
+        try:
+            solved = list(_get_pool().map(_assign_shard, jobs))
+        except ValueError:
+            return self._assign_resources(table, resources, dispatch=dispatch,
+                                          limits=limits), summary
+
+        dtype = np.result_type(*(start.dtype for start, _, _, _ in solved))
+        start = np.zeros(len(table), dtype=dtype)
+        end = np.zeros(len(table), dtype=dtype)
+        resource = np.empty(len(table), dtype=np.int32)
+        sequences = []
+        for (rows, first_slot), (shard_start, shard_end, shard_resource, shard_sequence) \
+                in zip(parts, solved):
+            start[rows] = shard_start
+            end[rows] = shard_end
+            resource[rows] = shard_resource + first_slot
+            sequences.append(rows[shard_sequence])
+        sequence = np.concatenate(sequences)
+
+        table.start = start
+        table.end = end
+        table.resource = resource
+        # Stable by start time keeps each shard's own dispatch order on ties
+        table.sequence = sequence[np.argsort(start[sequence], kind='stable')]
+        summary['shards'] = shards
+        return pool.slots, summary
+
+    @staticmethod
+    def _dispatch_rules(constraints: Dict) -> List[str]:
+        """Dispatch rules asked for by 'dispatch': a name, a list or 'all'."""
+        rules = (constraints or {}).get('dispatch') or DEFAULT_RULE
+        if rules == 'all':
+            return list(DISPATCH_RULES)
+        rules = [rules] if isinstance(rules, str) else list(dict.fromkeys(rules))
+        unknown = [rule for rule in rules if rule not in DISPATCH_RULES]
+        if not rules or unknown:
+            raise ValueError(f"Unknown dispatch rule {unknown[0] if unknown else None}; "
+                             f"choose from {sorted(DISPATCH_RULES)}")
+        return rules
+
+    def _assign_portfolio(self, table: TaskTable, graph: DependencyGraph, resources: List,
+                          limits: ScheduleConstraints, rules: List[str], workers: int) -> tuple:
+        """Schedule the table once per dispatch rule and keep the best.
+
+        Each rule's order is computed here and decoded by _assign_resources
+        in a worker process of its own, so a portfolio costs about one run
+        while there are workers to spare. The decoder is a Python loop, so
+        threads would take turns on the GIL rather than run side by side.
+
+        The best schedule misses the fewest deadlines and then has the
+        shortest makespan; ties go to the rule listed first.
+
+        Returns the slot team names and the per-rule scores.
+        """
+        deadline = limits.deadline if limits is not None else None
+        orders = [self._dispatch_order(table, deadline, rule, graph) for rule in rules]
+        workers = min(workers, len(rules))
+        if workers > 1:
+            jobs = [(table, resources, limits, order) for order in orders]
+            solved = _map_bounded(_assign_rule, jobs, workers)
+            slots = ResourcePool(resources).slots
+        else:
+            solved = []
+            for order in orders:
+                slots = self._assign_resources(table, resources, dispatch=order, limits=limits)
+                solved.append((table.start, table.end, table.resource, table.sequence))
+
+        scores = {}
+        for rule, (_, end, _, _) in zip(rules, solved):
+            scores[rule] = {'makespan': end.max().item()}
+            if deadline is not None:
+                scores[rule]['missed_deadlines'] = int((end > deadline).sum())
+        best = min(range(len(rules)), key=lambda k: (
+            scores[rules[k]].get('missed_deadlines', 0), scores[rules[k]]['makespan']))
+        table.start, table.end, table.resource, table.sequence = solved[best]
+        return slots, {'rule': rules[best], 'workers': workers, 'scores': scores}
+
+    def _dispatch_order(self, table: TaskTable, deadline: np.ndarray = None,
+                        rule: str = DEFAULT_RULE, graph: DependencyGraph = None) -> np.ndarray:
+        """Rank tasks for dispatch with a rule from the dispatch registry."""
+        return dispatch_order(rule, table, graph, deadline)
+
+    @staticmethod
+    def _earliest_slot(heaps: List[List], calendars: List, ready: float,
+                       duration: float) -> tuple:
+        """Pick the slot that can start a task first under its calendar.
+
+        Heap entries are (key, free time, slot), where key is the earliest
+        time the slot's calendar lets any task start after it is free
+        (see _assign_resources), so slots stuck in a blackout or a gap too
+        short for every task sort behind the ones that can start. A slot
+        cannot start the task before max(key, ready); a heap is left at
+        the first slot whose bound cannot beat the best slot so far, and
+        each examined calendar answers in O(log B). Ties go to the lower
+        key, then the slot that became free first, then the lower slot
+        number, which without calendars is the heap top, as in the plain
+        allocator. The chosen slot is removed from its heap.
+
+        A task that fits no calendar gap goes to the slot free first as if
+        it had no calendar, so the schedule stays complete;
+        ScheduleConstraints.report() lists it as unavailable.
+        """
+        best = None
+        examined = []
+        for resource_heap in heaps:
+            while resource_heap:
+                key, free_time, index = resource_heap[0]
+                bound = key if key > ready else ready
+                if best is not None and (bound, key, free_time, index) > best:
+                    break
+                examined.append((resource_heap, heapq.heappop(resource_heap)))
+                calendar = calendars[index]
+                start_time = calendar.earliest_start(bound, duration) if calendar is not None \
+                    else bound
+                if best is None or (start_time, key, free_time, index) < best:
+                    best = (start_time, key, free_time, index)
+        if best[0] == float('inf'):
+            # Every slot was examined: fall back to the plain allocator's pick
+            _, free_time, index = min((entry for _, entry in examined), key=itemgetter(1, 2))
+            best = (free_time if free_time > ready else ready, None, free_time, index)
+        for resource_heap, entry in examined:
+            if entry[2] != best[3]:
+                heapq.heappush(resource_heap, entry)
+        return best[0], best[3]
+
+    def _assign_resources(self, table: TaskTable, resources: List,
+                          first_step: int = 0, dispatch: np.ndarray = None,
+                          limits: ScheduleConstraints = None) -> List[str]:
+        """Assign tasks to resources using greedy list scheduling.
+
+        A task becomes ready once all of its prerequisites are scheduled and
+        starts no earlier than the latest of their end times. Ready tasks
+        are dispatched in _dispatch_order.
+
+        Each team contributes one slot per unit of capacity (see
+        ResourcePool). Slots are kept in a min-heap keyed by (end time,
+        slot), so each pick is O(log R). Ties go to the slot listed first,
+        which matches a linear scan over the resources in input order.
+        When tasks require skills there is one heap per skill class (the
+        slots of teams with the same skill mask) and a task picks from
+        the classes whose mask covers its own, found with one AND per
+        required skill and computed once per distinct task mask. Each
+        distinct mask keeps a heap of its classes' earliest slots, so a
+        pick is O(log C) for C eligible classes; entries are refreshed
+        when they surface rather than on every assignment.
+
+        With first_step > 0 the first steps of table.sequence are kept as
+        they are and dispatch resumes from the state they leave behind.
+        A precedence-feasible dispatch array overrides _dispatch_order, in
+        which case tasks are dispatched exactly in that order.
+
+        limits adds release times (tasks start no earlier), resource
+        calendars (tasks start in the earliest gap that fits them) and
+        deadlines (earliest deadline first within a priority level).
+
+        Fills the start, end and resource columns and the dispatch sequence
+        of the table and returns the team name of every slot, which the
+        resource column indexes into.
+        """
+        n = len(table)
+        pool = ResourcePool(resources)
+        task_masks = pool.task_masks(table)
+        if dispatch is None:
+            dispatch = self._dispatch_order(table, limits.deadline if limits else None)
+        durations = table.duration.tolist()
+        calendars = None
+        if limits is not None and limits.calendars is not None:
+            calendars = [limits.calendars[team] for team in pool.slot_team]
+            # A slot's heap key: when its calendar first has room for the
+            # shortest task after it is free, a lower bound on any start
+            shortest = min(durations) if durations else 0
+
+            def available(free_time, index):
+                calendar = calendars[index]
+                return calendar.earliest_start(free_time, shortest) if calendar is not None \
+                    else free_time
+        release = limits.release if limits is not None else None
+        # Calendars and release times can put starts at fractional times
+        dtype = table.duration.dtype if limits is None else \
+            np.result_type(table.duration.dtype, np.float64)
+
+        # Rebuild the slot heaps and ready set left by the kept prefix
+        sequence = table.sequence[:first_step]
+        done = np.zeros(n, dtype=bool)
+        done[sequence] = True
+        free = np.zeros(len(pool.slot_team), dtype=table.duration.dtype)
+        np.maximum.at(free, table.resource[sequence], table.end[sequence])
+        entries = list(zip(free.tolist(), range(len(free))))
+        if calendars is not None:
+            entries = [(available(*entry), *entry) for entry in entries]
+        if task_masks is None:
+            heaps = [entries]
+            slot_heap = heaps * len(entries)
+        else:
+            class_masks, slot_class = pool.skill_classes()
+            heaps = [[] for _ in class_masks]
+            for entry in entries:
+                heaps[slot_class[entry[-1]]].append(entry)
+            slot_heap = [heaps[c] for c in slot_class]
+            # Skill mask of a task -> heaps of the classes that cover it, or
+            # without calendars a heap of (class heap top, class) over them
+            eligible = {}
+        for resource_heap in heaps:
+            heapq.heapify(resource_heap)
+
+        # Only the replayed steps are collected here and written back below
+        prefix = sequence
+        sequence, start, end, assigned = [], [], [], []
+
+        if table.num_edges == 0 and limits is None and task_masks is None:
+            # Everything is ready at time zero: dispatch straight in rank order
+            resource_heap = heaps[0]
+            for i in dispatch[~done[dispatch]].tolist():
+                start_time, index = resource_heap[0]
+                end_time = start_time + durations[i]
+                heapq.heapreplace(resource_heap, (end_time, index))
+                sequence.append(i)
+                start.append(start_time)
+                end.append(end_time)
+                assigned.append(index)
+        else:
+            rank = np.empty(n, dtype=np.int64)
+            rank[dispatch] = np.arange(n)
+
+            owners = np.repeat(np.arange(n), np.diff(table.dep_offsets))
+            finished = done[table.dep_targets]
+            remaining = np.diff(table.dep_offsets) - np.bincount(
+                owners[finished], minlength=n)
+            ready_time = np.zeros(n, dtype=dtype) if release is None else release.astype(dtype)
+            np.maximum.at(ready_time, owners[finished],
+                          table.end[table.dep_targets[finished]])
+            ready = rank[(remaining == 0) & ~done].tolist()
+            heapq.heapify(ready)
+
+            rank = rank.tolist()
+            dispatch = dispatch.tolist()
+            remaining = remaining.tolist()
+            ready_time = ready_time.tolist()
+            succ_offsets, succ_targets = table.successors
+            succ_offsets = succ_offsets.tolist()
+            succ_targets = succ_targets.tolist()
+
+            candidates = heaps
+            while ready:
+                i = dispatch[heapq.heappop(ready)]
+
+                if task_masks is not None:
+                    mask = task_masks[i]
+                    candidates = eligible.get(mask)
+                    if candidates is None:
+                        classes = pool.eligible_classes(mask)
+                        if not classes:
+                            raise ValueError(
+                                f"Task {table.ids[i]} requires skills no single resource has")
+                        if calendars is None:
+                            candidates = [(heaps[c][0], c) for c in classes]
+                            heapq.heapify(candidates)
+                        else:
+                            candidates = [heaps[c] for c in classes]
+                        eligible[mask] = candidates
+
+                # Take the slot with the earliest availability
+                if calendars is None:
+                    if task_masks is None:
+                        resource_heap = heaps[0]
+                    else:
+                        # A class top only grows, so an entry that is no longer
+                        # its class's top is refreshed once it surfaces
+                        top, c = candidates[0]
+                        while heaps[c][0] is not top:
+                            heapq.heapreplace(candidates, (heaps[c][0], c))
+                            top, c = candidates[0]
+                        resource_heap = heaps[c]
+                    free_time, index = resource_heap[0]
+                    start_time = free_time if free_time > ready_time[i] else ready_time[i]
+                    end_time = start_time + durations[i]
+                    heapq.heapreplace(resource_heap, (end_time, index))
+                else:
+                    start_time, index = self._earliest_slot(
+                        candidates, calendars, ready_time[i], durations[i])
+                    end_time = start_time + durations[i]
+                    heapq.heappush(slot_heap[index],
+                                   (available(end_time, index), end_time, index))
+                sequence.append(i)
+                start.append(start_time)
+                end.append(end_time)
+                assigned.append(index)
+
+                # Release successors whose prerequisites are now all scheduled
+                for v in succ_targets[succ_offsets[i]:succ_offsets[i + 1]]:
+                    if end_time > ready_time[v]:
+                        ready_time[v] = end_time
+                    remaining[v] -= 1
+                    if remaining[v] == 0:
+                        heapq.heappush(ready, rank[v])
+
+        rows = np.asarray(sequence, dtype=np.int64)
+        table.start = table.start.astype(dtype)
+        table.start[rows] = start
+        table.end = table.end.astype(dtype)
+        table.end[rows] = end
+        table.resource = table.resource.copy()
+        table.resource[rows] = assigned
+        table.sequence = np.concatenate([prefix, rows])
+        return pool.slots
+
+    def _duration_std(self, table: TaskTable, options: Dict) -> np.ndarray:
+        """Standard deviation of every task's duration for the simulation.
+
+        'residuals': 'model' takes the trained model's test RMSE for every
+        task, otherwise it is 'cv' (default DEFAULT_CV) times the duration;
+        'duration_std' ({task id: std}) overrides single tasks.
+        """
+        if options.get('residuals') == 'model':
+            std = np.full(len(table), self._predictor().residual_std)
+        else:
+            std = table.duration * float(options.get('cv', DEFAULT_CV))
+        if options.get('duration_std'):
+            given = _task_values(table, options['duration_std'], 'duration_std')
+            std = np.where(np.isnan(given), std, given)
+        return std
+
+    def _compute_metrics(self, table: TaskTable, resources: List,
+                         limits: ScheduleConstraints = None,
+                         simulation: Dict = None, totals: tuple = None) -> Dict:
+        """Compute performance metrics from the scheduled table.
+
+        totals is (makespan, total task duration) when the caller keeps
+        them up to date itself, as stored schedules do between edits.
+
+        The on-time probability comes from a Monte Carlo simulation of the
+        schedule (see src/simulation.py), run only when simulation options
+        are given (an empty dict takes the defaults). It is measured
+        against the deadlines, or against simulation['target'] (a makespan)
+        when there are none, and is None otherwise. Scenarios keep to the
+        release times and team calendars in limits. simulation may also
+        set 'samples' (0 skips it), 'seed', 'cv', 'residuals' and
+        'duration_std' (see _duration_std).
+        """
+        if not len(table):
             return {}
 
-        max_end_time = max(s['end'] for s in schedule.values())
-        total_tasks = len(schedule)
-        total_duration = sum(s['duration'] for s in schedule.values())
+        if totals is None:
+            totals = table.end.max().item(), table.duration.sum().item()
+        max_end_time, total_duration = totals
+        total_tasks = len(table)
 
         # Calculate resource utilization
-        utilized_time = sum(s['duration'] for s in schedule.values())
-        max_possible_time = max_end_time * len(resources)
+        slot_team = ResourcePool(resources).slot_team
+        utilized_time = total_duration
+        max_possible_time = max_end_time * len(slot_team)
         utilization = (utilized_time / max_possible_time * 100) if max_possible_time > 0 else 0
 
-        return {
+        metrics = {
             'total_project_duration': max_end_time,
             'total_tasks': total_tasks,
             'total_task_duration': total_duration,
             'resource_utilization': round(utilization, 2),
-            'on_time_probability': 94,  # Based on metrics
-            'processing_time_seconds': round(self.processing_time, 2)
+            'on_time_probability': None
         }
 
-    def get_schedule(self) -> Dict:
-        """Return the computed schedule."""
-        return self.schedule
-
-    def get_metrics(self) -> Dict:
-        """Return the computed metrics."""
-        return self.metrics
+        if simulation is None:
+            return metrics
+        samples = int(simulation.get('samples', default_samples(total_tasks)))
+        if samples > 0:
+            target = simulation.get('target')
+            calendars = limits.calendars if limits is not None else None
+            forecast = simulate(
+                table, self._duration_std(table, simulation), samples,
+                seed=int(simulation.get('seed', 0)),
+                release=limits.release if limits is not None else None,
+                deadline=limits.deadline if limits is not None else None,
+                target=float(target) if target is not None else None,
+                calendars=calendars,
+                team=np.asarray(slot_team)[table.resource] if calendars is not None else None
+            )
+            metrics['on_time_probability'] = forecast.pop('on_time_probability')
+            metrics['simulation'] = forecast
+        return metrics
@@ -0,0 +1,152 @@
+"""Task duration prediction with the trained completion-time model."""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import joblib
+import numpy as np
+
+from src.forest import load_model
+
+
+def fill_missing(scaler, matrix: np.ndarray) -> np.ndarray:
+    """Replace NaN features in place with the scaler's training means.
+
+    Training fills gaps with column means before the scaler is fit, so
+    its mean_ holds the values missing features had during training.
+    """
+    missing = np.isnan(matrix)
+    if missing.any():
+        matrix[missing] = np.broadcast_to(scaler.mean_, matrix.shape)[missing]
+    return matrix
+
+
+def standardize(scaler, matrix: np.ndarray) -> np.ndarray:
+    """Standardize like scaler.transform, without its per-call checks."""
+    scaled = matrix - scaler.mean_
+    if scaler.scale_ is not None:
+        scaled /= scaler.scale_
+    return scaled
+
+
+def preprocess(scaler, matrix: np.ndarray) -> np.ndarray:
+    """Turn raw feature rows into model inputs, as training prepared them.
+
+    Every prediction path (the predictor and both evaluation modes of
+    evaluate.py) goes through here, so they agree on rows with gaps.
+    """
+    return standardize(scaler, fill_missing(scaler, np.array(matrix, dtype=np.float64)))
+
+
+class DurationPredictor:
+    """Predicts task durations in batches and memoizes them per feature vector.
+
+    The model and scaler are loaded once, the model from its memory-mapped
+    flat export when there is one; every call predicts all cache misses
+    with a single vectorized predict().
+    """
+
+    def __init__(self, model_path: str = None, scaler_path: str = None,
+                 cache_size: int = 100000):
+        self.model_path = model_path or os.getenv('MODEL_PATH', 'models/trained_model.pkl')
+        self.scaler_path = scaler_path or os.getenv(
+            'SCALER_PATH', self.model_path.replace('trained_model', 'scaler'))
+        self.model = load_model(self.model_path)
+        self.scaler = joblib.load(self.scaler_path)
+        self.feature_names = list(getattr(self.scaler, 'feature_names_in_', []))
+        self.cache_size = cache_size
+        self._residual_std = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def residual_std(self) -> float:
+        """Spread of the model's errors: its test RMSE from evaluate.py.
+
+        Read from evaluation_metrics.json next to the model, or from
+        EVALUATION_METRICS_PATH.
+        """
+        if self._residual_std is None:
+            path = os.getenv('EVALUATION_METRICS_PATH', os.path.join(
+                os.path.dirname(self.model_path), 'evaluation_metrics.json'))
+            try:
+                with open(path) as f:
+                    self._residual_std = float(json.load(f)['RMSE'])
+            except (OSError, KeyError, ValueError) as e:
+                raise ValueError(f"No model residuals available from {path}: {e}")
+        return self._residual_std
+
+    def features(self, tasks: List[Dict]) -> np.ndarray:
+        """Build the feature matrix for tasks.
+
+        Each task gives its features as a list in training column order, or
+        as a dict (or top-level keys) by column name. Missing values fall
+        back to the training mean, as in preprocessing.
+        """
+        width = len(self.scaler.mean_)
+        matrix = np.empty((len(tasks), width), dtype=np.float64)
+        for row, task in enumerate(tasks):
+            features = task.get('features', task)
+            if isinstance(features, (list, tuple)):
+                matrix[row] = features
+            else:
+                matrix[row] = [features.get(name, np.nan) for name in self.feature_names]
+        return fill_missing(self.scaler, matrix)
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        """Predict one duration per row, reusing memoized rows."""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        keys = [row.tobytes() for row in matrix]
+        result = np.empty(len(keys), dtype=np.float64)
+
+        with self._lock:
+            misses = {}
+            for i, key in enumerate(keys):
+                value = self._cache.get(key)
+                if value is None:
+                    misses.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    result[i] = value
+
+        if misses:
+            # One predict call covers every distinct uncached vector
+            first = [rows[0] for rows in misses.values()]
+            predicted = self.model.predict(standardize(self.scaler, matrix[first])).tolist()
+            with self._lock:
+                for (key, rows), value in zip(misses.items(), predicted):
+                    result[rows] = value
+                    self._cache[key] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return result
+
+    def fill_durations(self, tasks: List[Dict]) -> List[Dict]:
+        """Return tasks with predicted durations for those that lack one."""
+        pending = [i for i, task in enumerate(tasks) if task.get('duration') is None]
+        if not pending:
+            return tasks
+
+        durations = self.predict(self.features([tasks[i] for i in pending]))
+        filled = list(tasks)
+        for i, duration in zip(pending, durations.tolist()):
+            filled[i] = {**tasks[i], 'duration': max(duration, 0.0)}
+        return filled
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_predictor() -> DurationPredictor:
+    """Return this process's shared predictor, loading it on first use."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = DurationPredictor()
+    return _default
@@ -0,0 +1,182 @@
+"""Per-phase timing and optional profiling hooks for optimizer runs."""
+
+import cProfile
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Sequence
+
+# Fraction of runs timed unless PROFILE_SAMPLE_RATE says otherwise; low
+# enough that production traffic pays next to nothing for the timers
+DEFAULT_SAMPLE_RATE = 0.01
+
+
+class CProfileHook:
+    """Profiles the whole run with cProfile and reports the top functions."""
+
+    name = 'cprofile'
+
+    def __init__(self, limit: int = 20):
+        self.limit = limit
+        self._profile = None
+
+    def start(self) -> None:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active in this process (e.g. a concurrent run)
+            return
+        self._profile = profile
+
+    def enter(self, phase: str) -> None:
+        pass
+
+    def exit(self, phase: str) -> None:
+        pass
+
+    def stop(self) -> Optional[List[Dict]]:
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        stats = pstats.Stats(self._profile).stats
+        self._profile = None
+
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.limit]
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'total_seconds': round(total, 6),
+                'cumulative_seconds': round(cumulative, 6)
+            }
+            for (filename, line, function), (_, calls, total, cumulative, _) in top
+        ]
+
+
+class TracemallocHook:
+    """Reports the peak traced memory of each phase, in megabytes.
+
+    Tracing is process-wide, so concurrent runs inflate each other's peaks.
+    """
+
+    name = 'tracemalloc'
+
+    def __init__(self):
+        self._owned = False
+        self._peaks = {}
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owned = True
+
+    def enter(self, phase: str) -> None:
+        tracemalloc.reset_peak()
+
+    def exit(self, phase: str) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        self._peaks[phase] = round(peak / 2 ** 20, 3)
+
+    def stop(self) -> Dict[str, float]:
+        if self._owned:
+            tracemalloc.stop()
+            self._owned = False
+        return self._peaks
+
+
+HOOKS = {
+    'cprofile': CProfileHook,
+    'tracemalloc': TracemallocHook
+}
+
+
+class Profiler:
+    """Collects wall-clock time per optimizer phase for one run.
+
+    Phases are timed with perf_counter_ns; a phase entered more than once
+    accumulates. Hooks see every phase boundary and add their own section
+    to the report.
+    """
+
+    enabled = True
+
+    def __init__(self, hooks: Sequence = ()):
+        self.hooks = list(hooks)
+        self.phases: Dict[str, int] = {}
+        self._started = time.perf_counter_ns()
+        for hook in self.hooks:
+            hook.start()
+
+    @contextmanager
+    def phase(self, name: str):
+        for hook in self.hooks:
+            hook.enter(name)
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter_ns() - started
+            for hook in self.hooks:
+                hook.exit(name)
+
+    def report(self) -> Dict:
+        """Stop the hooks and return phase seconds plus hook output."""
+        report = {
+            'phases': {name: round(ns / 1e9, 6) for name, ns in self.phases.items()},
+            'total_seconds': round((time.perf_counter_ns() - self._started) / 1e9, 6)
+        }
+        for hook in self.hooks:
+            output = hook.stop()
+            if output is not None:
+                report[hook.name] = output
+        return report
+
+
+class _NullProfiler:
+    """Stand-in for runs that were not sampled; every phase is a no-op."""
+
+    enabled = False
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def report(self) -> None:
+        return None
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class ProfileSampler:
+    """Decides which optimizer runs are profiled and with which hooks.
+
+    Args:
+        rate: Fraction of runs that get phase timers (0 disables them)
+        hooks: Names from HOOKS to attach to every sampled run
+    """
+
+    def __init__(self, rate: float = DEFAULT_SAMPLE_RATE, hooks: Sequence[str] = ()):
+        unknown = [name for name in hooks if name not in HOOKS]
+        if unknown:
+            raise ValueError(f"Unknown profiling hooks: {', '.join(unknown)}")
+        self.rate = rate
+        self.hooks = list(hooks)
+
+    @classmethod
+    def from_env(cls) -> 'ProfileSampler':
+        """Build a sampler from PROFILE_SAMPLE_RATE and PROFILE_HOOKS."""
+        hooks = os.getenv('PROFILE_HOOKS', '')
+        return cls(
+            rate=float(os.getenv('PROFILE_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)),
+            hooks=[name.strip() for name in hooks.split(',') if name.strip()]
+        )
+
+    def profiler(self):
+        """Return a Profiler for a sampled run, else the null profiler."""
+        if self.rate <= 0 or (self.rate < 1 and random.random() >= self.rate):
+            return NULL_PROFILER
+        return Profiler(HOOKS[name]() for name in self.hooks)
@@ -0,0 +1,139 @@
+"""Resources with skill sets and parallel capacity.
+
+A resource is either a team name or a dictionary
+
+    {'name': 'Team A', 'skills': ['python', 'ml'], 'capacity': 2}
+
+Skills default to none and capacity to 1. A team with capacity c works
+on up to c tasks at once; the allocator sees it as c slots that share
+the team's name, skills and calendar. A task may list
+'required_skills', and only teams with all of them can take it.
+
+Skills are numbered in order of appearance and sets of them are kept as
+integer bitmasks, so "team has every skill the task needs" is
+task_mask & ~team_mask == 0.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.task_table import TaskTable
+
+
+def resource_name(resource) -> str:
+    """Name of a resource given as a string or a dictionary."""
+    if isinstance(resource, dict):
+        if resource.get('name') is None:
+            raise ValueError("Every resource needs a name")
+        return resource['name']
+    return resource
+
+
+class ResourcePool:
+    """Teams, their skill masks and the slots the allocator schedules on.
+
+    Teams are de-duplicated by name, keeping the first definition. Slots
+    are numbered team by team in input order, so the first-listed team
+    still wins ties and slot numbers stay stable when teams are appended.
+    """
+
+    def __init__(self, resources: Sequence):
+        self.teams: List[str] = []
+        self.bits: Dict[str, int] = {}
+        self.masks: List[int] = []
+        self.skills: List[tuple] = []
+        self.slot_team: List[int] = []
+        seen = set()
+        for resource in resources:
+            name = resource_name(resource)
+            if name in seen:
+                continue
+            seen.add(name)
+            skills, capacity = (), 1
+            if isinstance(resource, dict):
+                skills = resource.get('skills') or ()
+                capacity = resource.get('capacity', 1)
+            if isinstance(capacity, bool) or not isinstance(capacity, int) or capacity < 1:
+                raise ValueError(f"Capacity of resource {name} must be a positive integer")
+            mask = 0
+            for skill in skills:
+                mask |= 1 << self.bits.setdefault(skill, len(self.bits))
+            self.masks.append(mask)
+            self.skills.append(tuple(skills))
+            self.slot_team.extend([len(self.teams)] * capacity)
+            self.teams.append(name)
+
+    @property
+    def slots(self) -> List[str]:
+        """Team name of every slot; the table's resource column indexes this."""
+        return [self.teams[team] for team in self.slot_team]
+
+    def slot_range(self, lo: int, hi: int) -> Tuple[List[Dict], List[int]]:
+        """Resources that own slots lo to hi - 1, with capacity cut to them.
+
+        Returns the resource dictionaries and the team index of each. A
+        pool built from them numbers its slots in the same order, so its
+        slot s is slot lo + s of this pool. A team whose slots straddle a
+        range boundary shares its capacity between the ranges.
+        """
+        counts = Counter(self.slot_team[lo:hi])
+        resources = [{'name': self.teams[team], 'skills': list(self.skills[team]),
+                      'capacity': capacity} for team, capacity in counts.items()]
+        return resources, list(counts)
+
+    def skill_classes(self):
+        """Group slots by their team's skill mask.
+
+        Returns the distinct masks and, for each slot, the index of its
+        class. Also indexes, per skill, the set of classes having it as an
+        integer bitset for eligible_classes().
+        """
+        classes: Dict[int, int] = {}
+        slot_class = [classes.setdefault(self.masks[team], len(classes))
+                      for team in self.slot_team]
+        class_masks = list(classes)
+        self._classes_with = [0] * len(self.bits)
+        for c, mask in enumerate(class_masks):
+            while mask:
+                low = mask & -mask
+                self._classes_with[low.bit_length() - 1] |= 1 << c
+                mask ^= low
+        self._all_classes = (1 << len(class_masks)) - 1
+        return class_masks, slot_class
+
+    def eligible_classes(self, mask: int) -> List[int]:
+        """Classes whose teams have every skill in mask, in class order.
+
+        One AND per required skill; call skill_classes() first.
+        """
+        eligible = self._all_classes
+        while mask:
+            low = mask & -mask
+            eligible &= self._classes_with[low.bit_length() - 1]
+            mask ^= low
+        classes = []
+        while eligible:
+            low = eligible & -eligible
+            classes.append(low.bit_length() - 1)
+            eligible ^= low
+        return classes
+
+    def task_masks(self, table: TaskTable) -> Optional[List[int]]:
+        """Required-skill mask of every task row, or None if no task has any."""
+        if table.skills is None:
+            return None
+        masks = []
+        known: Dict[tuple, int] = {}
+        for row, skills in enumerate(table.skills.tolist()):
+            key = tuple(skills) if skills else ()
+            mask = known.get(key)
+            if mask is None:
+                mask = 0
+                for skill in key:
+                    if skill not in self.bits:
+                        raise ValueError(
+                            f"Task {table.ids[row]} requires skill {skill} that no resource has")
+                    mask |= 1 << self.bits[skill]
+                known[key] = mask
+            masks.append(mask)
+        return masks if any(masks) else None
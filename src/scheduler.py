@@ -0,0 +1,343 @@
+"""Precedence scheduling over the task dependency graph."""
+
+import heapq
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from src.task_table import TaskTable, _segments
+
+# Below this average level width, per-level NumPy calls cost more than a
+# plain Python pass, so deep and narrow graphs are walked sequentially
+_NARROW_LEVEL = 32
+
+
+@dataclass
+class CriticalPath:
+    """Result of a critical path pass over the dependency graph."""
+    earliest_start: np.ndarray
+    slack: np.ndarray
+    path: List[int]
+    length: int
+    # Longest chain of successors after each task (excluding the task)
+    tail: Optional[np.ndarray] = None
+
+
+class DependencyGraph:
+    """Task precedence graph over the CSR arrays of a TaskTable.
+
+    Nodes are table rows, and an edge u -> v means task v cannot start
+    before task u has finished. Passes run level by level so each level is
+    handled by a few vectorized operations; graphs whose levels are too
+    narrow for that to pay off (long chains) fall back to list-based loops.
+    """
+
+    def __init__(self, table: TaskTable):
+        self.table = table
+        self.in_degree = np.diff(table.dep_offsets)
+        self.levels = None
+        self.level_of = None
+
+    @classmethod
+    def from_table(cls, table: TaskTable) -> 'DependencyGraph':
+        """Build the graph for the dependencies stored in a table."""
+        return cls(table)
+
+    @property
+    def num_edges(self) -> int:
+        return self.table.num_edges
+
+    def topological_order(self) -> np.ndarray:
+        """Return the nodes in dependency order (level-synchronous Kahn, O(V+E)).
+
+        Raises:
+            ValueError: If the graph contains a dependency cycle.
+        """
+        n = len(self.table)
+        remaining = self.in_degree.copy()
+        frontier = np.flatnonzero(remaining == 0)
+        levels = []
+        scheduled = 0
+
+        if self.num_edges == 0:
+            self.levels = [frontier]
+            self.level_of = np.zeros(n, dtype=np.int64)
+            return frontier
+
+        succ_offsets, succ_targets = self.table.successors
+        while frontier.size:
+            if len(levels) >= 64 and scheduled < _NARROW_LEVEL * len(levels):
+                scheduled += self._finish_levels(frontier, remaining, levels)
+                break
+            levels.append(frontier)
+            scheduled += frontier.size
+            targets = succ_targets[_segments(succ_offsets, frontier)]
+            if targets.size == 0:
+                break
+            nodes, counts = np.unique(targets, return_counts=True)
+            remaining[nodes] -= counts
+            frontier = nodes[remaining[nodes] == 0]
+
+        if scheduled < n:
+            raise ValueError(
+                f"Dependency cycle detected among {n - scheduled} tasks"
+            )
+
+        self.levels = levels
+        self.level_of = np.empty(n, dtype=np.int64)
+        for depth, level in enumerate(levels):
+            self.level_of[level] = depth
+        return np.concatenate(levels)
+
+    def _finish_levels(self, frontier: np.ndarray, remaining: np.ndarray,
+                       levels: List[np.ndarray]) -> int:
+        """Continue the level pass with Python lists; returns nodes placed."""
+        succ_offsets, succ_targets = self.table.successors
+        succ_offsets = succ_offsets.tolist()
+        succ_targets = succ_targets.tolist()
+        remaining = remaining.tolist()
+        frontier = frontier.tolist()
+        placed = 0
+
+        while frontier:
+            levels.append(np.asarray(frontier, dtype=np.int64))
+            placed += len(frontier)
+            released = []
+            for u in frontier:
+                for v in succ_targets[succ_offsets[u]:succ_offsets[u + 1]]:
+                    remaining[v] -= 1
+                    if remaining[v] == 0:
+                        released.append(v)
+            frontier = sorted(released)
+
+        return placed
+
+    def add_node(self, row: int) -> None:
+        """Register a row just appended to the table (after its prerequisites)."""
+        table = self.table
+        preds = table.dep_targets[table.dep_offsets[row]:table.dep_offsets[row + 1]]
+        depth = int(self.level_of[preds].max()) + 1 if preds.size else 0
+        if depth == len(self.levels):
+            self.levels.append(np.empty(0, dtype=np.int64))
+        self.levels[depth] = np.append(self.levels[depth], row)
+        self.level_of = np.append(self.level_of, depth)
+        self.in_degree = np.append(self.in_degree, preds.size)
+
+    def remove_node(self, row: int) -> None:
+        """Drop a row just removed from the table; later rows shift down."""
+        depth = self.level_of[row]
+        self.levels[depth] = self.levels[depth][self.levels[depth] != row]
+        self.levels = [level - (level > row) for level in self.levels if level.size]
+        self.level_of = np.delete(self.level_of, row)
+        self.in_degree = np.delete(self.in_degree, row)
+
+    def components(self) -> np.ndarray:
+        """Label each node with its weakly connected component.
+
+        Union-find over the edge arrays, one vectorized round at a time:
+        every edge links the larger of its two roots under the smaller,
+        then pointer jumping flattens the forest. Labels are numbered
+        0..C-1 in order of each component's first row.
+        """
+        table = self.table
+        n = len(table)
+        parent = np.arange(n)
+        if self.num_edges:
+            owners = np.repeat(np.arange(n), self.in_degree)
+            targets = table.dep_targets
+            while True:
+                a, b = parent[owners], parent[targets]
+                linked = a != b
+                if not linked.any():
+                    break
+                np.minimum.at(parent, np.maximum(a, b)[linked], np.minimum(a, b)[linked])
+                while True:
+                    grandparent = parent[parent]
+                    if np.array_equal(grandparent, parent):
+                        break
+                    parent = grandparent
+        _, labels = np.unique(parent, return_inverse=True)
+        return labels.reshape(-1)
+
+    def critical_path(self) -> CriticalPath:
+        """Compute earliest starts, total slack and one critical path.
+
+        This is the classic CPM forward/backward pass: it ignores resource
+        limits, so the slack of a task is how far it can slip without
+        delaying the precedence-bound project end. Requires a prior call to
+        topological_order().
+        """
+        table = self.table
+        durations = table.duration
+        earliest_start = np.zeros(len(table), dtype=durations.dtype)
+
+        if self.num_edges == 0:
+            length = durations.max() if len(table) else 0
+            slack = length - durations
+            path = [int(np.argmax(durations))] if len(table) else []
+            return CriticalPath(earliest_start, slack, path, length.item() if path else 0,
+                                np.zeros_like(earliest_start))
+
+        succ_offsets, succ_targets = table.successors
+        sequential = len(self.levels) * _NARROW_LEVEL > len(table)
+        if sequential:
+            earliest_start, latest_finish = self._passes_sequential()
+            earliest_finish = earliest_start + durations
+            length = earliest_finish.max()
+        else:
+            # Forward pass: every node past level 0 has at least one prerequisite
+            dep_offsets, dep_targets = table.dep_offsets, table.dep_targets
+            for level in self.levels[1:]:
+                preds = dep_targets[_segments(dep_offsets, level)]
+                segment_starts = np.cumsum(self.in_degree[level]) - self.in_degree[level]
+                earliest_start[level] = np.maximum.reduceat(
+                    earliest_start[preds] + durations[preds], segment_starts
+                )
+
+            earliest_finish = earliest_start + durations
+            length = earliest_finish.max()
+            latest_finish = np.full(len(table), length, dtype=durations.dtype)
+
+            # Backward pass: tasks without successors may finish at the project end
+            out_degree = np.diff(succ_offsets)
+            for level in reversed(self.levels[:-1]):
+                level = level[out_degree[level] > 0]
+                if level.size == 0:
+                    continue
+                succs = succ_targets[_segments(succ_offsets, level)]
+                segment_starts = np.cumsum(out_degree[level]) - out_degree[level]
+                latest_finish[level] = np.minimum.reduceat(
+                    latest_finish[succs] - durations[succs], segment_starts
+                )
+
+        slack = latest_finish - earliest_finish
+        path = self._zero_slack_chain(earliest_start, earliest_finish, slack, sequential)
+        return CriticalPath(earliest_start, slack, path, length.item(), length - latest_finish)
+
+    def update_critical_path(self, previous: CriticalPath, forward: np.ndarray,
+                             backward: np.ndarray) -> CriticalPath:
+        """Redo the critical path after a few nodes changed.
+
+        previous is the last result, its arrays aligned with the current
+        rows. forward lists the nodes whose earliest start may have
+        changed (a prerequisite changed), backward those whose tail may
+        have changed (a successor changed). Each pass revisits nodes in
+        level order and only goes on past a node whose value changed, so
+        an edit costs the part of the graph it moves. When that is more
+        than an eighth of the graph, the full critical_path() is cheaper.
+        """
+        table = self.table
+        if self.num_edges == 0 or previous.tail is None:
+            return self.critical_path()
+
+        durations = table.duration
+        budget = len(table) // 8
+        earliest_start = previous.earliest_start.astype(durations.dtype)
+        tail = previous.tail.astype(durations.dtype)
+
+        # Forward: a node starts when its last prerequisite finishes;
+        # backward: its tail is the longest successor duration plus tail
+        dependencies = (table.dep_offsets, table.dep_targets)
+        visited = self._propagate(earliest_start, forward, dependencies, table.successors,
+                                  1, budget)
+        if visited is not None:
+            visited = self._propagate(tail, backward, table.successors, dependencies,
+                                      -1, budget - visited)
+        if visited is None:
+            return self.critical_path()
+
+        earliest_finish = earliest_start + durations
+        length = earliest_finish.max()
+        slack = length - earliest_finish - tail
+        path = self._zero_slack_chain(earliest_start, earliest_finish, slack, False)
+        return CriticalPath(earliest_start, slack, path, length.item(), tail)
+
+    def _propagate(self, values: np.ndarray, seeds: np.ndarray, inputs: tuple,
+                   outputs: tuple, direction: int, budget: int) -> Optional[int]:
+        """Recompute values in place, level by level from the seed nodes.
+
+        A node's value is the largest value plus duration over its inputs
+        (CSR offsets, targets), or 0 without any; a node whose value
+        changes queues its outputs. direction 1 walks the levels upward,
+        -1 downward. Returns the number of nodes visited, or None once
+        that exceeds budget.
+        """
+        durations = self.table.duration
+        in_offsets, in_targets = inputs
+        out_offsets, out_targets = outputs
+        level_of = self.level_of
+        queue = [(direction * int(level_of[v]), v) for v in set(np.asarray(seeds).tolist())]
+        queued = {v for _, v in queue}
+        heapq.heapify(queue)
+        visited = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            visited += 1
+            if visited > budget:
+                return None
+            sources = in_targets[in_offsets[v]:in_offsets[v + 1]]
+            value = (values[sources] + durations[sources]).max() if sources.size else 0
+            if value != values[v]:
+                values[v] = value
+                for u in out_targets[out_offsets[v]:out_offsets[v + 1]].tolist():
+                    if u not in queued:
+                        queued.add(u)
+                        heapq.heappush(queue, (direction * int(level_of[u]), u))
+        return visited
+
+    def _zero_slack_chain(self, earliest_start: np.ndarray, earliest_finish: np.ndarray,
+                          slack: np.ndarray, sequential: bool) -> List[int]:
+        """Walk one zero-slack chain from a zero-slack source to the end."""
+        succ_offsets, succ_targets = self.table.successors
+        path = []
+        sources = self.levels[0]
+        critical = sources[slack[sources] == 0]
+        current = int(critical[0]) if critical.size else None
+        if sequential:
+            offsets, targets = succ_offsets.tolist(), succ_targets.tolist()
+            slack_list, start_list = slack.tolist(), earliest_start.tolist()
+            finish_list = earliest_finish.tolist()
+            while current is not None:
+                path.append(current)
+                current = next(
+                    (v for v in targets[offsets[current]:offsets[current + 1]]
+                     if slack_list[v] == 0 and start_list[v] == finish_list[current]),
+                    None
+                )
+        else:
+            while current is not None:
+                path.append(current)
+                succs = succ_targets[succ_offsets[current]:succ_offsets[current + 1]]
+                nxt = succs[(slack[succs] == 0) &
+                            (earliest_start[succs] == earliest_finish[current])]
+                current = int(nxt[0]) if nxt.size else None
+        return path
+
+    def _passes_sequential(self):
+        """CPM forward/backward passes as list loops over the topological order."""
+        table = self.table
+        n = len(table)
+        durations = table.duration.tolist()
+        succ_offsets, succ_targets = table.successors
+        succ_offsets = succ_offsets.tolist()
+        succ_targets = succ_targets.tolist()
+        order = np.concatenate(self.levels).tolist()
+
+        earliest_start = [0] * n
+        for u in order:
+            finish = earliest_start[u] + durations[u]
+            for v in succ_targets[succ_offsets[u]:succ_offsets[u + 1]]:
+                if finish > earliest_start[v]:
+                    earliest_start[v] = finish
+
+        length = max(s + d for s, d in zip(earliest_start, durations))
+        latest_finish = [length] * n
+        for u in reversed(order):
+            for v in succ_targets[succ_offsets[u]:succ_offsets[u + 1]]:
+                latest_start = latest_finish[v] - durations[v]
+                if latest_start < latest_finish[u]:
+                    latest_finish[u] = latest_start
+
+        dtype = table.duration.dtype
+        return np.asarray(earliest_start, dtype=dtype), np.asarray(latest_finish, dtype=dtype)
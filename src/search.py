@@ -0,0 +1,205 @@
+"""Anytime schedule improvement by local search and genetic search.
+
+Candidates are activity lists: precedence-feasible task orders that are
+decoded like the greedy allocator, each task in turn taking the earliest
+free resource no earlier than its prerequisites' end. The greedy
+dispatch sequence is such a list, so the search starts from it and never
+returns anything worse.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.task_table import TaskTable
+
+# Largest padded predecessor/successor matrix the evaluator will build
+_MAX_PADDED_CELLS = 20_000_000
+
+# Dispatch steps the evaluator runs between deadline checks
+_DEADLINE_STEPS = 256
+
+
+def _padded(offsets: np.ndarray, targets: np.ndarray, n: int, fill: int) -> np.ndarray:
+    """Turn CSR adjacency into an (n, max degree) matrix padded with fill."""
+    degree = np.diff(offsets)
+    width = max(int(degree.max()) if n else 0, 1)
+    matrix = np.full((n, width), fill, dtype=np.int64)
+    rows = np.repeat(np.arange(n), degree)
+    cols = np.arange(len(targets)) - np.repeat(offsets[:-1], degree)
+    matrix[rows, cols] = targets
+    return matrix
+
+
+def evaluate_makespans(orders: np.ndarray, durations: np.ndarray, preds: np.ndarray,
+                       num_teams: int, deadline: float = None) -> Optional[np.ndarray]:
+    """Decode a batch of activity lists at once and return their makespans.
+
+    orders has one candidate per row. The loop runs over dispatch steps
+    while every operation inside it works on all candidates together.
+    preds is padded with n, which indexes an always-zero end column.
+    With a deadline (a time.perf_counter() value) the decode gives up and
+    returns None once it passes, checked every _DEADLINE_STEPS steps.
+    """
+    population, n = orders.shape
+    rows = np.arange(population)
+    end = np.zeros((population, n + 1), dtype=durations.dtype)
+    free = np.zeros((population, num_teams), dtype=durations.dtype)
+
+    for step in range(n):
+        if deadline is not None and step % _DEADLINE_STEPS == 0 \
+                and time.perf_counter() >= deadline:
+            return None
+        tasks = orders[:, step]
+        ready = end[rows[:, None], preds[tasks]].max(axis=1)
+        team = free.argmin(axis=1)
+        finish = np.maximum(free[rows, team], ready) + durations[tasks]
+        end[rows, tasks] = finish
+        free[rows, team] = finish
+
+    return free.max(axis=1)
+
+
+def _mutate(orders: np.ndarray, preds: np.ndarray, succs: np.ndarray,
+            rng: np.random.Generator) -> np.ndarray:
+    """Move one random task per candidate within its precedence window."""
+    population, n = orders.shape
+    orders = orders.copy()
+    position = np.empty(n + 1, dtype=np.int64)
+
+    for order in orders:
+        position[order] = np.arange(n)
+        i = int(rng.integers(n))
+        task = order[i]
+        position[n] = -1
+        lo = int(position[preds[task]].max()) + 1
+        position[n] = n
+        hi = int(position[succs[task]].min()) - 1
+        j = int(rng.integers(lo, hi + 1))
+        if j < i:
+            order[j + 1:i + 1] = order[j:i].copy()
+        elif j > i:
+            order[i:j] = order[i + 1:j + 1].copy()
+        order[j] = task
+
+    return orders
+
+
+def _crossover(first: np.ndarray, second: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """One-point activity-list crossover; keeps precedence feasibility."""
+    n = len(first)
+    head = first[:int(rng.integers(1, n))] if n > 1 else first
+    taken = np.zeros(n, dtype=bool)
+    taken[head] = True
+    return np.concatenate([head, second[~taken[second]]])
+
+
+def _search_worker(args: Tuple) -> Tuple[np.ndarray, float, List, int]:
+    """Run one search until its deadline; returns best order, makespan, trace, evaluations."""
+    durations, preds, succs, num_teams, initial, method, budget, seed, population = args
+    started = time.perf_counter()
+    deadline = started + budget
+    rng = np.random.default_rng(seed)
+
+    # On large tables even the first generation can outlast a small budget;
+    # then the search gives up and leaves the initial order in place
+    pool = _mutate(np.repeat(initial[None, :], population, axis=0), preds, succs, rng)
+    pool[0] = initial
+    fitness = evaluate_makespans(pool, durations, preds, num_teams, deadline)
+    if fitness is None:
+        return initial, float('inf'), [], 0
+    evaluations = population
+    generation_time = time.perf_counter() - started
+
+    best = int(np.argmin(fitness))
+    best_order, best_makespan = pool[best].copy(), fitness[best].item()
+    trace = [(round(time.perf_counter() - started, 4), best_makespan)]
+
+    while time.perf_counter() + generation_time < deadline:
+        tick = time.perf_counter()
+        if method == 'local':
+            children = _mutate(np.repeat(best_order[None, :], population, axis=0),
+                               preds, succs, rng)
+        else:
+            # Binary tournaments pick parents; children are crossed then mutated
+            picks = rng.integers(population, size=(population, 2, 2))
+            winners = np.where(fitness[picks[..., 0]] <= fitness[picks[..., 1]],
+                               picks[..., 0], picks[..., 1])
+            children = np.stack([_crossover(pool[a], pool[b], rng) for a, b in winners])
+            children = _mutate(children, preds, succs, rng)
+
+        child_fitness = evaluate_makespans(children, durations, preds, num_teams, deadline)
+        if child_fitness is None:
+            break
+        evaluations += population
+
+        if method == 'local':
+            pool, fitness = children, child_fitness
+        else:
+            merged = np.concatenate([pool, children])
+            merged_fitness = np.concatenate([fitness, child_fitness])
+            survivors = np.argsort(merged_fitness, kind='stable')[:population]
+            pool, fitness = merged[survivors], merged_fitness[survivors]
+
+        candidate = int(np.argmin(child_fitness))
+        if child_fitness[candidate] < best_makespan or (
+                method == 'local' and child_fitness[candidate] == best_makespan):
+            if child_fitness[candidate] < best_makespan:
+                trace.append((round(time.perf_counter() - started, 4),
+                              child_fitness[candidate].item()))
+            best_order = children[candidate].copy()
+            best_makespan = child_fitness[candidate].item()
+        generation_time = time.perf_counter() - tick
+
+    return best_order, best_makespan, trace, evaluations
+
+
+def improve_schedule(table: TaskTable, num_teams: int, time_budget: float,
+                     method: str = 'genetic', workers: int = 1, seed: int = 0,
+                     population: int = 32, pool=None) -> Dict:
+    """Search for a shorter schedule than the table's greedy dispatch sequence.
+
+    Runs `workers` independent searches with different seeds, in the given
+    process pool when there is more than one, each for time_budget seconds.
+
+    Returns:
+        Dictionary with the best activity list ('sequence'), its makespan
+        (infinite if the budget ran out before a first evaluation), the
+        merged convergence trace and the number of evaluations
+    """
+    if method not in ('local', 'genetic'):
+        raise ValueError(f"Unknown search method {method}")
+
+    n = len(table)
+    succ_offsets, succ_targets = table.successors
+    preds = _padded(table.dep_offsets, table.dep_targets, n, n)
+    succs = _padded(succ_offsets, succ_targets, n, n)
+    if preds.size + succs.size > _MAX_PADDED_CELLS:
+        raise ValueError("Dependency lists are too wide for schedule search")
+
+    initial = table.sequence.copy()
+    jobs = [
+        (table.duration, preds, succs, num_teams, initial, method, time_budget,
+         seed + worker, population)
+        for worker in range(max(1, workers))
+    ]
+    if pool is not None and len(jobs) > 1:
+        outcomes = list(pool.map(_search_worker, jobs))
+    else:
+        outcomes = [_search_worker(job) for job in jobs]
+
+    best_order, best_makespan, _, _ = min(outcomes, key=lambda outcome: outcome[1])
+
+    # Merge per-worker traces into one running best over time
+    trace = []
+    for elapsed, makespan in sorted(point for outcome in outcomes for point in outcome[2]):
+        if not trace or makespan < trace[-1][1]:
+            trace.append((elapsed, makespan))
+
+    return {
+        'sequence': best_order,
+        'makespan': best_makespan,
+        'trace': [{'seconds': elapsed, 'makespan': makespan} for elapsed, makespan in trace],
+        'evaluations': sum(outcome[3] for outcome in outcomes)
+    }
@@ -0,0 +1,339 @@
+"""Persistent schedules that are re-optimized incrementally on edits."""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.constraints import ScheduleConstraints
+from src.dispatch import DEFAULT_RULE
+from src.optimizer import TaskOptimizer
+from src.resources import ResourcePool, resource_name
+from src.scheduler import DependencyGraph
+from src.task_table import TaskTable, ScheduleView
+from src.timeline import TimelineIndex
+
+
+class ScheduleSession:
+    """A stored schedule that supports edits without a full recompute.
+
+    Greedy list scheduling is a sequence of dispatch steps. An edit can
+    only change the steps from the first one where the edited task (or
+    resource) would be picked differently, so the session keeps the
+    dispatch prefix before that step and replays the rest. The resulting
+    schedule is the same one a fresh optimize() would produce.
+
+    Slack and the metrics are updated the same way: the critical path
+    pass only revisits the tasks whose earliest start or tail an edit
+    moves (see DependencyGraph.update_critical_path), and the makespan
+    is kept per dispatch step so the kept prefix need not be rescanned.
+    """
+
+    # Constraints that edits can keep honouring; search, decomposition and
+    # other dispatch rules would change the schedule outside the replay
+    CONSTRAINTS = ('blackouts', 'availability', 'release_times', 'deadlines', 'deadline',
+                   'dispatch', 'simulation')
+
+    def __init__(self, tasks: List[Dict], resources: List, constraints: Dict = None,
+                 optimizer: TaskOptimizer = None):
+        if not tasks or not resources:
+            raise ValueError("Tasks and resources are required")
+        constraints = dict(constraints or {})
+        unsupported = sorted(set(constraints) - set(self.CONSTRAINTS))
+        if unsupported:
+            raise ValueError(f"Stored schedules do not support constraints {unsupported}")
+        if constraints.get('dispatch', DEFAULT_RULE) != DEFAULT_RULE:
+            raise ValueError(f"Stored schedules dispatch by {DEFAULT_RULE} only")
+
+        self.optimizer = optimizer or TaskOptimizer()
+        self.lock = threading.Lock()
+        self.resources = list(resources)
+        self.constraints = constraints
+        self.table = TaskTable.from_dicts(tasks)
+        self.graph = DependencyGraph.from_table(self.table)
+        self.graph.topological_order()
+        self.limits = None
+        self._update_limits()
+        self.teams = []
+        self.schedule = ScheduleView(self.table, self.teams)
+        self.metrics = {}
+        self.changed = []
+        self.timeline = None
+        self.critical = self.graph.critical_path()
+        self.finish = np.empty(0, dtype=self.table.end.dtype)
+        self.total_duration = self.table.duration.sum().item()
+        self._reschedule(0, self._dispatch_order(), time.time())
+
+    def add_task(self, task: Dict) -> None:
+        """Add a task whose prerequisites are already in the schedule."""
+        started = time.time()
+        if self._has_task(task.get('id')):
+            raise ValueError(f"Task {task.get('id')} already exists")
+
+        row = self.table.append(task)
+        self.graph.add_node(row)
+        if self.limits is not None:
+            self._update_limits()
+        critical = self.critical
+        self.critical = self.graph.update_critical_path(
+            replace(critical, earliest_start=np.append(critical.earliest_start, 0),
+                    tail=np.append(critical.tail, 0)),
+            [row], self._prerequisites(row))
+        self.total_duration += self.table.duration[row].item()
+        order = self._dispatch_order()
+        self._reschedule(self._first_affected_step(row, order), order, started)
+
+    def remove_task(self, task_id) -> None:
+        """Remove a task that no other task depends on."""
+        started = time.time()
+        row = self._row(task_id)
+        if len(self.table) == 1:
+            raise ValueError("A schedule needs at least one task")
+
+        step = int(np.flatnonzero(self.table.sequence == row)[0])
+        preds = self._prerequisites(row)
+        duration = self.table.duration[row].item()
+        self.table.remove(row)
+        self.graph.remove_node(row)
+        for key in ('release_times', 'deadlines'):
+            if self.constraints.get(key):
+                self.constraints[key] = {k: v for k, v in self.constraints[key].items()
+                                         if k != task_id and k != str(task_id)}
+        if self.limits is not None:
+            self._update_limits()
+        critical = self.critical
+        self.critical = self.graph.update_critical_path(
+            replace(critical, earliest_start=np.delete(critical.earliest_start, row),
+                    tail=np.delete(critical.tail, row)),
+            [], preds - (preds > row))
+        self.total_duration -= duration
+        self._reschedule(step, self._dispatch_order(), started)
+
+    def update_duration(self, task_id, duration) -> None:
+        """Change the duration of an existing task."""
+        started = time.time()
+        row = self._row(task_id)
+        previous = self.table.duration[row].item()
+        self.table.set_duration(row, duration)
+        self.total_duration += self.table.duration[row].item() - previous
+        offsets, targets = self.table.successors
+        self.critical = self.graph.update_critical_path(
+            self.critical, targets[offsets[row]:offsets[row + 1]], self._prerequisites(row))
+        order = self._dispatch_order()
+        self._reschedule(self._first_affected_step(row, order), order, started)
+
+    def add_resource(self, resource) -> None:
+        """Make another team (a name or a dictionary) available to the schedule."""
+        started = time.time()
+        self.resources.append(resource)
+        if self.limits is not None:
+            self._update_limits()
+        if resource_name(resource) in self.teams:
+            self._reschedule(len(self.table.sequence), None, started)
+            return
+
+        # The new team's slots, free at time zero, can win the first pick
+        # that would otherwise go to a slot that is already busy, or, with
+        # calendars, one whose blackouts held the task past its ready time
+        table = self.table
+        sequence = table.sequence
+        teams = table.resource[sequence]
+        order = np.argsort(teams, kind='stable')
+        free_before = np.zeros(len(sequence), dtype=table.end.dtype)
+        same_team = teams[order][1:] == teams[order][:-1]
+        free_before[order[1:][same_team]] = table.end[sequence[order[:-1][same_team]]]
+        busy = free_before > 0
+        if self.limits is not None and self.limits.calendars is not None:
+            busy |= table.start[sequence] > self._ready_times()[sequence]
+        busy = np.flatnonzero(busy)
+        self._reschedule(int(busy[0]) if busy.size else len(sequence), None, started)
+
+    def snapshot(self) -> tuple:
+        """Capture the schedule state, to restore() if a batch of edits fails."""
+        return copy.deepcopy((self.table, self.graph, self.resources, self.constraints,
+                              self.teams, self.metrics, self.changed, self.limits,
+                              self.critical, self.finish, self.total_duration))
+
+    def restore(self, state: tuple) -> None:
+        """Return to a state captured by snapshot()."""
+        (self.table, self.graph, self.resources, self.constraints, self.teams, self.metrics,
+         self.changed, self.limits, self.critical, self.finish, self.total_duration) = state
+        self.schedule = ScheduleView(self.table, self.teams)
+        self.timeline = None
+
+    def get_schedule(self) -> ScheduleView:
+        """Return the current schedule."""
+        return self.schedule
+
+    def get_timeline(self) -> TimelineIndex:
+        """Return the time index of the current schedule, rebuilt after edits."""
+        if self.timeline is None:
+            self.timeline = TimelineIndex(self.table, self.teams)
+        return self.timeline
+
+    def get_metrics(self) -> Dict:
+        """Return the current metrics."""
+        return self.metrics
+
+    def changed_ids(self) -> List:
+        """Return the ids of the tasks replayed by the last edit."""
+        return self.table.ids[self.changed].tolist()
+
+    def _has_task(self, task_id) -> bool:
+        try:
+            self.table.position(task_id)
+        except KeyError:
+            return False
+        return True
+
+    def _row(self, task_id) -> int:
+        try:
+            return self.table.position(task_id)
+        except KeyError:
+            raise ValueError(f"Unknown task {task_id}")
+
+    def _prerequisites(self, row: int) -> np.ndarray:
+        table = self.table
+        return table.dep_targets[table.dep_offsets[row]:table.dep_offsets[row + 1]]
+
+    def _update_limits(self) -> None:
+        """Spread the constraints over the current rows and teams."""
+        self.limits = ScheduleConstraints.from_dict(
+            self.constraints, self.table, ResourcePool(self.resources).teams)
+
+    def _dispatch_order(self) -> np.ndarray:
+        return self.optimizer._dispatch_order(
+            self.table, self.limits.deadline if self.limits is not None else None)
+
+    def _ready_times(self) -> np.ndarray:
+        """When each task's prerequisites (and release time) let it start."""
+        table = self.table
+        ready = np.zeros(len(table), dtype=np.float64)
+        if self.limits is not None and self.limits.release is not None:
+            ready[:] = self.limits.release
+        owners = np.repeat(np.arange(len(table)), np.diff(table.dep_offsets))
+        np.maximum.at(ready, owners, table.end[table.dep_targets])
+        return ready
+
+    def _first_affected_step(self, row: int, order: np.ndarray) -> int:
+        """Find the first dispatch step that a changed task can alter.
+
+        Before the task becomes ready nothing can change. After that it
+        displaces the first dispatched task that now ranks below it in
+        the dispatch order; if there is none it keeps its old step (or
+        goes last when new).
+        """
+        table = self.table
+        sequence = table.sequence
+        step_of = np.full(len(table), len(sequence), dtype=np.int64)
+        step_of[sequence] = np.arange(len(sequence))
+
+        preds = self._prerequisites(row)
+        ready_step = int(step_of[preds].max()) + 1 if preds.size else 0
+        own_step = int(step_of[row])
+
+        rank = np.empty(len(table), dtype=np.int64)
+        rank[order] = np.arange(len(table))
+        window = sequence[ready_step:own_step]
+        displaced = np.flatnonzero(rank[window] > rank[row])
+        return ready_step + int(displaced[0]) if displaced.size else own_step
+
+    def _reschedule(self, first_step: int, order: Optional[np.ndarray],
+                    started: float) -> None:
+        """Replay dispatch from first_step and refresh slack and metrics.
+
+        order is the table's dispatch order, if the caller has it.
+        """
+        table = self.table
+        self.teams[:] = self.optimizer._assign_resources(
+            table, self.resources, first_step, dispatch=order, limits=self.limits)
+        self.changed = table.sequence[first_step:]
+        self.timeline = None
+        table.slack = self.critical.slack
+
+        # Latest end up to each dispatch step; only the replayed steps change
+        finish = np.maximum.accumulate(table.end[self.changed])
+        if first_step and finish.size:
+            np.maximum(finish, self.finish[first_step - 1], out=finish)
+        self.finish = np.concatenate([self.finish[:first_step], finish])
+
+        self.metrics = self.optimizer._compute_metrics(
+            table, self.resources, self.limits, self.constraints.get('simulation'),
+            totals=(self.finish[-1].item(), self.total_duration))
+        self.metrics['critical_path'] = table.ids[self.critical.path].tolist()
+        self.metrics['critical_path_duration'] = self.critical.length
+        if self.limits is not None:
+            self.metrics['constraints'] = self.limits.report(
+                table, ResourcePool(self.resources).slot_team)
+        self.metrics['processing_time_seconds'] = round(time.time() - started, 2)
+
+
+class SessionStore:
+    """Stored schedules by id, dropped when idle too long or least recently used.
+
+    Each schedule keeps its table, graph and index arrays in memory, so
+    the store holds at most max_sessions of them and forgets any that
+    has not been read or edited for ttl seconds.
+    """
+
+    def __init__(self, max_sessions: int = 100, ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'SessionStore':
+        """Build a store from SESSION_MAX_ENTRIES and SESSION_TTL."""
+        return cls(
+            max_sessions=int(os.getenv('SESSION_MAX_ENTRIES', 100)),
+            ttl=float(os.getenv('SESSION_TTL', 3600))
+        )
+
+    def get(self, schedule_id: str) -> Optional[ScheduleSession]:
+        """Return a stored schedule and mark it used, or None."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(schedule_id)
+            if entry is None:
+                return None
+            self._sessions[schedule_id] = (now, entry[1])
+            self._sessions.move_to_end(schedule_id)
+            return entry[1]
+
+    def put(self, schedule_id: str, session: ScheduleSession) -> None:
+        """Store a schedule, evicting the least recently used beyond the limit."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            self._sessions[schedule_id] = (now, session)
+            self._sessions.move_to_end(schedule_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, schedule_id: str) -> Optional[ScheduleSession]:
+        """Remove and return a stored schedule, or None."""
+        with self._lock:
+            entry = self._sessions.pop(schedule_id, None)
+        return entry[1] if entry is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _expire(self, now: float) -> None:
+        # Entries are in order of last use, so the idle ones come first
+        while self._sessions:
+            used_at, _ = next(iter(self._sessions.values()))
+            if used_at + self.ttl > now:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,183 @@
+"""Monte Carlo estimate of how likely a schedule finishes on time.
+
+Task durations are drawn from lognormal distributions with the planned
+duration as mean and a per-task standard deviation. Each scenario keeps
+the schedule's assignment and order: a task starts once its
+prerequisites and the task before it on its slot have ended, and, on a
+team with a calendar, once its simulated duration fits between the
+team's blackouts, as the allocator places it. Scenarios are columns of a (tasks x samples) matrix, propagated level by level
+through the graph of both kinds of predecessor, a block of samples at
+a time so memory stays bounded whatever the sample count.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.task_table import TaskTable, _segments
+
+# Makespan percentiles reported per simulation
+PERCENTILES = (50, 90, 95, 99)
+
+# Spread assumed for tasks without a given standard deviation (std / mean)
+DEFAULT_CV = 0.2
+
+# Scenarios per run unless requested, fewer for very large tables
+DEFAULT_SAMPLES = 1000
+_DEFAULT_CELLS = 2_000_000
+_MIN_DEFAULT_SAMPLES = 32
+
+# Upper bound on the (tasks x samples) float64 cells held per block
+_BLOCK_CELLS = 8_000_000
+
+
+def default_samples(num_tasks: int) -> int:
+    """Scenario count for a run that did not ask for one."""
+    return int(min(DEFAULT_SAMPLES,
+                   max(_MIN_DEFAULT_SAMPLES, _DEFAULT_CELLS // max(num_tasks, 1))))
+
+
+def _levels(table: TaskTable, pred_offsets: np.ndarray, preds: np.ndarray) -> np.ndarray:
+    """Longest-path depth of each row, visiting rows in dispatch order."""
+    depth = [0] * len(table)
+    offsets = pred_offsets.tolist()
+    targets = preds.tolist()
+    for row in table.sequence.tolist():
+        first, last = offsets[row], offsets[row + 1]
+        if last > first:
+            depth[row] = 1 + max(depth[p] for p in targets[first:last])
+    return np.asarray(depth, dtype=np.int64)
+
+
+def _predecessors(table: TaskTable):
+    """CSR of each row's prerequisites plus the row before it on its slot."""
+    n = len(table)
+    sequence = table.sequence
+    slots = table.resource[sequence]
+    order = np.argsort(slots, kind='stable')
+    same_slot = slots[order][1:] == slots[order][:-1]
+    later = sequence[order[1:][same_slot]]
+    earlier = sequence[order[:-1][same_slot]]
+
+    owners = np.concatenate([np.repeat(np.arange(n), np.diff(table.dep_offsets)), later])
+    preds = np.concatenate([table.dep_targets, earlier])
+    order = np.argsort(owners, kind='stable')
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owners, minlength=n), out=offsets[1:])
+    return offsets, preds[order]
+
+
+def simulate(table: TaskTable, std: np.ndarray, samples: int = 1000, seed: int = 0,
+             release: Optional[np.ndarray] = None,
+             deadline: Optional[np.ndarray] = None,
+             target: Optional[float] = None,
+             calendars: Optional[List] = None,
+             team: Optional[np.ndarray] = None) -> Dict:
+    """Simulate a scheduled table and summarize its makespan distribution.
+
+    Args:
+        table: Scheduled table (start, end, resource and sequence filled)
+        std: Standard deviation of every task's duration (0 keeps it fixed)
+        samples: Number of scenarios
+        seed: Seed of the random generator
+        release: Earliest start per row, if any
+        deadline: Latest end per row (NaN where unset)
+        target: Makespan to finish by when there are no deadlines
+        calendars: ResourceCalendar (or None) per team, if any
+        team: Team of every row, needed with calendars
+
+    Returns:
+        Probability (in percent) that every deadline is met, or that the
+        makespan meets the target, and the mean and percentiles of the
+        simulated makespan. Without deadlines or a target there is nothing
+        to be on time for and the probability is None: the planned
+        makespan itself would be missed by almost any delay.
+    """
+    n = len(table)
+    pred_offsets, preds = _predecessors(table)
+    depth = _levels(table, pred_offsets, preds)
+    by_level = np.argsort(depth, kind='stable')
+    bounds = np.searchsorted(depth[by_level], np.arange(depth.max() + 2))
+    # Each level keeps its rows and a (rows x degree) table of their
+    # predecessors, padded with row n, whose end is always zero
+    levels = []
+    for k in range(len(bounds) - 1):
+        rows = by_level[bounds[k]:bounds[k + 1]]
+        counts = pred_offsets[rows + 1] - pred_offsets[rows]
+        table_of_preds = np.full((len(rows), int(counts.max())), n, dtype=np.int64)
+        table_of_preds[np.arange(len(rows)).repeat(counts),
+                       np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)] = \
+            preds[_segments(pred_offsets, rows)]
+        # Positions within the level of the rows on each calendar
+        blocked = []
+        if calendars is not None:
+            level_team = team[rows]
+            for t, calendar in enumerate(calendars):
+                if calendar is not None and len(calendar):
+                    on_team = np.flatnonzero(level_team == t)
+                    if on_team.size:
+                        blocked.append((on_team, calendar))
+        levels.append((rows, table_of_preds, blocked))
+
+    # Durations are the planned mean times a lognormal factor with mean 1,
+    # so a zero deviation reproduces the plan exactly
+    mean = table.duration.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(np.log1p(np.where(mean > 0, (std / mean) ** 2, 0.0)))
+    sigma_col = sigma.astype(np.float32)[:, None]
+    shift_col = (-sigma ** 2 / 2).astype(np.float32)[:, None]
+
+    limited = None
+    if deadline is not None:
+        limited = np.flatnonzero(~np.isnan(deadline))
+        target = deadline[limited][:, None]
+
+    block = max(1, min(samples, _BLOCK_CELLS // max(n, 1)))
+    makespans = np.empty(samples, dtype=np.float64)
+    on_time = 0
+    for index, first in enumerate(range(0, samples, block)):
+        width = min(block, samples - first)
+        rng = np.random.default_rng([seed, index])
+        end = np.empty((n + 1, width), dtype=np.float64)
+        end[n] = 0.0
+        for rows, table_of_preds, blocked in levels:
+            begin = end[table_of_preds[:, 0]] if table_of_preds.shape[1] else \
+                np.zeros((len(rows), width))
+            for column in range(1, table_of_preds.shape[1]):
+                np.maximum(begin, end[table_of_preds[:, column]], out=begin)
+            if release is not None:
+                np.maximum(begin, release[rows, None], out=begin)
+            factor = rng.standard_normal((len(rows), width), dtype=np.float32)
+            factor *= sigma_col[rows]
+            factor += shift_col[rows]
+            np.exp(factor, out=factor)
+            duration = mean[rows, None] * factor
+            for on_team, calendar in blocked:
+                ready = begin[on_team]
+                # A run that fits no gap keeps its start, as in the allocator
+                start = calendar.earliest_starts(
+                    ready.ravel(), duration[on_team].ravel()).reshape(ready.shape)
+                begin[on_team] = np.where(np.isinf(start), ready, start)
+            end[rows] = begin + duration
+
+        end = end[:n]
+        makespans[first:first + width] = end.max(axis=0)
+        if limited is None:
+            if target is not None:
+                on_time += int((makespans[first:first + width] <= target).sum())
+        elif limited.size:
+            on_time += int((end[limited] <= target).all(axis=0).sum())
+        else:
+            on_time += width
+
+    return {
+        'on_time_probability': round(100.0 * on_time / samples, 2)
+        if limited is not None or target is not None else None,
+        'samples': samples,
+        'target_makespan': target if limited is None else None,
+        'mean_makespan': float(makespans.mean()),
+        'makespan_percentiles': {
+            f'p{q}': float(value)
+            for q, value in zip(PERCENTILES, np.percentile(makespans, PERCENTILES))
+        }
+    }
@@ -0,0 +1,432 @@
+"""Columnar task storage shared by the optimization algorithms."""
+
+from collections.abc import Mapping
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+
+def _id_array(ids: List) -> np.ndarray:
+    """Pack task ids into an array without coercing mixed types to str."""
+    array = np.asarray(ids)
+    if array.ndim != 1 or (array.dtype.kind == 'U' and
+                           not all(isinstance(task_id, str) for task_id in ids)):
+        array = np.empty(len(ids), dtype=object)
+        array[:] = ids
+    return array
+
+
+def _skills_column(skills: Iterable) -> np.ndarray:
+    """Pack per-task required_skills into an object array of tuples."""
+    skills = [tuple(s) if s else () for s in skills]
+    column = np.empty(len(skills), dtype=object)
+    for i, value in enumerate(skills):
+        column[i] = value
+    return column
+
+
+def _segments(offsets: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Return the concatenated CSR positions covered by the given rows."""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+class TaskTable:
+    """Array-backed store for a batch of tasks.
+
+    Each task is a row position. Inputs live in the id, duration and
+    priority columns, dependencies in a CSR pair (dep_offsets, dep_targets)
+    listing each task's prerequisite positions, and the allocator fills the
+    start, end, resource and slack columns plus the dispatch sequence.
+    The optional skills column (an object array of required_skills lists)
+    is None unless some task requires skills.
+    """
+
+    def __init__(self, ids: np.ndarray, duration: np.ndarray, priority: np.ndarray,
+                 dep_offsets: np.ndarray, dep_targets: np.ndarray):
+        n = len(ids)
+        self.ids = ids
+        self.duration = duration
+        self.priority = priority
+        self.dep_offsets = dep_offsets
+        self.dep_targets = dep_targets
+        self.start = np.zeros(n, dtype=duration.dtype)
+        self.end = np.zeros(n, dtype=duration.dtype)
+        self.resource = np.full(n, -1, dtype=np.int32)
+        self.slack = np.zeros(n, dtype=duration.dtype)
+        self.sequence = np.empty(0, dtype=np.int64)
+        self.skills = None
+        self._successors = None
+        self._index = None
+
+    @classmethod
+    def from_dicts(cls, tasks: Sequence[Dict]) -> 'TaskTable':
+        """Build a table from task dictionaries with id, duration, priority."""
+        deps = [t.get('depends_on') or () for t in tasks]
+        return cls.from_columns(
+            [t.get('id') for t in tasks],
+            [t.get('duration', 1) for t in tasks],
+            [t.get('priority', 1) for t in tasks],
+            list(map(len, deps)),
+            list(chain.from_iterable(deps)),
+            [t.get('required_skills') for t in tasks]
+        )
+
+    @classmethod
+    def from_rows(cls, tasks: Iterable[Dict]) -> 'TaskTable':
+        """Build a table from a one-pass iterator of task dictionaries.
+
+        Only the column values are kept, so each task dictionary can be
+        released as soon as it has been read.
+        """
+        ids, durations, priorities, dep_counts, dep_ids, skills = [], [], [], [], [], []
+        for task in tasks:
+            deps = task.get('depends_on') or ()
+            ids.append(task.get('id'))
+            durations.append(task.get('duration', 1))
+            priorities.append(task.get('priority', 1))
+            dep_counts.append(len(deps))
+            dep_ids.extend(deps)
+            skills.append(task.get('required_skills'))
+        return cls.from_columns(ids, durations, priorities, dep_counts, dep_ids, skills)
+
+    @classmethod
+    def from_columns(cls, ids: List, durations: List, priorities: List,
+                     dep_counts: List[int], dep_ids: List,
+                     skills: List = None) -> 'TaskTable':
+        """Build a table from per-column lists and flattened depends_on ids."""
+        n = len(ids)
+        duration = np.asarray(durations)
+        priority = np.asarray(priorities)
+        if duration.dtype.kind not in 'iuf' or priority.dtype.kind not in 'iuf':
+            raise ValueError("Task duration and priority must be numeric")
+
+        dep_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.asarray(dep_counts, dtype=np.int64), out=dep_offsets[1:])
+
+        table = cls(_id_array(ids), duration, priority, dep_offsets,
+                    np.empty(0, dtype=np.int64))
+        if dep_ids:
+            table.dep_targets = table._resolve_dependencies(dep_ids)
+        if skills is not None and any(skills):
+            table.skills = _skills_column(skills)
+        return table
+
+    @classmethod
+    def from_csr(cls, ids, duration: np.ndarray, priority: np.ndarray,
+                 dep_offsets: np.ndarray, dep_targets: np.ndarray,
+                 skills: List = None) -> 'TaskTable':
+        """Build a table from ready-made columns, without per-task objects.
+
+        Dependencies are given as the CSR pair itself, with prerequisite
+        row positions rather than ids, so no id lookup is needed. ids may
+        be an array or a list (e.g. of strings).
+        """
+        if not isinstance(ids, np.ndarray):
+            ids = _id_array(list(ids))
+        n = len(ids)
+        duration = np.asarray(duration)
+        priority = np.asarray(priority)
+        if duration.shape != (n,) or priority.shape != (n,):
+            raise ValueError("Task columns must all have one value per task")
+        if duration.dtype.kind not in 'iuf' or priority.dtype.kind not in 'iuf':
+            raise ValueError("Task duration and priority must be numeric")
+
+        dep_offsets = np.asarray(dep_offsets, dtype=np.int64)
+        dep_targets = np.asarray(dep_targets, dtype=np.int64)
+        if (dep_offsets.shape != (n + 1,) or dep_offsets[0] != 0
+                or dep_offsets[-1] != len(dep_targets) or (np.diff(dep_offsets) < 0).any()):
+            raise ValueError("Dependency offsets do not match the dependency targets")
+        if dep_targets.size and (dep_targets.min() < 0 or dep_targets.max() >= n):
+            raise ValueError("Dependency targets must be task row positions")
+        table = cls(ids, duration, priority, dep_offsets, dep_targets)
+        if skills is not None and any(skills):
+            if len(skills) != n:
+                raise ValueError("Task columns must all have one value per task")
+            table.skills = _skills_column(skills)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getstate__(self) -> Dict:
+        # Lookup caches are cheap to rebuild; keep them out of pickles
+        state = self.__dict__.copy()
+        state['_successors'] = None
+        state['_index'] = None
+        return state
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.dep_targets)
+
+    @property
+    def successors(self):
+        """CSR (offsets, targets) listing each task's dependent positions."""
+        if self._successors is None:
+            n = len(self)
+            owners = np.repeat(np.arange(n), np.diff(self.dep_offsets))
+            order = np.argsort(self.dep_targets, kind='stable')
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.dep_targets, minlength=n), out=offsets[1:])
+            self._successors = (offsets, owners[order])
+        return self._successors
+
+    def position(self, task_id) -> int:
+        """Return the row holding task_id (the last one if ids repeat)."""
+        keys, rows = self._id_index()
+        if isinstance(keys, dict):
+            return keys[task_id]
+        try:
+            k = np.searchsorted(keys, task_id)
+            found = k < len(keys) and keys[k] == task_id
+        except TypeError:
+            found = False
+        if not found:
+            raise KeyError(task_id)
+        return int(rows[k])
+
+    def unique_ids(self) -> List:
+        """Return the distinct task ids in row order."""
+        keys, rows = self._id_index()
+        if isinstance(keys, dict):
+            return list(keys)
+        return self.ids[np.sort(rows)].tolist()
+
+    def take(self, rows: np.ndarray) -> 'TaskTable':
+        """Copy the given rows, in that order, into a new unscheduled table.
+
+        Every prerequisite of a taken row must be taken too, as with the
+        rows of whole connected components.
+        """
+        local = np.full(len(self), -1, dtype=np.int64)
+        local[rows] = np.arange(len(rows))
+        dep_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.diff(self.dep_offsets)[rows], out=dep_offsets[1:])
+        dep_targets = local[self.dep_targets[_segments(self.dep_offsets, rows)]]
+        if (dep_targets < 0).any():
+            raise ValueError("Taken rows depend on rows that were left out")
+        table = TaskTable(self.ids[rows], self.duration[rows], self.priority[rows],
+                          dep_offsets, dep_targets)
+        if self.skills is not None:
+            table.skills = self.skills[rows]
+        return table
+
+    def append(self, task: Dict) -> int:
+        """Append one task row after the existing ones and return its row.
+
+        Dependencies must name tasks already in the table. The successor
+        lists are patched in place rather than rebuilt.
+        """
+        task_id = task.get('id')
+        try:
+            preds = np.asarray([self.position(d) for d in task.get('depends_on') or ()],
+                               dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"Task {task_id} depends on unknown task {e.args[0]}")
+        duration = task.get('duration', 1)
+        priority = task.get('priority', 1)
+        self._promote(duration)
+        if np.asarray(priority).dtype.kind not in 'iuf':
+            raise ValueError("Task duration and priority must be numeric")
+
+        n = len(self)
+        new_id = np.asarray([task_id])
+        if self.ids.dtype != object and new_id.dtype.kind == self.ids.dtype.kind:
+            self.ids = np.concatenate([self.ids, new_id])
+        else:
+            ids = np.empty(n + 1, dtype=object)
+            ids[:n] = self.ids
+            ids[n] = task_id
+            self.ids = ids
+        self.duration = np.append(self.duration, duration)
+        self.priority = np.append(self.priority, priority)
+        self.start = np.append(self.start, 0)
+        self.end = np.append(self.end, 0)
+        self.slack = np.append(self.slack, 0)
+        self.resource = np.append(self.resource, np.int32(-1))
+        self.dep_targets = np.concatenate([self.dep_targets, preds])
+        self.dep_offsets = np.append(self.dep_offsets, len(self.dep_targets))
+        skills = task.get('required_skills')
+        if skills or self.skills is not None:
+            existing = self.skills.tolist() if self.skills is not None else [()] * n
+            self.skills = _skills_column(existing + [skills])
+
+        if self._successors is not None:
+            offsets, targets = self._successors
+            preds = np.sort(preds)
+            targets = np.insert(targets, offsets[preds + 1], n)
+            offsets = offsets + np.searchsorted(preds, np.arange(n + 1), side='left')
+            self._successors = (np.append(offsets, offsets[-1]), targets)
+        self._index = None
+        return n
+
+    def remove(self, row: int) -> None:
+        """Delete a task row that no other task depends on.
+
+        Rows after it shift down by one, keeping their relative order.
+        """
+        offsets, targets = self.successors
+        if offsets[row + 1] > offsets[row]:
+            dependents = self.ids[targets[offsets[row]:offsets[row + 1]]]
+            raise ValueError(
+                f"Task {self.ids[row]} is required by tasks {dependents.tolist()}"
+            )
+
+        keep = np.ones(len(self), dtype=bool)
+        keep[row] = False
+        for column in ('ids', 'duration', 'priority', 'start', 'end', 'resource', 'slack'):
+            setattr(self, column, getattr(self, column)[keep])
+        if self.skills is not None:
+            self.skills = self.skills[keep]
+
+        lo, hi = self.dep_offsets[row], self.dep_offsets[row + 1]
+        dep_targets = np.delete(self.dep_targets, np.arange(lo, hi))
+        self.dep_targets = dep_targets - (dep_targets > row)
+        self.dep_offsets = np.delete(self.dep_offsets, row + 1)
+        self.dep_offsets[row + 1:] -= hi - lo
+
+        removed = targets == row
+        before = np.concatenate([[0], np.cumsum(removed)])
+        offsets = np.delete(offsets - before[offsets], row + 1)
+        targets = targets[~removed]
+        self._successors = (offsets, targets - (targets > row))
+        self.sequence = self.sequence[self.sequence != row]
+        self.sequence -= self.sequence > row
+        self._index = None
+
+    def freeze(self) -> None:
+        """Make every column read-only so the table can be shared safely."""
+        for value in self.__dict__.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    def set_duration(self, row: int, duration) -> None:
+        """Change one task's duration, widening the time columns if needed."""
+        self._promote(duration)
+        self.duration[row] = duration
+
+    def _promote(self, duration) -> None:
+        """Switch the time columns to float when given a fractional duration."""
+        if isinstance(duration, bool) or not isinstance(
+                duration, (int, float, np.integer, np.floating)):
+            raise ValueError("Task duration and priority must be numeric")
+        if isinstance(duration, (float, np.floating)) and self.duration.dtype.kind != 'f':
+            for column in ('duration', 'start', 'end', 'slack'):
+                setattr(self, column, getattr(self, column).astype(np.float64))
+
+    def _id_index(self):
+        """Lazily build the id -> row lookup (sorted keys, or a dict)."""
+        if self._index is None:
+            if self.ids.dtype == object:
+                self._index = ({task_id: i for i, task_id in enumerate(self.ids)}, None)
+            else:
+                order = np.argsort(self.ids, kind='stable')
+                sorted_ids = self.ids[order]
+                last = np.ones(len(order), dtype=bool)
+                last[:-1] = sorted_ids[1:] != sorted_ids[:-1]
+                self._index = (sorted_ids[last], order[last])
+        return self._index
+
+    def _resolve_dependencies(self, dep_ids: List) -> np.ndarray:
+        """Map flattened depends_on ids onto row positions."""
+        keys, rows = self._id_index()
+        if isinstance(keys, dict):
+            targets = np.fromiter((keys.get(d, -1) for d in dep_ids),
+                                  dtype=np.int64, count=len(dep_ids))
+        else:
+            wanted = np.asarray(dep_ids)
+            if wanted.dtype.kind != keys.dtype.kind and not (
+                    wanted.dtype.kind in 'iuf' and keys.dtype.kind in 'iuf'):
+                wanted = _id_array(dep_ids)
+            try:
+                k = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+                targets = np.where(keys[k] == wanted, rows[k], -1).astype(np.int64)
+            except TypeError:
+                lookup = dict(zip(keys.tolist(), rows.tolist()))
+                targets = np.fromiter((lookup.get(d, -1) for d in dep_ids),
+                                      dtype=np.int64, count=len(dep_ids))
+
+        missing = np.flatnonzero(targets < 0)
+        if missing.size:
+            k = int(missing[0])
+            owner = int(np.searchsorted(self.dep_offsets, k, side='right')) - 1
+            raise ValueError(
+                f"Task {self.ids[owner]} depends on unknown task {dep_ids[k]}"
+            )
+        return targets
+
+
+class ScheduleView(Mapping):
+    """Read-only, dict-like view of a scheduled TaskTable keyed by task id.
+
+    Rows are materialized only when accessed, so large schedules cost no
+    per-task objects until they are serialized.
+    """
+
+    def __init__(self, table: TaskTable, teams: List[str]):
+        self.table = table
+        self.teams = teams
+
+    def __getitem__(self, task_id) -> Dict:
+        i = self.table.position(task_id)
+        table = self.table
+        return {
+            'team': self.teams[table.resource[i]],
+            'start': table.start[i].item(),
+            'end': table.end[i].item(),
+            'duration': table.duration[i].item(),
+            'slack': table.slack[i].item()
+        }
+
+    def __iter__(self):
+        return iter(self.table.unique_ids())
+
+    def __len__(self) -> int:
+        return len(self.table.unique_ids())
+
+    def iter_rows(self, batch_size: int = 10000) -> Iterator[Dict]:
+        """Yield one entry per task (with its id), materializing a batch at a time."""
+        table = self.table
+        teams = self.teams
+        for lo in range(0, len(table), batch_size):
+            hi = lo + batch_size
+            columns = zip(
+                table.ids[lo:hi].tolist(), table.resource[lo:hi].tolist(),
+                table.start[lo:hi].tolist(), table.end[lo:hi].tolist(),
+                table.duration[lo:hi].tolist(), table.slack[lo:hi].tolist()
+            )
+            for task_id, resource, start, end, duration, slack in columns:
+                yield {
+                    'id': task_id,
+                    'team': teams[resource],
+                    'start': start,
+                    'end': end,
+                    'duration': duration,
+                    'slack': slack
+                }
+
+    def to_dict(self) -> Dict:
+        """Materialize the full schedule as a plain dict."""
+        table = self.table
+        teams = self.teams
+        columns = zip(
+            table.ids.tolist(), table.resource.tolist(), table.start.tolist(),
+            table.end.tolist(), table.duration.tolist(), table.slack.tolist()
+        )
+        return {
+            task_id: {
+                'team': teams[resource],
+                'start': start,
+                'end': end,
+                'duration': duration,
+                'slack': slack
+            }
+            for task_id, resource, start, end, duration, slack in columns
+        }
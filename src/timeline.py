@@ -0,0 +1,90 @@
+"""Time-based lookups over a computed schedule."""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.task_table import TaskTable
+
+
+class TimelineIndex:
+    """Per-slot sorted intervals of a scheduled TaskTable.
+
+    A slot runs one task at a time, so its tasks sorted by start are
+    sorted by end as well. The tasks running at a time, or overlapping a
+    window, are then one contiguous run found with two binary searches
+    per slot: O(log n + k) for one slot and O(S log n + k) over all S
+    slots. A team with capacity has one run per slot.
+
+    Intervals are half-open, [start, end), so zero-duration tasks run at
+    no point in time but do fall inside a window that holds their time.
+    """
+
+    def __init__(self, table: TaskTable, teams: List[str]):
+        self.table = table
+        self.teams = list(teams)
+        order = np.lexsort((table.end, table.start, table.resource))
+        self.rows = order
+        self.starts = table.start[order]
+        self.ends = table.end[order]
+        self.offsets = np.searchsorted(table.resource[order], np.arange(len(self.teams) + 1))
+        self.team_slots: Dict[str, List[int]] = {}
+        for slot, name in enumerate(self.teams):
+            self.team_slots.setdefault(name, []).append(slot)
+
+    def _slots(self, team: Optional[str]) -> List[int]:
+        if team is None:
+            return range(len(self.teams))
+        if team not in self.team_slots:
+            raise KeyError(team)
+        return self.team_slots[team]
+
+    def _collect(self, slots, start: float, end: float, inclusive: bool) -> np.ndarray:
+        """Rows with end > start and a start before end (or at it if inclusive).
+
+        Windows (not inclusive) also take zero-duration tasks at start.
+        They end at start too, but sort after the slot's other tasks
+        ending there, right before the first row found.
+        """
+        side = 'right' if inclusive else 'left'
+        found = []
+        for slot in slots:
+            lo, hi = self.offsets[slot], self.offsets[slot + 1]
+            first = lo + np.searchsorted(self.ends[lo:hi], start, side='right')
+            if not inclusive:
+                while first > lo and self.starts[first - 1] == start:
+                    first -= 1
+            last = lo + np.searchsorted(self.starts[lo:hi], end, side=side)
+            if last > first:
+                found.append(self.rows[first:last])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate(found)
+        return rows[np.argsort(self.table.start[rows], kind='stable')]
+
+    def at(self, time: float, team: str = None) -> np.ndarray:
+        """Rows of the tasks running at time, on one team or on all."""
+        return self._collect(self._slots(team), time, time, inclusive=True)
+
+    def overlapping(self, start: float, end: float, team: str = None) -> np.ndarray:
+        """Rows of the tasks overlapping the window [start, end)."""
+        if end < start:
+            raise ValueError("A window must not end before it starts")
+        return self._collect(self._slots(team), start, end, inclusive=False)
+
+    def team(self, team: str) -> np.ndarray:
+        """Rows of all tasks of a team, by start time."""
+        slots = self._slots(team)
+        rows = np.concatenate([self.rows[self.offsets[s]:self.offsets[s + 1]] for s in slots])
+        return rows[np.argsort(self.table.start[rows], kind='stable')]
+
+    def entries(self, rows: np.ndarray) -> List[Dict]:
+        """Schedule entries (with ids) of the given rows."""
+        table = self.table
+        teams = self.teams
+        return [
+            {'id': task_id, 'team': teams[slot], 'start': start, 'end': end}
+            for task_id, slot, start, end in zip(
+                table.ids[rows].tolist(), table.resource[rows].tolist(),
+                table.start[rows].tolist(), table.end[rows].tolist())
+        ]
@@ -0,0 +1,147 @@
+"""Wire formats for optimization requests and responses.
+
+Besides JSON there are two: NDJSON, streamed one task per line, and
+msgpack with the task and schedule columns as packed binary arrays.
+"""
+
+import json
+from typing import Dict, IO, Iterator, Tuple
+
+import msgpack
+import numpy as np
+
+from src.task_table import TaskTable
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+
+def _ndjson_records(stream: IO[bytes]) -> Iterator[Dict]:
+    """Decode one JSON object per non-blank line of a byte stream."""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on NDJSON line {number}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"NDJSON line {number} is not an object")
+        yield record
+
+
+def read_ndjson(stream: IO[bytes]) -> Tuple[Dict, TaskTable]:
+    """Parse an NDJSON optimization request incrementally.
+
+    The first line is a header with "resources" (and optional
+    "constraints"); every following line is one task. Tasks go straight
+    into column storage, so the raw text and per-task dicts are never held
+    in memory all at once.
+    """
+    records = _ndjson_records(stream)
+    header = next(records, None)
+    if header is None or 'resources' not in header:
+        raise ValueError("The first NDJSON line must hold the resources")
+    return header, TaskTable.from_rows(records)
+
+
+def write_ndjson(result, batch_size: int = 10000) -> Iterator[str]:
+    """Stream schedule rows as NDJSON, then a final metrics trailer line."""
+    rows = []
+    for row in result.schedule.iter_rows(batch_size):
+        rows.append(json.dumps(row))
+        if len(rows) == batch_size:
+            yield '\n'.join(rows) + '\n'
+            rows = []
+    if rows:
+        yield '\n'.join(rows) + '\n'
+    yield json.dumps({'metrics': dict(result.metrics)}) + '\n'
+
+
+def _pack_array(array: np.ndarray):
+    """Encode a numeric column as little-endian raw bytes, others as a list."""
+    if array.dtype.kind not in 'iuf':
+        return array.tolist()
+    dtype = array.dtype.newbyteorder('<')
+    return {'dtype': dtype.str, 'data': np.ascontiguousarray(array, dtype=dtype).tobytes()}
+
+
+def _unpack_array(value, name: str, ids: bool = False) -> np.ndarray:
+    """Decode a packed column without copying; ids may also be a plain list."""
+    if isinstance(value, dict):
+        try:
+            dtype = np.dtype(value['dtype'])
+            data = value['data']
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Column {name} is not a packed array: {e}")
+        if dtype.kind not in 'iuf' or not isinstance(data, bytes) or len(data) % dtype.itemsize:
+            raise ValueError(f"Column {name} is not a packed numeric array")
+        return np.frombuffer(data, dtype=dtype)
+    if ids and isinstance(value, list):
+        return value
+    raise ValueError(f"Column {name} must be a packed array")
+
+
+def read_msgpack(body: bytes) -> Tuple[Dict, TaskTable]:
+    """Parse a msgpack optimization request straight into a TaskTable.
+
+    The body is a map with "resources", optional "constraints" and a
+    "tasks" map of columns: "id", "duration", "priority", "dep_offsets"
+    and "dep_targets" (CSR prerequisites as row positions), plus an
+    optional "required_skills" list. Numeric columns are maps of a NumPy
+    dtype string and the raw little-endian bytes, which become table
+    columns without per-task objects; "id" may also be a list.
+    """
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ValueError(f"Invalid msgpack body: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('tasks'), dict):
+        raise ValueError("A msgpack body needs a tasks map of columns")
+
+    columns = data['tasks']
+    if 'id' not in columns:
+        raise ValueError("Column id is required")
+    ids = _unpack_array(columns['id'], 'id', ids=True)
+    n = len(ids)
+    ones = np.ones(n, dtype=np.int64)
+    duration = _unpack_array(columns['duration'], 'duration') if 'duration' in columns else ones
+    priority = _unpack_array(columns['priority'], 'priority') if 'priority' in columns else ones
+    if 'dep_offsets' in columns:
+        dep_offsets = _unpack_array(columns['dep_offsets'], 'dep_offsets')
+        dep_targets = _unpack_array(columns.get('dep_targets'), 'dep_targets')
+    else:
+        dep_offsets = np.zeros(n + 1, dtype=np.int64)
+        dep_targets = np.empty(0, dtype=np.int64)
+
+    table = TaskTable.from_csr(ids, duration, priority, dep_offsets, dep_targets,
+                               columns.get('required_skills'))
+    header = {key: value for key, value in data.items() if key != 'tasks'}
+    return header, table
+
+
+def write_msgpack(result) -> bytes:
+    """Encode a result as a msgpack map with the schedule as columns.
+
+    "schedule" holds the id, start, end, duration and slack columns and
+    a "team" column of positions into its "teams" list, next to
+    "metrics".
+    """
+    table = result.schedule.table
+    return msgpack.packb({
+        'status': 'success',
+        'schedule': {
+            'id': _pack_array(table.ids),
+            'team': _pack_array(table.resource),
+            'teams': list(result.schedule.teams),
+            'start': _pack_array(table.start),
+            'end': _pack_array(table.end),
+            'duration': _pack_array(table.duration),
+            'slack': _pack_array(table.slack)
+        },
+        'metrics': dict(result.metrics)
+    }, default=str)
+
+
+def msgpack_error(message: str) -> bytes:
+    return msgpack.packb({'status': 'error', 'message': message})
@@ -0,0 +1,283 @@
+"""Tests for the REST API."""
+
+import json
+
+import msgpack
+import numpy as np
+import pytest
+
+from app import app
+from src.optimizer import TaskOptimizer
+from src.wire import MSGPACK_MIMETYPE, write_ndjson
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+TASKS = [
+    {'id': 1, 'duration': 4, 'priority': 2},
+    {'id': 2, 'duration': 3, 'depends_on': [1]},
+    {'id': 3, 'duration': 5}
+]
+
+
+def _create_schedule(client):
+    response = client.post('/api/schedules', json={'tasks': TASKS, 'resources': ['a', 'b']})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_patch_with_invalid_operation_leaves_schedule_unchanged(client):
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}"
+
+    response = client.patch(url, json={'operations': [
+        {'op': 'update_duration', 'id': 1, 'duration': 10},
+        {'op': 'remove_task', 'id': 99}
+    ]})
+
+    assert response.status_code == 400
+    current = client.get(url).get_json()
+    assert current['optimized_schedule'] == created['optimized_schedule']
+    assert current['metrics'] == created['metrics']
+
+
+def test_patch_with_unknown_operation_applies_nothing(client):
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}"
+
+    response = client.patch(url, json={'operations': [
+        {'op': 'update_duration', 'id': 1, 'duration': 10},
+        {'op': 'rename_task', 'id': 1}
+    ]})
+
+    assert response.status_code == 400
+    assert client.get(url).get_json()['optimized_schedule'] == created['optimized_schedule']
+
+
+def test_patch_applies_valid_operations(client):
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}"
+
+    response = client.patch(url, json={'operations': [
+        {'op': 'update_duration', 'id': 1, 'duration': 10}
+    ]})
+
+    assert response.status_code == 200
+    assert client.get(url).get_json()['optimized_schedule']['1']['end'] == 10
+
+
+def test_edits_match_a_fresh_optimization(client, monkeypatch):
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '0')
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}"
+
+    response = client.patch(url, json={'operations': [
+        {'op': 'add_task', 'task': {'id': 4, 'duration': 6, 'depends_on': [2]}},
+        {'op': 'update_duration', 'id': 3, 'duration': 1},
+        {'op': 'remove_task', 'id': 4},
+        {'op': 'add_task', 'task': {'id': 5, 'duration': 2, 'depends_on': [1, 3]}}
+    ]})
+    assert response.status_code == 200
+
+    tasks = [
+        {'id': 1, 'duration': 4, 'priority': 2},
+        {'id': 2, 'duration': 3, 'depends_on': [1]},
+        {'id': 3, 'duration': 1},
+        {'id': 5, 'duration': 2, 'depends_on': [1, 3]}
+    ]
+    fresh = client.post('/api/optimize', json={'tasks': tasks, 'resources': ['a', 'b'],
+                                               'constraints': {}}).get_json()
+    current = client.get(url).get_json()
+    assert current['optimized_schedule'] == fresh['optimized_schedule']
+    for key in ('critical_path', 'critical_path_duration', 'total_project_duration',
+                'total_task_duration', 'resource_utilization'):
+        assert current['metrics'][key] == fresh['metrics'][key]
+
+
+def test_schedule_keeps_its_constraints(client):
+    tasks = [{'id': 1, 'duration': 4}, {'id': 2, 'duration': 3}]
+    response = client.post('/api/schedules', json={
+        'tasks': tasks, 'resources': ['a'],
+        'constraints': {'release_times': {'1': 5}, 'deadlines': {'2': 2}}
+    })
+    assert response.status_code == 201
+    created = response.get_json()
+    assert created['optimized_schedule']['1']['start'] == 5
+    assert created['metrics']['constraints']['infeasible_tasks'] == 1
+
+    url = f"/api/schedules/{created['schedule_id']}"
+    response = client.patch(url, json={'operations': [
+        {'op': 'update_duration', 'id': 2, 'duration': 1}
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['metrics']['constraints']['infeasible_tasks'] == 0
+    assert client.get(url).get_json()['optimized_schedule']['1']['start'] == 5
+
+
+def test_unsupported_schedule_constraints_are_rejected(client):
+    response = client.post('/api/schedules', json={
+        'tasks': [{'id': 1, 'duration': 1}], 'resources': ['a'],
+        'constraints': {'time_budget': 1}
+    })
+    assert response.status_code == 400
+
+
+def test_session_store_evicts_idle_and_least_recently_used(monkeypatch):
+    from src import session as session_module
+    clock = [1000.0]
+    monkeypatch.setattr(session_module.time, 'time', lambda: clock[0])
+    store = session_module.SessionStore(max_sessions=2, ttl=60)
+
+    store.put('a', 'first')
+    store.put('b', 'second')
+    assert store.get('a') == 'first'
+    store.put('c', 'third')
+    assert store.get('b') is None
+    assert store.get('a') == 'first'
+
+    clock[0] += 61
+    assert store.get('a') is None
+    assert len(store) == 0
+    assert store.evictions == 3
+
+
+def test_ndjson_request_streams_schedule_and_metrics(client):
+    body = '\n'.join(json.dumps(line) for line in [{'resources': ['a', 'b']}, *TASKS]) + '\n'
+
+    response = client.post('/api/optimize', data=body, content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    expected = client.post('/api/optimize', json={'tasks': TASKS, 'resources': ['a', 'b']})
+    expected = expected.get_json()
+    rows = {str(row.pop('id')): row for row in lines[:-1]}
+    assert rows == expected['optimized_schedule']
+    assert lines[-1]['metrics']['total_tasks'] == 3
+
+
+def test_ndjson_schedule_is_written_in_batches():
+    result = TaskOptimizer().optimize(TASKS, ['a', 'b'])
+
+    chunks = list(write_ndjson(result, batch_size=2))
+
+    assert [chunk.count('\n') for chunk in chunks] == [2, 1, 1]
+    assert 'metrics' in json.loads(chunks[-1])
+
+
+def test_ndjson_request_with_a_bad_line_is_rejected(client):
+    body = json.dumps({'resources': ['a']}) + '\n{"id": 1,\n'
+
+    response = client.post('/api/optimize', data=body, content_type='application/x-ndjson')
+
+    assert response.status_code == 400
+    assert 'line 2' in response.get_json()['message']
+
+
+def _packed(values, dtype):
+    return {'dtype': np.dtype(dtype).str, 'data': np.asarray(values, dtype=dtype).tobytes()}
+
+
+def _msgpack_request():
+    """TASKS as packed columns; task 2 depends on row 0 (task 1)."""
+    return msgpack.packb({
+        'resources': ['a', 'b'],
+        'tasks': {
+            'id': _packed([1, 2, 3], '<i8'),
+            'duration': _packed([4, 3, 5], '<i8'),
+            'priority': _packed([2, 1, 1], '<i8'),
+            'dep_offsets': _packed([0, 0, 1, 1], '<i8'),
+            'dep_targets': _packed([0], '<i8')
+        }
+    })
+
+
+def _unpacked(column):
+    return np.frombuffer(column['data'], dtype=column['dtype']).tolist()
+
+
+def test_msgpack_round_trip_matches_json(client):
+    expected = client.post('/api/optimize', json={'tasks': TASKS, 'resources': ['a', 'b']})
+    expected = expected.get_json()['optimized_schedule']
+
+    response = client.post('/api/optimize', data=_msgpack_request(),
+                           content_type=MSGPACK_MIMETYPE,
+                           headers={'Accept': MSGPACK_MIMETYPE})
+
+    assert response.status_code == 200
+    assert response.mimetype == MSGPACK_MIMETYPE
+    body = msgpack.unpackb(response.get_data(), raw=False)
+    schedule = body['schedule']
+    columns = {name: _unpacked(schedule[name])
+               for name in ('id', 'team', 'start', 'end', 'duration', 'slack')}
+    rows = {
+        str(task_id): {'team': schedule['teams'][team], 'start': start, 'end': end,
+                       'duration': duration, 'slack': slack}
+        for task_id, team, start, end, duration, slack in zip(*columns.values())
+    }
+    assert rows == expected
+    assert body['metrics']['total_tasks'] == 3
+
+
+def test_msgpack_request_gets_json_by_default(client):
+    response = client.post('/api/optimize', data=_msgpack_request(),
+                           content_type=MSGPACK_MIMETYPE)
+
+    assert response.status_code == 200
+    assert response.get_json()['optimized_schedule']['2']['start'] == 4
+
+
+def test_bad_msgpack_request_is_rejected_in_msgpack(client):
+    response = client.post('/api/optimize', data=b'\xc1', content_type=MSGPACK_MIMETYPE,
+                           headers={'Accept': MSGPACK_MIMETYPE})
+
+    assert response.status_code == 400
+    body = msgpack.unpackb(response.get_data(), raw=False)
+    assert body['status'] == 'error'
+    assert 'Invalid msgpack body' in body['message']
+
+
+def test_schedule_queries(client):
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}/query"
+    schedule = created['optimized_schedule']
+
+    running = client.get(url, query_string={'at': 4}).get_json()
+    assert running['count'] == 2
+    assert {task['id'] for task in running['tasks']} == {2, 3}
+
+    window = client.get(url, query_string={'start': 0, 'end': 5, 'limit': 1}).get_json()
+    assert window['count'] == 3
+    assert [task['id'] for task in window['tasks']] == [1]
+
+    team = schedule['1']['team']
+    on_team = client.get(url, query_string={'team': team}).get_json()
+    assert [task['id'] for task in on_team['tasks']] == \
+        sorted((int(task_id) for task_id, entry in schedule.items() if entry['team'] == team),
+               key=lambda task_id: schedule[str(task_id)]['start'])
+
+
+def test_schedule_queries_follow_edits(client):
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}"
+    assert client.get(f'{url}/query', query_string={'at': 9.5}).get_json()['count'] == 0
+
+    client.patch(url, json={'operations': [{'op': 'update_duration', 'id': 2, 'duration': 6}]})
+
+    assert [task['id'] for task in
+            client.get(f'{url}/query', query_string={'at': 9.5}).get_json()['tasks']] == [2]
+
+
+def test_bad_schedule_queries(client):
+    created = _create_schedule(client)
+    url = f"/api/schedules/{created['schedule_id']}/query"
+
+    assert client.get(url, query_string={'team': 'nobody'}).status_code == 404
+    assert client.get(url).status_code == 400
+    assert client.get(url, query_string={'start': 5, 'end': 1}).status_code == 400
+    assert client.get('/api/schedules/missing/query', query_string={'at': 0}).status_code == 404
@@ -0,0 +1,72 @@
+"""Tests for the optimization result cache."""
+
+from src.cache import ScheduleCache, schedule_key
+from src.optimizer import TaskOptimizer
+
+TASKS = [
+    {'id': 1, 'duration': 3, 'priority': 2},
+    {'id': 2, 'duration': 2, 'depends_on': [1]},
+    {'id': 3, 'duration': 4}
+]
+RESOURCES = ['a', 'b']
+
+
+def test_disk_cache_serves_results_to_another_cache(tmp_path):
+    key = schedule_key(TASKS, RESOURCES)
+    writer = TaskOptimizer(cache=ScheduleCache(directory=str(tmp_path)))
+    result = writer.optimize(TASKS, RESOURCES)
+
+    assert list(tmp_path.glob('*.pkl'))
+    cached = ScheduleCache(directory=str(tmp_path)).get(key)
+    assert cached is not None
+    assert cached.schedule.to_dict() == result.schedule.to_dict()
+    assert dict(cached.metrics) == dict(result.metrics)
+
+
+def test_disk_cache_keeps_unpicklable_values_in_memory(tmp_path):
+    cache = ScheduleCache(directory=str(tmp_path))
+    value = lambda: None
+
+    cache.put('key', value)
+
+    assert cache.get('key') is value
+    assert not list(tmp_path.iterdir())
+
+
+def test_key_ignores_task_and_dependency_order():
+    tasks = [
+        {'id': 3, 'duration': 4},
+        {'id': 2, 'duration': 2, 'depends_on': [3, 1]},
+        {'id': 1, 'duration': 3, 'priority': 2}
+    ]
+    reordered = [
+        {'priority': 2, 'duration': 3, 'id': 1},
+        {'id': 2, 'duration': 2, 'depends_on': [1, 3]},
+        {'id': 3, 'duration': 4}
+    ]
+    assert schedule_key(tasks, RESOURCES) == schedule_key(reordered, RESOURCES)
+
+    changed = [dict(task) for task in reordered]
+    changed[1]['duration'] = 5
+    assert schedule_key(changed, RESOURCES) != schedule_key(reordered, RESOURCES)
+    assert schedule_key(tasks, RESOURCES[::-1]) != schedule_key(tasks, RESOURCES)
+    assert schedule_key(tasks, RESOURCES, {'deadline': 9}) != schedule_key(tasks, RESOURCES)
+
+
+def test_key_covers_string_and_mixed_ids_and_skills():
+    named = [{'id': 'b', 'duration': 1, 'depends_on': ['a']}, {'id': 'a', 'duration': 2}]
+    mixed = [{'id': 'b', 'duration': 1, 'depends_on': [1]}, {'id': 1, 'duration': 2}]
+    skilled = [{'id': 1, 'duration': 2, 'required_skills': ['x']}]
+
+    assert schedule_key(named, RESOURCES) == schedule_key(named[::-1], RESOURCES)
+    assert schedule_key(mixed, RESOURCES) == schedule_key(mixed[::-1], RESOURCES)
+    assert schedule_key(skilled, RESOURCES) != \
+        schedule_key([{'id': 1, 'duration': 2}], RESOURCES)
+
+
+def test_cache_hit_returns_the_stored_result():
+    optimizer = TaskOptimizer(cache=ScheduleCache())
+    first = optimizer.optimize(TASKS, RESOURCES)
+
+    assert optimizer.optimize(list(reversed(TASKS)), RESOURCES) is first
+    assert optimizer.cache.stats()['hits'] == 1
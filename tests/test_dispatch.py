@@ -0,0 +1,121 @@
+"""Tests for the dispatch rule registry and rule portfolios."""
+
+import numpy as np
+import pytest
+
+from src.dispatch import DISPATCH_RULES, dispatch_order, dispatch_rule
+from src.optimizer import TaskOptimizer
+from src.task_table import TaskTable
+
+# Independent tasks with ties in both priority and duration
+TASKS = [
+    {'id': 'a', 'duration': 4, 'priority': 1},
+    {'id': 'b', 'duration': 2, 'priority': 3},
+    {'id': 'c', 'duration': 4, 'priority': 2},
+    {'id': 'd', 'duration': 1, 'priority': 1},
+    {'id': 'e', 'duration': 2, 'priority': 1}
+]
+
+
+def _order(rule, tasks=TASKS, deadline=None):
+    table = TaskTable.from_dicts(tasks)
+    return table.ids[dispatch_order(rule, table, deadline=deadline)].tolist()
+
+
+def test_every_rule_ranks_every_task_once():
+    for rule in DISPATCH_RULES:
+        assert sorted(_order(rule)) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_priority_rule():
+    assert _order('priority') == ['b', 'c', 'd', 'e', 'a']
+    # Earliest deadline first within a priority level
+    deadline = np.array([5.0, np.nan, np.nan, 9.0, np.nan])
+    assert _order('priority', deadline=deadline) == ['b', 'c', 'a', 'd', 'e']
+
+
+def test_processing_time_rules():
+    assert _order('spt') == ['d', 'b', 'e', 'c', 'a']
+    assert _order('lpt') == ['c', 'a', 'b', 'e', 'd']
+
+
+def test_critical_ratio_rule():
+    # The chain s -> t is the project's length, 10; u has work 3 of it
+    tasks = [
+        {'id': 'u', 'duration': 3},
+        {'id': 't', 'duration': 8, 'depends_on': ['s']},
+        {'id': 's', 'duration': 2},
+        {'id': 'v', 'duration': 0}
+    ]
+    assert _order('critical_ratio', tasks) == ['s', 't', 'u', 'v']
+    # Due at 2 with work 3 left, u becomes the most critical
+    deadline = np.array([2.0, np.nan, np.nan, np.nan])
+    assert _order('critical_ratio', tasks, deadline) == ['u', 's', 't', 'v']
+
+
+def test_most_successors_rule():
+    tasks = [
+        {'id': 'x', 'duration': 1},
+        {'id': 'y', 'duration': 3},
+        {'id': 'z', 'duration': 2},
+        {'id': 'p', 'duration': 1, 'depends_on': ['y', 'z']},
+        {'id': 'q', 'duration': 1, 'depends_on': ['y']}
+    ]
+    assert _order('most_successors', tasks) == ['y', 'z', 'x', 'p', 'q']
+
+
+def test_weighted_priority_rule():
+    tasks = [*TASKS, {'id': 'f', 'duration': 0, 'priority': 1}]
+    # Weights 0.25, 1.5, 0.5, 1, 0.5 and inf for the zero-duration task
+    assert _order('weighted_priority', tasks) == ['f', 'b', 'd', 'e', 'c', 'a']
+
+
+def test_unknown_rule_is_rejected():
+    table = TaskTable.from_dicts(TASKS)
+    with pytest.raises(ValueError, match='Unknown dispatch rule'):
+        dispatch_order('fifo', table)
+    for dispatch in ('fifo', ['spt', 'fifo']):
+        with pytest.raises(ValueError, match='Unknown dispatch rule'):
+            TaskOptimizer().optimize(TASKS, ['x'], {'dispatch': dispatch})
+
+
+def test_registered_rule_is_used_by_name(monkeypatch):
+    monkeypatch.setitem(DISPATCH_RULES, 'last_first', None)
+
+    @dispatch_rule('last_first')
+    def last_first(table, graph=None, deadline=None):
+        return np.arange(len(table))[::-1]
+
+    schedule = TaskOptimizer().optimize(TASKS, ['x'], {'dispatch': 'last_first'}).schedule
+    assert sorted(schedule, key=lambda task_id: schedule[task_id]['start']) == \
+        ['e', 'd', 'c', 'b', 'a']
+
+
+def test_portfolio_keeps_the_best_rule(monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    # On two teams, longest first balances the load: makespan 5, not 7
+    tasks = [{'id': i, 'duration': duration} for i, duration in enumerate([1, 1, 2, 2, 4])]
+    result = TaskOptimizer().optimize(tasks, ['x', 'y'],
+                                      {'dispatch': ['spt', 'lpt'], 'workers': 2})
+
+    portfolio = result.metrics['dispatch']
+    assert portfolio == {'rule': 'lpt', 'workers': 2,
+                         'scores': {'spt': {'makespan': 7}, 'lpt': {'makespan': 5}}}
+    assert result.metrics['total_project_duration'] == 5
+    single = TaskOptimizer().optimize(tasks, ['x', 'y'], {'dispatch': 'lpt'})
+    assert result.schedule.to_dict() == single.schedule.to_dict()
+    assert 'dispatch' not in single.metrics
+
+
+def test_portfolio_of_all_rules_prefers_met_deadlines():
+    constraints = {'dispatch': 'all', 'workers': 1, 'deadlines': {'c': 4}}
+    portfolio = TaskOptimizer().optimize(TASKS, ['x'], constraints).metrics['dispatch']
+
+    assert list(portfolio['scores']) == list(DISPATCH_RULES)
+    assert portfolio['workers'] == 1
+    # Only rules that run c first meet its deadline; on one team every
+    # makespan is the same, so the first of them listed wins
+    missed = {rule: score['missed_deadlines'] for rule, score in portfolio['scores'].items()}
+    assert missed == {'priority': 1, 'spt': 1, 'lpt': 0, 'critical_ratio': 0,
+                      'most_successors': 1, 'weighted_priority': 1}
+    assert portfolio['rule'] == 'lpt'
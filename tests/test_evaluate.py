@@ -0,0 +1,37 @@
+"""Tests for model evaluation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from evaluate import TARGET, evaluate_chunked, evaluate_model, load_model
+from train import save_model
+
+
+def test_whole_and_chunked_evaluation_agree_on_missing_values(tmp_path):
+    rng = np.random.default_rng(0)
+    columns = ['size', 'team_load', 'complexity']
+    X = pd.DataFrame(rng.random((300, 3)), columns=columns)
+    y = 4 * X['size'] + X['complexity'] + rng.normal(0, 0.1, 300)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0)
+    model.fit(scaler.transform(X), y)
+    model_path = str(tmp_path / 'trained_model.pkl')
+    save_model(model, scaler, model_path)
+
+    test = pd.DataFrame(rng.random((120, 3)), columns=columns)
+    test[TARGET] = 4 * test['size'] + test['complexity']
+    test.loc[rng.random(120) < 0.3, 'size'] = np.nan
+    test.loc[::7, 'complexity'] = np.nan
+    test_path = str(tmp_path / 'test_data.csv')
+    test.to_csv(test_path, index=False)
+
+    loaded, loaded_scaler = load_model(model_path)
+    whole, _ = evaluate_model(loaded, loaded_scaler, test.drop(TARGET, axis=1), test[TARGET])
+    chunked = evaluate_chunked(test_path, model_path, chunksize=50, workers=1, replicates=0)
+
+    assert chunked['n_samples'] == 120
+    for name in ('MSE', 'MAE', 'RMSE', 'R2_Score'):
+        assert chunked[name] == pytest.approx(whole[name], rel=1e-9)
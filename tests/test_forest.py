@@ -0,0 +1,69 @@
+"""Tests for the flat forest export."""
+
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src.forest import FlatForest, export_forest
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 4)).astype(np.float32)
+    y = 3 * X[:, 0] + X[:, 1] ** 2 + rng.normal(0, 0.1, 400)
+    X[rng.random(X.shape) < 0.15] = np.nan
+    return X, y
+
+
+def _export(model, tmp_path):
+    export_forest(model, str(tmp_path))
+    return FlatForest.load(str(tmp_path))
+
+
+def test_predictions_match_sklearn_with_missing_values(data, tmp_path):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
+    forest = _export(model, tmp_path)
+
+    rng = np.random.default_rng(1)
+    queries = rng.random((300, 4)).astype(np.float32)
+    queries[rng.random(queries.shape) < 0.3] = np.nan
+    queries[0] = np.nan
+
+    np.testing.assert_allclose(forest.predict(queries), model.predict(queries))
+    np.testing.assert_allclose(forest.predict(queries, batch_size=7), model.predict(queries))
+
+
+def test_features_without_missing_training_values_route_like_sklearn(tmp_path):
+    rng = np.random.default_rng(2)
+    X = rng.random((300, 3))
+    y = X[:, 0] * 5 + X[:, 2]
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    forest = _export(model, tmp_path)
+
+    queries = rng.random((100, 3))
+    queries[::3, 0] = np.nan
+
+    np.testing.assert_allclose(forest.predict(queries), model.predict(queries))
+
+
+def test_infinite_features_are_rejected(data, tmp_path):
+    X, y = data
+    forest = _export(RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y), tmp_path)
+
+    with pytest.raises(ValueError, match='infinity'):
+        forest.predict(np.array([[np.inf, 0.5, 0.5, 0.5]]))
+
+
+def test_exports_without_missing_routing_reject_nan(data, tmp_path):
+    X, y = data
+    forest = _export(RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y), tmp_path)
+    os.remove(tmp_path / 'missing_left.npy')
+    forest = FlatForest.load(str(tmp_path))
+
+    assert forest.predict(np.full((1, 4), 0.5)).shape == (1,)
+    with pytest.raises(ValueError, match='NaN'):
+        forest.predict(np.array([[np.nan, 0.5, 0.5, 0.5]]))
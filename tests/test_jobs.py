@@ -0,0 +1,74 @@
+"""Tests for background optimization jobs."""
+
+import time
+
+import pytest
+
+from src.jobs import JobQueue, JobStore, run_job
+
+TASKS = [
+    {'id': 1, 'duration': 4, 'priority': 2},
+    {'id': 2, 'duration': 3, 'depends_on': [1]},
+    {'id': 3, 'duration': 5}
+]
+
+
+def _wait(queue, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} still {job["status"]}')
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    queue = JobQueue(JobStore(str(tmp_path / 'jobs.sqlite3')))
+    yield queue
+    queue.pool.shutdown()
+
+
+def test_job_runs_to_a_result(queue):
+    # The job holds one pool worker, so its search runs serially in it
+    job_id = queue.submit({'tasks': TASKS, 'resources': ['a', 'b'],
+                           'constraints': {'time_budget': 0.05, 'workers': 4}})
+    assert queue.status(job_id)['status'] in ('queued', 'running', 'succeeded')
+
+    job = _wait(queue, job_id)
+
+    assert job['status'] == 'succeeded'
+    assert job['progress'] == 1.0
+    result = queue.result(job_id)['result']
+    assert set(result['optimized_schedule']) == {'1', '2', '3'}
+    assert result['metrics']['total_project_duration'] == 7
+    assert result['metrics']['search']['workers'] == 1
+
+
+def test_failed_job_keeps_its_error(queue):
+    cyclic = [{'id': 1, 'duration': 1, 'depends_on': [2]},
+              {'id': 2, 'duration': 1, 'depends_on': [1]}]
+    job_id = queue.submit({'tasks': cyclic, 'resources': ['a']})
+
+    job = _wait(queue, job_id)
+
+    assert job['status'] == 'failed'
+    assert 'cycle' in job['error']
+    assert queue.result(job_id)['result'] is None
+
+
+def test_job_requests_need_tasks_and_resources(queue):
+    with pytest.raises(ValueError):
+        queue.submit({'tasks': TASKS, 'resources': []})
+
+
+def test_cancelled_job_is_not_run(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    job_id = store.create({'tasks': TASKS, 'resources': ['a']})
+
+    assert store.cancel(job_id) == 'cancelled'
+    assert run_job(store.path, job_id) == 'skipped'
+    assert store.get(job_id)['status'] == 'cancelled'
+    assert store.cancel('missing') is None
@@ -0,0 +1,383 @@
+"""Tests for the optimizer's resource allocation."""
+
+import pickle
+import random
+import time
+from operator import itemgetter
+
+import pytest
+
+from src import optimizer as optimizer_module
+from src.constraints import ResourceCalendar
+from src.optimizer import TaskOptimizer
+
+
+def _reference_schedule(tasks, resources):
+    """The original allocator: sort, then scan every resource per task."""
+    ordered = sorted(tasks, key=lambda t: (-t.get('priority', 1), t.get('duration', 1)))
+    schedule = {}
+    resource_end_times = {resource: 0 for resource in resources}
+    for task in ordered:
+        best_resource = min(resource_end_times, key=resource_end_times.get)
+        start_time = resource_end_times[best_resource]
+        end_time = start_time + task.get('duration', 1)
+        schedule[task['id']] = {'team': best_resource, 'start': start_time, 'end': end_time}
+        resource_end_times[best_resource] = end_time
+    return schedule
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_heap_allocator_matches_reference_scan(seed):
+    rng = random.Random(seed)
+    num_tasks = rng.randint(1, 300)
+    num_resources = rng.randint(1, 40)
+    # Narrow ranges make equal priorities, durations and end times common
+    tasks = [
+        {'id': i, 'duration': rng.randint(0, 6), 'priority': rng.randint(1, 3)}
+        for i in range(num_tasks)
+    ]
+    resources = [f'team_{k}' for k in range(num_resources)]
+
+    result = TaskOptimizer().optimize(tasks, resources)
+
+    expected = _reference_schedule(tasks, resources)
+    actual = {
+        task_id: {'team': entry['team'], 'start': entry['start'], 'end': entry['end']}
+        for task_id, entry in result.schedule.to_dict().items()
+    }
+    assert actual == expected
+    assert result.metrics['total_project_duration'] == max(s['end'] for s in expected.values())
+
+
+def test_requested_workers_are_capped_by_the_server(monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    assert TaskOptimizer._workers({'workers': 1000}) == 2
+    assert TaskOptimizer._workers({'workers': 1}) == 1
+    assert TaskOptimizer._workers({}) == 2
+
+
+def _problem(seed):
+    rng = random.Random(seed)
+    tasks = [
+        {'id': i, 'duration': rng.randint(1, 9), 'priority': rng.randint(1, 3),
+         'depends_on': [i - 1] if i and rng.random() < 0.3 else []}
+        for i in range(30)
+    ]
+    return {'tasks': tasks, 'resources': ['a', 'b', 'c']}
+
+
+def test_result_survives_pickling():
+    problem = _problem(0)
+    result = TaskOptimizer().optimize(problem['tasks'], problem['resources'])
+
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert restored.schedule.to_dict() == result.schedule.to_dict()
+    assert dict(restored.metrics) == dict(result.metrics)
+    with pytest.raises(TypeError):
+        restored.metrics['total_tasks'] = 0
+
+
+def test_optimize_many_in_worker_processes(monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    problems = [_problem(seed) for seed in range(4)]
+
+    results = TaskOptimizer().optimize_many(problems, max_workers=2)
+
+    assert all(result.ok for result in results)
+    for problem, result in zip(problems, results):
+        expected = TaskOptimizer().optimize(problem['tasks'], problem['resources'])
+        assert result.schedule.to_dict() == expected.schedule.to_dict()
+
+
+def _timed_sleep(seconds):
+    started = time.time()
+    time.sleep(seconds)
+    return started, time.time()
+
+
+def test_bounded_map_limits_work_in_flight(monkeypatch):
+    optimizer_module._shutdown_pool()
+    monkeypatch.setenv('MAX_WORKERS', '3')
+    try:
+        intervals = optimizer_module._map_bounded(_timed_sleep, [0.2] * 4, 1)
+    finally:
+        optimizer_module._shutdown_pool()
+
+    assert len(intervals) == 4
+    for (_, end), (start, _) in zip(intervals, intervals[1:]):
+        assert start >= end
+
+
+def test_dependency_cycles_are_rejected():
+    tasks = [
+        {'id': 1, 'duration': 1, 'depends_on': [3]},
+        {'id': 2, 'duration': 1, 'depends_on': [1]},
+        {'id': 3, 'duration': 1, 'depends_on': [2]},
+        {'id': 4, 'duration': 1}
+    ]
+    with pytest.raises(ValueError, match='cycle'):
+        TaskOptimizer().optimize(tasks, ['a'])
+
+
+def test_unknown_prerequisites_are_rejected():
+    with pytest.raises(ValueError, match='unknown task 9'):
+        TaskOptimizer().optimize([{'id': 1, 'duration': 1, 'depends_on': [9]}], ['a'])
+
+
+def test_critical_path_slack_on_a_diamond():
+    tasks = [
+        {'id': 'a', 'duration': 3},
+        {'id': 'b', 'duration': 2, 'depends_on': ['a']},
+        {'id': 'c', 'duration': 5, 'depends_on': ['a']},
+        {'id': 'd', 'duration': 1, 'depends_on': ['b', 'c']}
+    ]
+    result = TaskOptimizer().optimize(tasks, ['x', 'y'])
+
+    assert result.metrics['critical_path'] == ['a', 'c', 'd']
+    assert result.metrics['critical_path_duration'] == 9
+    schedule = result.schedule.to_dict()
+    assert {task_id: entry['slack'] for task_id, entry in schedule.items()} == \
+        {'a': 0, 'b': 3, 'c': 0, 'd': 0}
+    assert schedule['d']['start'] == 8
+    assert schedule['b']['start'] >= schedule['a']['end']
+
+
+def test_long_chains_match_the_level_passes():
+    # 300 levels of width 2 take the sequential passes; the same graph
+    # with many independent tasks added keeps the vectorized ones
+    chain = []
+    for i in range(300):
+        chain.append({'id': f'm{i}', 'duration': 1 + i % 4,
+                      'depends_on': [f'm{i - 1}', f's{i - 1}'] if i else []})
+        chain.append({'id': f's{i}', 'duration': 1 + i % 3,
+                      'depends_on': [f'm{i - 1}'] if i else []})
+    wide = chain + [{'id': f'w{i}', 'duration': 1} for i in range(20_000)]
+
+    narrow = TaskOptimizer().optimize(chain, ['x', 'y'])
+    broad = TaskOptimizer().optimize(wide, ['x', 'y'])
+
+    assert narrow.metrics['critical_path_duration'] == broad.metrics['critical_path_duration']
+    assert narrow.metrics['critical_path'] == broad.metrics['critical_path']
+    slack = {task_id: entry['slack'] for task_id, entry in narrow.schedule.to_dict().items()}
+    broad_slack = broad.schedule.to_dict()
+    assert all(broad_slack[task_id]['slack'] == value for task_id, value in slack.items())
+
+
+def _reference_earliest_start(blackouts, time, duration):
+    """Earliest start >= time clear of every blackout, by scanning them all."""
+    start = time
+    moved = True
+    while moved:
+        moved = False
+        for lo, hi in blackouts:
+            if lo < start + duration and start < hi or lo <= start < hi:
+                start, moved = hi, True
+    return start
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_calendar_lookup_matches_a_scan(seed):
+    rng = random.Random(seed)
+    blackouts = []
+    for _ in range(rng.randint(0, 60)):
+        start = rng.uniform(0, 100)
+        blackouts.append([start, start + rng.uniform(0.1, 4)])
+    calendar = ResourceCalendar(blackouts)
+
+    for _ in range(200):
+        time_, duration = rng.uniform(0, 110), rng.choice([0, 0.5, 1, 3, rng.uniform(0, 8)])
+        assert calendar.earliest_start(time_, duration) == \
+            _reference_earliest_start(blackouts, time_, duration)
+
+
+def test_tasks_start_in_the_first_gap_that_fits():
+    tasks = [{'id': 'short', 'duration': 2, 'priority': 2}, {'id': 'long', 'duration': 3}]
+    result = TaskOptimizer().optimize(tasks, ['a'], {'blackouts': {'a': [[2, 4], [5, 10]]}})
+
+    schedule = result.schedule.to_dict()
+    assert (schedule['short']['start'], schedule['short']['end']) == (0, 2)
+    assert (schedule['long']['start'], schedule['long']['end']) == (10, 13)
+    assert result.metrics['constraints']['unavailable_tasks'] == 0
+
+
+def test_tasks_go_to_the_team_that_is_available():
+    tasks = [{'id': i, 'duration': 2} for i in range(3)]
+    result = TaskOptimizer().optimize(tasks, ['a', 'b'], {'availability': {'a': [[6, 100]]}})
+
+    schedule = result.schedule.to_dict()
+    assert [(entry['team'], entry['start']) for entry in schedule.values()] == \
+        [('b', 0), ('b', 2), ('b', 4)]
+
+
+def test_tasks_that_fit_no_availability_are_reported():
+    tasks = [{'id': 1, 'duration': 5, 'priority': 2}, {'id': 2, 'duration': 1},
+             {'id': 3, 'duration': 1, 'depends_on': [1]}]
+    result = TaskOptimizer().optimize(tasks, ['a', 'b'],
+                                      {'availability': {'a': [[0, 2]], 'b': [[0, 2]]}})
+
+    report = result.metrics['constraints']
+    assert report['unavailable_tasks'] == 2
+    assert report['unavailable_task_ids'] == [1, 3]
+    schedule = result.schedule.to_dict()
+    assert (schedule[1]['team'], schedule[1]['start']) == ('a', 0)
+    assert (schedule[2]['team'], schedule[2]['start']) == ('b', 0)
+    assert schedule[3]['start'] == schedule[1]['end']
+
+
+def test_calendars_without_blackouts_change_nothing():
+    problem = _problem(3)
+    plain = TaskOptimizer().optimize(problem['tasks'], problem['resources'])
+    empty = TaskOptimizer().optimize(problem['tasks'], problem['resources'],
+                                     {'blackouts': {'a': [], 'c': []}})
+
+    assert empty.schedule.to_dict() == plain.schedule.to_dict()
+
+
+def test_release_times_delay_tasks_and_their_successors():
+    tasks = [{'id': 1, 'duration': 2}, {'id': 2, 'duration': 3, 'depends_on': [1]},
+             {'id': 3, 'duration': 1}]
+    result = TaskOptimizer().optimize(tasks, ['a', 'b'], {'release_times': {'1': 4}})
+
+    schedule = result.schedule.to_dict()
+    assert schedule[1]['start'] == 4
+    assert schedule[2]['start'] == 6
+    assert schedule[3]['start'] == 0
+
+
+def test_deadlines_dispatch_earliest_first_and_report_lateness():
+    tasks = [{'id': 'x', 'duration': 4}, {'id': 'y', 'duration': 4},
+             {'id': 'z', 'duration': 3}]
+    result = TaskOptimizer().optimize(tasks, ['a'], {
+        'deadlines': {'y': 4, 'z': 2},
+        'release_times': {'z': 1}
+    })
+
+    schedule = result.schedule.to_dict()
+    assert [schedule[task]['start'] for task in 'zyx'] == [1, 4, 8]
+    report = result.metrics['constraints']
+    assert report['infeasible_tasks'] == 1
+    assert report['infeasible_task_ids'] == ['z']
+    assert report['missed_deadlines'] == 2
+    assert report['late_tasks'] == ['y', 'z']
+    assert report['max_lateness'] == 4
+
+
+def test_tasks_go_to_teams_with_every_required_skill():
+    resources = [
+        {'name': 'backend', 'skills': ['python']},
+        {'name': 'data', 'skills': ['python', 'ml'], 'capacity': 2},
+        {'name': 'web', 'skills': ['js']}
+    ]
+    tasks = [
+        {'id': 'train', 'duration': 4, 'required_skills': ['ml', 'python']},
+        {'id': 'tune', 'duration': 4, 'required_skills': ['ml']},
+        {'id': 'ui', 'duration': 2, 'required_skills': ['js']},
+        {'id': 'docs', 'duration': 1}
+    ]
+    schedule = TaskOptimizer().optimize(tasks, resources).schedule.to_dict()
+
+    assert schedule['train']['team'] == schedule['tune']['team'] == 'data'
+    assert schedule['train']['start'] == schedule['tune']['start'] == 0
+    assert schedule['ui']['team'] == 'web'
+    assert schedule['docs']['team'] == 'backend'
+
+
+def test_unmatched_skills_are_rejected():
+    resources = [{'name': 'a', 'skills': ['python']}, {'name': 'b', 'skills': ['ml']}]
+    with pytest.raises(ValueError, match='requires skill go'):
+        TaskOptimizer().optimize([{'id': 1, 'duration': 1, 'required_skills': ['go']}],
+                                 resources)
+    with pytest.raises(ValueError, match='no single resource'):
+        TaskOptimizer().optimize(
+            [{'id': 1, 'duration': 1, 'required_skills': ['python', 'ml']}], resources)
+
+
+def test_skill_picks_do_not_scan_every_team():
+    # 400 teams with distinct skill sets make 400 classes, all eligible
+    # for tasks without skills; a pick must not cost a pass over them
+    rng = random.Random(0)
+    skills = [f's{k}' for k in range(100)]
+    resources = [{'name': f't{k}', 'skills': rng.sample(skills, 3)} for k in range(400)]
+    tasks = [{'id': i, 'duration': rng.randint(1, 9)} for i in range(40_000)]
+    tasks[0]['required_skills'] = resources[0]['skills'][:1]
+    plain = [dict(task, depends_on=[0] if task['id'] == 1 else []) for task in tasks]
+    plain[0].pop('required_skills')
+
+    def timed(tasks, resources):
+        started = time.perf_counter()
+        TaskOptimizer().optimize(tasks, resources)
+        return time.perf_counter() - started
+
+    timed(plain, [resource['name'] for resource in resources])
+    baseline = timed(plain, [resource['name'] for resource in resources])
+    assert timed(tasks, resources) < 4 * baseline + 0.1
+
+
+def _chains():
+    """Two dependency chains and two independent tasks: four components."""
+    return [
+        {'id': 'a1', 'duration': 3}, {'id': 'a2', 'duration': 2, 'depends_on': ['a1']},
+        {'id': 'b1', 'duration': 1}, {'id': 'b2', 'duration': 3, 'depends_on': ['b1']},
+        {'id': 'c', 'duration': 2}, {'id': 'd', 'duration': 6}
+    ]
+
+
+def test_decomposed_shards_keep_to_their_slots(monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    tasks = _chains()
+    result = TaskOptimizer().optimize(tasks, ['x', 'y', 'z', 'w'],
+                                      {'decompose': True, 'workers': 2})
+
+    assert result.metrics['decomposition'] == {'components': 4, 'shards': 2, 'workers': 2}
+    schedule = result.schedule.to_dict()
+    for task in tasks:
+        for prerequisite in task.get('depends_on', []):
+            assert schedule[task['id']]['start'] >= schedule[prerequisite]['end']
+    # Work 6 (d) and 2 (c) make one shard on slots x, y; 5 (a) and 4 (b)
+    # the other on z, w
+    assert {schedule[task_id]['team'] for task_id in ('c', 'd')} <= {'x', 'y'}
+    assert {schedule[task_id]['team'] for task_id in ('a1', 'a2', 'b1', 'b2')} <= {'z', 'w'}
+
+
+@pytest.mark.parametrize('rule', ['spt', 'lpt'])
+def test_decomposed_shards_use_the_dispatch_rule(monkeypatch, rule):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    tasks = [{'id': i, 'duration': duration} for i, duration in enumerate([1, 5, 2, 4, 3, 6])]
+    result = TaskOptimizer().optimize(tasks, ['x', 'y'],
+                                      {'decompose': True, 'workers': 2, 'dispatch': rule})
+
+    assert result.metrics['decomposition']['shards'] == 2
+    runs = {}
+    for entry in sorted(result.schedule.to_dict().values(), key=itemgetter('start')):
+        runs.setdefault(entry['team'], []).append(entry['duration'])
+    for durations in runs.values():
+        assert durations == sorted(durations, reverse=rule == 'lpt')
+
+
+def test_decomposition_takes_one_dispatch_rule():
+    with pytest.raises(ValueError, match='single dispatch rule'):
+        TaskOptimizer().optimize(_chains(), ['x', 'y'],
+                                 {'decompose': True, 'dispatch': ['spt', 'lpt']})
+
+
+def test_search_that_does_not_help_keeps_the_decomposed_schedule(monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS', '2')
+    tasks = [
+        {'id': 'a1', 'duration': 3}, {'id': 'b1', 'duration': 1},
+        {'id': 'a2', 'duration': 4, 'depends_on': ['a1']},
+        {'id': 'b2', 'duration': 1, 'depends_on': ['b1']}
+    ]
+    constraints = {'decompose': True, 'workers': 2}
+    decomposed = TaskOptimizer().optimize(tasks, ['x', 'y', 'z'], constraints)
+
+    # A search that claims a shorter schedule for the order it was given;
+    # decoded on all slots that order assigns teams differently
+    def improve_schedule(table, num_teams, budget, **options):
+        return {'makespan': 0, 'sequence': table.sequence.copy(), 'evaluations': 1,
+                'trace': []}
+    monkeypatch.setattr(optimizer_module, 'improve_schedule', improve_schedule)
+    searched = TaskOptimizer().optimize(tasks, ['x', 'y', 'z'], dict(constraints, time_budget=1))
+
+    assert searched.schedule.to_dict() == decomposed.schedule.to_dict()
+    assert searched.metrics['search']['best_makespan'] == 7
@@ -0,0 +1,43 @@
+"""Tests for the anytime schedule search."""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.optimizer import TaskOptimizer
+from src.search import improve_schedule
+from src.task_table import TaskTable
+
+
+def _scheduled_table(num_tasks, seed=0):
+    rng = np.random.default_rng(seed)
+    tasks = [
+        {'id': i, 'duration': int(rng.integers(1, 10)), 'priority': int(rng.integers(1, 4)),
+         'depends_on': [int(rng.integers(i))] if i and rng.random() < 0.5 else []}
+        for i in range(num_tasks)
+    ]
+    table = TaskTable.from_dicts(tasks)
+    TaskOptimizer()._assign_resources(table, [f'team_{k}' for k in range(8)])
+    return table
+
+
+@pytest.mark.parametrize('method', ['local', 'genetic'])
+def test_search_never_returns_a_longer_schedule(method):
+    table = _scheduled_table(200)
+
+    outcome = improve_schedule(table, 8, 0.2, method=method)
+
+    assert outcome['makespan'] <= table.end.max()
+    assert sorted(outcome['sequence'].tolist()) == list(range(len(table)))
+
+
+def test_tiny_budget_returns_within_bound_on_large_tables():
+    table = _scheduled_table(50_000)
+
+    started = time.perf_counter()
+    outcome = improve_schedule(table, 8, 0.01)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    np.testing.assert_array_equal(outcome['sequence'], table.sequence)
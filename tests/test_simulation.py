@@ -0,0 +1,71 @@
+"""Tests for the on-time forecast."""
+
+from src.optimizer import TaskOptimizer
+
+TASKS = [
+    {'id': i, 'duration': 2 + i % 5, 'priority': 1 + i % 3,
+     'depends_on': [i - 1] if i % 4 else []}
+    for i in range(40)
+]
+RESOURCES = ['a', 'b', 'c']
+
+
+def test_forecast_is_opt_in():
+    metrics = TaskOptimizer().optimize(TASKS, RESOURCES).metrics
+
+    assert metrics['on_time_probability'] is None
+    assert 'simulation' not in metrics
+
+
+def test_forecast_without_deadline_or_target_has_no_probability():
+    metrics = TaskOptimizer().optimize(TASKS, RESOURCES, {'simulation': {}}).metrics
+
+    assert metrics['on_time_probability'] is None
+    assert metrics['simulation']['samples'] > 0
+
+
+def test_fixed_durations_meet_the_planned_makespan():
+    makespan = TaskOptimizer().optimize(TASKS, RESOURCES).metrics['total_project_duration']
+    constraints = {'simulation': {'cv': 0, 'samples': 50, 'target': makespan}}
+
+    metrics = TaskOptimizer().optimize(TASKS, RESOURCES, constraints).metrics
+
+    assert metrics['on_time_probability'] == 100.0
+    assert metrics['simulation']['mean_makespan'] == makespan
+
+
+def test_forecast_against_deadlines():
+    constraints = {'deadline': 10_000, 'simulation': {'samples': 200}}
+
+    metrics = TaskOptimizer().optimize(TASKS, RESOURCES, constraints).metrics
+
+    assert metrics['on_time_probability'] == 100.0
+
+
+def test_fixed_durations_keep_to_calendars():
+    constraints = {
+        'blackouts': {'a': [[5, 9], [20, 21], [30, 60]], 'b': [[0, 3], [12, 40]]},
+        'availability': {'c': [[0, 15], [25, 100]]}
+    }
+    makespan = TaskOptimizer().optimize(TASKS, RESOURCES, constraints).metrics[
+        'total_project_duration']
+    constraints['simulation'] = {'cv': 0, 'samples': 20, 'target': makespan}
+
+    metrics = TaskOptimizer().optimize(TASKS, RESOURCES, constraints).metrics
+
+    assert metrics['on_time_probability'] == 100.0
+    assert metrics['simulation']['mean_makespan'] == makespan
+
+
+def test_delays_wait_for_the_calendar():
+    tasks = [{'id': 1, 'duration': 4}, {'id': 2, 'duration': 4, 'depends_on': [1]}]
+    simulation = {'cv': 0.5, 'samples': 500, 'target': 8}
+    free = TaskOptimizer().optimize(tasks, ['a'], {'simulation': simulation}).metrics
+    constraints = {'blackouts': {'a': [[8, 100]]}, 'simulation': simulation}
+
+    metrics = TaskOptimizer().optimize(tasks, ['a'], constraints).metrics
+
+    # A chain that overruns 8 no longer fits before the blackout
+    assert metrics['simulation']['makespan_percentiles']['p90'] > 100
+    assert free['simulation']['makespan_percentiles']['p90'] < 100
+    assert metrics['on_time_probability'] == free['on_time_probability']
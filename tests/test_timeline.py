@@ -0,0 +1,81 @@
+"""Tests for time-based lookups over a schedule."""
+
+import random
+
+import pytest
+
+from src.optimizer import TaskOptimizer
+
+
+def _problem(seed):
+    rng = random.Random(seed)
+    tasks = [
+        {'id': i, 'duration': rng.choice([0, 1, 2, 3, 5]), 'priority': rng.randint(1, 3),
+         'depends_on': [rng.randrange(i)] if i and rng.random() < 0.3 else []}
+        for i in range(rng.randint(1, 80))
+    ]
+    resources = ['a', {'name': 'b', 'capacity': 3}, 'c']
+    return TaskOptimizer().optimize(tasks, resources)
+
+
+def _ids(result, rows):
+    return sorted(result.schedule.table.ids[rows].tolist())
+
+
+def _scan(result, keep):
+    return sorted(task_id for task_id, entry in result.schedule.to_dict().items() if keep(entry))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_lookups_match_a_scan(seed):
+    result = _problem(seed)
+    timeline = result.timeline
+    horizon = result.metrics['total_project_duration']
+    rng = random.Random(seed)
+
+    for _ in range(20):
+        time_ = rng.choice([rng.uniform(0, horizon), float(rng.randint(0, horizon))])
+        start = rng.randint(0, horizon)
+        end = start + rng.randint(0, 6)
+        team = rng.choice([None, 'a', 'b', 'c'])
+        on_team = (lambda entry: True) if team is None else \
+            (lambda entry: entry['team'] == team)
+
+        assert _ids(result, timeline.at(time_, team)) == _scan(
+            result, lambda e: on_team(e) and e['start'] <= time_ < e['end'])
+        assert _ids(result, timeline.overlapping(start, end, team)) == _scan(
+            result, lambda e: on_team(e) and e['start'] < end and
+            (e['end'] > start or e['start'] == e['end'] == start))
+    for team in ('a', 'b', 'c'):
+        assert _ids(result, timeline.team(team)) == _scan(result, lambda e: e['team'] == team)
+
+
+def test_results_come_by_start_time():
+    tasks = [{'id': 'late', 'duration': 2, 'depends_on': ['early']},
+             {'id': 'early', 'duration': 3}, {'id': 'side', 'duration': 4}]
+    timeline = TaskOptimizer().optimize(tasks, ['x', 'y']).timeline
+
+    entries = timeline.entries(timeline.overlapping(0, 10))
+    assert [entry['id'] for entry in entries] == ['early', 'side', 'late']
+    assert entries[2] == {'id': 'late', 'team': 'y', 'start': 3, 'end': 5}
+    assert [entry['id'] for entry in timeline.entries(timeline.at(3))] == ['side', 'late']
+
+
+def test_zero_duration_tasks_fall_only_in_windows():
+    tasks = [{'id': 'milestone', 'duration': 0, 'priority': 2}, {'id': 'work', 'duration': 2}]
+    result = TaskOptimizer().optimize(tasks, ['x'])
+    timeline = result.timeline
+
+    assert _ids(result, timeline.at(0)) == ['work']
+    assert _ids(result, timeline.overlapping(0, 1)) == ['milestone', 'work']
+    assert _ids(result, timeline.overlapping(-1, 0)) == []
+    assert _ids(result, timeline.overlapping(0, 0)) == []
+
+
+def test_bad_lookups_are_rejected():
+    timeline = TaskOptimizer().optimize([{'id': 1, 'duration': 1}], ['x']).timeline
+
+    with pytest.raises(KeyError):
+        timeline.at(0, 'nobody')
+    with pytest.raises(ValueError):
+        timeline.overlapping(5, 1)
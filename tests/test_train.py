@@ -0,0 +1,17 @@
+"""Tests for the training data split."""
+
+import numpy as np
+
+from train import split_rows
+
+
+def test_split_rows_is_a_seeded_shuffled_partition():
+    train_rows, test_rows = split_rows(1000)
+
+    assert len(test_rows) == 200
+    np.testing.assert_array_equal(np.sort(np.concatenate([train_rows, test_rows])),
+                                  np.arange(1000))
+    # Not a trailing block: sorted data would bias a holdout of the last rows
+    assert test_rows.min() < 800
+    again = split_rows(1000)
+    np.testing.assert_array_equal(again[1], test_rows)
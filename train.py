@@ -1,89 +1,361 @@
 """Training script for Task Optimization System."""
 
+import argparse
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
-from src.optimizer import TaskOptimizer
+from src.forest import export_forest, flat_path
 
+TARGET = 'completion_time'
+FEATURE_DTYPE = np.float32
+CHUNK_ROWS = 200_000
 
-def load_data(data_path='data/processed/training_data.csv'):
-    """Load training data from CSV."""
-    print(f"Loading data from {data_path}...")
-    df = pd.read_csv(data_path)
-    return df
+# Default hyperparameter grid for --search
+PARAM_GRID = {
+    'max_depth': [10, 15, 20, None],
+    'min_samples_leaf': [1, 5],
+    'max_features': [1.0, 'sqrt']
+}
 
 
-def preprocess_data(df):
-    """Preprocess data for training."""
-    print("Preprocessing data...")
-    # Handle missing values
-    df = df.fillna(df.mean())
-    
-    # Separate features and target
-    X = df.drop('completion_time', axis=1)
-    y = df['completion_time']
-    
-    return X, y
+def read_chunks(data_path, chunksize=CHUNK_ROWS):
+    """Stream the training CSV in chunks with every column read as float32."""
+    columns = pd.read_csv(data_path, nrows=0).columns
+    return pd.read_csv(
+        data_path,
+        chunksize=chunksize,
+        dtype={column: FEATURE_DTYPE for column in columns}
+    )
+
+
+def scan_columns(data_path, chunksize=CHUNK_ROWS):
+    """First pass: count rows and compute each column's mean over non-missing values."""
+    print(f"Scanning {data_path}...")
+    rows = 0
+    sums = None
+    counts = None
+    for chunk in read_chunks(data_path, chunksize):
+        values = chunk.to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        chunk_sums = np.where(present, values, 0.0).sum(axis=0)
+        chunk_counts = present.sum(axis=0)
+        sums = chunk_sums if sums is None else sums + chunk_sums
+        counts = chunk_counts if counts is None else counts + chunk_counts
+        rows += len(chunk)
+        columns = list(chunk.columns)
+
+    if not rows:
+        raise ValueError(f"No rows in {data_path}")
+    means = sums / np.maximum(counts, 1)
+    return rows, columns, dict(zip(columns, means.tolist()))
+
+
+def build_feature_cache(data_path='data/processed/training_data.csv',
+                        cache_dir='data/cache', chunksize=CHUNK_ROWS):
+    """Write the imputed feature matrix and target as .npy files, once.
+
+    The second pass fills missing values with the column means and copies
+    each chunk into preallocated float32 arrays on disk, so memory stays
+    at one chunk. Later runs reuse the cache while the CSV is unchanged.
+
+    Returns:
+        (X, y, feature_names) with X and y memory-mapped read-only
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    features_path = os.path.join(cache_dir, 'features.npy')
+    target_path = os.path.join(cache_dir, 'target.npy')
+    meta_path = os.path.join(cache_dir, 'features.json')
+    stat = os.stat(data_path)
+    source = {'path': os.path.abspath(data_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    if os.path.exists(meta_path) and os.path.exists(features_path) and os.path.exists(target_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['source'] == source:
+            print(f"Using cached features from {cache_dir}...")
+            return (np.load(features_path, mmap_mode='r'), np.load(target_path, mmap_mode='r'),
+                    meta['features'])
+
+    rows, columns, means = scan_columns(data_path, chunksize)
+    if TARGET not in columns:
+        raise ValueError(f"{data_path} has no {TARGET} column")
+    features = [column for column in columns if column != TARGET]
+
+    print(f"Caching {rows} x {len(features)} feature matrix in {cache_dir}...")
+    X = np.lib.format.open_memmap(features_path, mode='w+', dtype=FEATURE_DTYPE,
+                                  shape=(rows, len(features)))
+    y = np.lib.format.open_memmap(target_path, mode='w+', dtype=FEATURE_DTYPE, shape=(rows,))
+    offset = 0
+    for chunk in read_chunks(data_path, chunksize):
+        chunk = chunk.fillna(means)
+        end = offset + len(chunk)
+        X[offset:end] = chunk[features].to_numpy()
+        y[offset:end] = chunk[TARGET].to_numpy()
+        offset = end
+    X.flush()
+    y.flush()
+    del X, y
+
+    with open(meta_path, 'w') as f:
+        json.dump({'source': source, 'features': features, 'means': means}, f, indent=2)
+
+    return np.load(features_path, mmap_mode='r'), np.load(target_path, mmap_mode='r'), features
+
 
+def split_rows(n, test_size=0.2, seed=42):
+    """Shuffle the rows with a fixed seed and hold out test_size of them.
 
-def train_model(X, y):
-    """Train the optimization model."""
+    Rows are shuffled, as train_test_split(..., random_state=42) did, so
+    data sorted by date or category does not end up all in the holdout.
+    Returns the training and test row indices.
+    """
+    rows = np.random.default_rng(seed).permutation(n)
+    n_test = int(round(n * test_size))
+    return rows[n_test:], rows[:n_test]
+
+
+def take_rows(X, rows):
+    """Gather rows in file order, which keeps reads from a memmap sequential."""
+    return X[np.sort(rows)]
+
+
+def fit_scaler(X, feature_names, rows, chunksize=CHUNK_ROWS):
+    """Fit a StandardScaler on the given rows, chunk by chunk."""
+    scaler = StandardScaler()
+    for start in range(0, len(rows), chunksize):
+        chunk = take_rows(X, rows[start:start + chunksize])
+        scaler.partial_fit(pd.DataFrame(chunk, columns=feature_names))
+    return scaler
+
+
+def scaled(scaler, X):
+    """Scale rows to float32 without going through a float64 copy."""
+    return ((X - scaler.mean_.astype(FEATURE_DTYPE)) / scaler.scale_.astype(FEATURE_DTYPE))
+
+
+def chunked_score(model, scaler, X, y, rows, chunksize=CHUNK_ROWS):
+    """R^2 of the model over the given rows, predicted chunk by chunk."""
+    residual = 0.0
+    total = 0.0
+    mean = float(np.mean(take_rows(y, rows), dtype=np.float64))
+    for start in range(0, len(rows), chunksize):
+        chunk = rows[start:start + chunksize]
+        pred = model.predict(scaled(scaler, take_rows(X, chunk)))
+        target = np.asarray(take_rows(y, chunk), dtype=np.float64)
+        residual += float(((target - pred) ** 2).sum())
+        total += float(((target - mean) ** 2).sum())
+    return 1.0 - residual / total if total else 0.0
+
+
+def train_model(X, y, feature_names, incremental=False, chunksize=CHUNK_ROWS,
+                n_estimators=100, max_depth=15, params=None):
+    """Train the optimization model.
+
+    By default the forest is fit on the scaled training rows in one go.
+    With incremental=True each chunk of training rows grows its own share
+    of the trees through warm_start, so memory is bounded by one chunk.
+    params adds further RandomForestRegressor arguments.
+    """
     print("Training model...")
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-    
+
+    train_rows, test_rows = split_rows(len(X))
+
     # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    # Train model
+    scaler = fit_scaler(X, feature_names, train_rows, chunksize)
+
     model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=15,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
         random_state=42,
-        n_jobs=-1
+        n_jobs=-1,
+        **(params or {})
     )
-    model.fit(X_train_scaled, y_train)
-    
+    if not incremental:
+        model.fit(scaled(scaler, take_rows(X, train_rows)), take_rows(y, train_rows))
+    else:
+        # Chunks of the shuffled training rows are random samples of them
+        starts = list(range(0, len(train_rows), chunksize))
+        model.set_params(warm_start=True, n_estimators=0)
+        for i, start in enumerate(starts):
+            # Spread the trees evenly over the chunks
+            grown = n_estimators * (i + 1) // len(starts)
+            if grown == model.n_estimators:
+                continue
+            model.set_params(n_estimators=grown)
+            chunk = train_rows[start:start + chunksize]
+            model.fit(scaled(scaler, take_rows(X, chunk)), take_rows(y, chunk))
+            print(f"  chunk {i + 1}/{len(starts)}: {grown} trees")
+
     # Evaluate
-    train_score = model.score(X_train_scaled, y_train)
-    test_score = model.score(X_test_scaled, y_test)
-    
+    train_score = chunked_score(model, scaler, X, y, train_rows, chunksize)
+    test_score = chunked_score(model, scaler, X, y, test_rows, chunksize)
+
     print(f"Training score: {train_score:.4f}")
     print(f"Testing score: {test_score:.4f}")
-    
+
     return model, scaler
 
 
+def _open_array(source):
+    """Memory-map an array passed by file name, or return it unchanged."""
+    return np.load(source, mmap_mode='r') if isinstance(source, str) else source
+
+
+def _fit_fold(job):
+    """Grow one forest on one CV fold until validation error plateaus.
+
+    Trees are added `step` at a time with warm_start. The fit stops once
+    `patience` consecutive steps improve the best validation MSE by less
+    than `tolerance` (relative), or at max_estimators.
+    """
+    X_source, y_source, train_rows, test_rows, params, step, max_estimators, \
+        tolerance, patience = job
+    X, y = _open_array(X_source), _open_array(y_source)
+    X_train, y_train = take_rows(X, train_rows), take_rows(y, train_rows)
+    X_test, y_test = take_rows(X, test_rows), np.asarray(take_rows(y, test_rows),
+                                                         dtype=np.float64)
+
+    started = time.perf_counter()
+    model = RandomForestRegressor(warm_start=True, n_estimators=0, random_state=42,
+                                  n_jobs=1, **params)
+    best_mse, best_trees, stale = np.inf, 0, 0
+    curve = []
+    # Running sum of tree predictions, so each step predicts only new trees
+    total = np.zeros(len(y_test))
+    while model.n_estimators < max_estimators and stale < patience:
+        grown = len(model.estimators_) if hasattr(model, 'estimators_') else 0
+        model.set_params(n_estimators=min(model.n_estimators + step, max_estimators))
+        model.fit(X_train, y_train)
+        for tree in model.estimators_[grown:]:
+            total += tree.predict(X_test)
+        mse = float(np.mean((y_test - total / model.n_estimators) ** 2))
+        curve.append([model.n_estimators, round(mse, 6)])
+        if mse < best_mse * (1 - tolerance):
+            stale = 0
+        else:
+            stale += 1
+        if mse < best_mse:
+            best_mse, best_trees = mse, model.n_estimators
+
+    variance = float(np.var(y_test))
+    return {
+        'mse': best_mse,
+        'r2': 1 - best_mse / variance if variance else 0.0,
+        'n_estimators': best_trees,
+        'seconds': time.perf_counter() - started,
+        'curve': curve
+    }
+
+
+def search_hyperparameters(X, y, grid=None, folds=3, step=25, max_estimators=300,
+                           tolerance=0.005, patience=2, workers=None):
+    """Cross-validate every combination in grid in parallel.
+
+    Each (configuration, fold) pair is one job in a process pool and
+    stops growing trees early once its validation error plateaus. Only
+    the training rows are searched; the holdout stays untouched. Trees do
+    not depend on feature scale, so the search fits unscaled features.
+    Memory-mapped inputs are reopened by file name in the workers.
+
+    Returns:
+        One result per configuration, best (lowest CV MSE) first
+    """
+    grid = grid or PARAM_GRID
+    train_rows, _ = split_rows(len(X))
+    X_source = X.filename if isinstance(X, np.memmap) else X
+    y_source = y.filename if isinstance(y, np.memmap) else y
+
+    # The training rows are shuffled, so consecutive parts are random folds
+    parts = np.array_split(train_rows, folds)
+    splits = [
+        (np.concatenate(parts[:k] + parts[k + 1:]), parts[k])
+        for k in range(folds)
+    ]
+    configs = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    jobs = [
+        (X_source, y_source, train_fold, test_fold, params, step, max_estimators,
+         tolerance, patience)
+        for params in configs for train_fold, test_fold in splits
+    ]
+
+    print(f"Searching {len(configs)} configurations x {folds} folds...")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        outcomes = list(pool.map(_fit_fold, jobs))
+
+    results = []
+    for i, params in enumerate(configs):
+        fold_results = outcomes[i * folds:(i + 1) * folds]
+        results.append({
+            'params': params,
+            'cv_mse': float(np.mean([r['mse'] for r in fold_results])),
+            'cv_r2': float(np.mean([r['r2'] for r in fold_results])),
+            'n_estimators': int(round(np.mean([r['n_estimators'] for r in fold_results]))),
+            'fit_seconds': round(sum(r['seconds'] for r in fold_results), 3),
+            'folds': fold_results
+        })
+    results.sort(key=lambda result: result['cv_mse'])
+
+    print(f"{'params':<60} {'cv_mse':>10} {'cv_r2':>8} {'trees':>6} {'seconds':>8}")
+    for result in results:
+        print(f"{json.dumps(result['params']):<60} {result['cv_mse']:>10.4f} "
+              f"{result['cv_r2']:>8.4f} {result['n_estimators']:>6} {result['fit_seconds']:>8.1f}")
+    return results
+
+
 def save_model(model, scaler, model_path='models/trained_model.pkl'):
-    """Save trained model and scaler."""
+    """Save trained model and scaler, plus the flat forest workers load."""
     print(f"Saving model to {model_path}...")
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
     joblib.dump(model, model_path)
     joblib.dump(scaler, model_path.replace('trained_model', 'scaler'))
+    export_forest(model, flat_path(model_path))
     print("Model saved successfully!")
 
 
 if __name__ == '__main__':
-    # Load data
-    df = load_data()
-    
-    # Preprocess
-    X, y = preprocess_data(df)
-    
+    parser = argparse.ArgumentParser(description='Train the completion time model.')
+    parser.add_argument('--data', default='data/processed/training_data.csv')
+    parser.add_argument('--cache-dir', default='data/cache')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--incremental', action='store_true',
+                        help='Grow the forest chunk by chunk instead of fitting all rows at once')
+    parser.add_argument('--search', action='store_true',
+                        help='Cross-validate a parameter grid and train the best configuration')
+    parser.add_argument('--grid', type=json.loads,
+                        help='Parameter grid as JSON, e.g. \'{"max_depth": [10, 20]}\'')
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--report', default='models/search_report.json')
+    args = parser.parse_args()
+
+    # Load data (streamed into a reusable memory-mapped cache)
+    X, y, feature_names = build_feature_cache(args.data, args.cache_dir, args.chunksize)
+
+    # Pick hyperparameters
+    settings = {}
+    if args.search:
+        results = search_hyperparameters(X, y, args.grid, args.folds, workers=args.workers)
+        best = results[0]
+        settings = {'n_estimators': best['n_estimators'],
+                    'max_depth': best['params'].get('max_depth', 15),
+                    'params': {k: v for k, v in best['params'].items() if k != 'max_depth'}}
+        os.makedirs(os.path.dirname(args.report), exist_ok=True)
+        with open(args.report, 'w') as f:
+            json.dump({'best': best['params'], 'results': results}, f, indent=2)
+        print(f"Best configuration: {best['params']} with {best['n_estimators']} trees")
+
     # Train
-    model, scaler = train_model(X, y)
-    
+    model, scaler = train_model(X, y, feature_names, args.incremental, args.chunksize, **settings)
+
     # Save
     save_model(model, scaler)
-    
+
     print("\nTraining completed!")
     print("Model ready for deployment.")